@@ -0,0 +1,59 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Batch entry point, running many projects under `assets/` at once.
+"""
+
+import asyncio
+import functools
+from loguru import logger
+from llm_harness.cli import parse_batch_arguments
+from llm_harness.core.batch import BatchRunner, format_results
+from llm_harness.core.pipeline import create_generator, create_scheduler
+
+
+def batch() -> bool:
+    """
+    Generates, builds and evaluates harnesses for a batch of projects, and
+    prints a table of the results.
+
+    Returns:
+        bool: Whether every project got a harness up to par.
+    """
+    args = parse_batch_arguments()
+    logger.info(f"Running a batch of {len(args.projects)} projects...")
+
+    # Every project's requests count towards the same rate limits
+    scheduler = create_scheduler(args.projects[0])
+    runner = BatchRunner(
+        llm_concurrency=args.llm_concurrency,
+        compile_concurrency=args.compile_concurrency,
+        fuzz_concurrency=args.fuzz_concurrency,
+        generator_factory=functools.partial(
+            create_generator, scheduler=scheduler
+        ),
+    )
+    results = asyncio.run(runner.run(args.projects))
+    print(format_results(results))
+
+    logger.info("All done!")
+    return all(result.accepted for result in results)
+
+
+if __name__ == "__main__":
+    batch()
@@ -19,13 +19,24 @@
 Main function utilizing the llm_harness package.
 """
 
+import functools
+import os
+from dataclasses import replace
 from loguru import logger
 from llm_harness.cli import parse_arguments
 from llm_harness.core.analyzer import ProjectAnalyzer
-from llm_harness.core.generator import HarnessGenerator
-from llm_harness.core.builder import HarnessBuilder
-from llm_harness.core.evaluator import HarnessEvaluator
+from llm_harness.core.candidates import CandidateRunner
+from llm_harness.core.pipeline import (
+    create_builder,
+    create_coverage,
+    create_evaluator,
+    create_generators,
+    create_scheduler,
+    discover_targets,
+    select_context,
+)
 from llm_harness.io.file_manager import FileManager
+from llm_harness.io.walker import ProjectTree
 
 
 def main() -> bool:
@@ -34,30 +45,84 @@ def main() -> bool:
     LLM to create and write a harness for the project.
 
     Returns:
-        bool: Whether the harness is up to par to be merged to the project.
+        bool: Whether the harness of every target is up to par to be merged
+        to the project.
     """
     args = parse_arguments()
-    project_path, model = args.project_path, args.model
+    project_path = args.project_path
 
     logger.info("Reading project and collecting information...")
-    analyzer = ProjectAnalyzer(project_path)
+    tree = ProjectTree(project_path)
+    analyzer = ProjectAnalyzer(
+        project_path,
+        args.file_patterns,
+        incremental=args.incremental,
+        tree=tree,
+    )
     project_info = analyzer.collect_project_info()
+    logger.info(f"Project fingerprint: {project_info.get_fingerprint()}")
 
-    logger.info("Calling LLM to generate a harness...")
-    generator = HarnessGenerator(model=model)
-    harness = generator.create_harness(project_info=project_info)
+    builder = create_builder(args, tree)
+    # The project's sources do not depend on the harness, so they compile
+    # while the context is selected and the LLM is called
+    logger.info("Prebuilding the project in the background...")
+    builder.start_prebuild()
 
-    logger.info("Writing harness to project...")
-    file_manager = FileManager(project_path)
-    file_manager.write_harness(harness)
+    if args.discover:
+        discovered = discover_targets(args, analyzer, project_info)
+        if discovered:
+            args = replace(args, targets=discovered)
+        else:
+            logger.warning(
+                f"No target discovered, writing a harness for {args.target}"
+            )
 
-    logger.info("Building harness...")
-    builder = HarnessBuilder(project_path)
-    builder.build_harness()
+    # One context serves every target, so that all their prompts start
+    # with it and the provider's prompt cache serves it after the first
+    targets = args.targets or [args.target]
+    context = select_context(args, analyzer, project_info, targets)
 
-    logger.info("Evaluating harness...")
-    evaluator = HarnessEvaluator(project_path)
-    accepted = evaluator.evaulate_harness()
+    candidates = max(1, args.candidates)
+    # At most one evaluation per candidate runs at once, and those running
+    # share the CPUs between their fuzzers
+    eval_concurrency = min(candidates, os.cpu_count() or 1)
+    generators = create_generators(args, create_scheduler(args))
+    accepted = True
+    for target in targets:
+        # Ranks the code the harnesses miss by its distance from the
+        # target, in the whole project rather than the context sent to the
+        # LLM
+        coverage = create_coverage(
+            replace(args, target=target), analyzer, project_info, tree
+        )
+        logger.info(
+            f"Generating, building and evaluating {candidates} harnesses "
+            f"for {target}..."
+        )
+        runner = CandidateRunner(
+            generators[0],
+            FileManager(project_path),
+            builder,
+            functools.partial(
+                create_evaluator,
+                args,
+                coverage=coverage,
+                concurrency=eval_concurrency,
+            ),
+            llm_concurrency=args.llm_concurrency,
+            build_concurrency=args.jobs,
+            eval_concurrency=eval_concurrency,
+            repair_attempts=args.repair_attempts,
+            repair_time=args.repair_time,
+            refine_rounds=args.refine_rounds,
+            name_by_target=bool(args.targets),
+        )
+        best = runner.run_cascade(context, target, candidates, generators)[0]
+        if best.error:
+            if not args.targets:
+                raise RuntimeError(best.error)
+            logger.error(f"No harness for {target}: {best.error}")
+        accepted = accepted and best.accepted
 
     logger.info("All done!")
     return accepted
@@ -20,10 +20,11 @@ Command-line interface for llm_harness.
 """
 
 import os
+import glob
 import argparse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from loguru import logger
-from typing import List
+from typing import List, Optional
 from llm_harness.config import Config
 
 
@@ -34,6 +35,53 @@ class Arguments:
     project_path: str
     model: str
     file_patterns: List[str]
+    # Models of a cascade, cheapest first. Only `model` is used if empty.
+    cascade: List[str] = field(default_factory=list)
+    use_cache: bool = True
+    refresh_cache: bool = False
+    incremental: bool = False
+    target: str = Config.DEFAULT_TARGET
+    # Targets generated for in turn, sharing one context. Only `target` is
+    # generated for if empty.
+    targets: List[str] = field(default_factory=list)
+    # Number of targets to discover and generate for, if not given
+    discover: Optional[int] = None
+    token_budget: Optional[int] = None
+    context: str = "full"
+    top_k: int = Config.RETRIEVAL_TOP_K
+    query: str = ""
+    compress: bool = False
+    signatures_only: bool = False
+    candidates: int = Config.DEFAULT_CANDIDATES
+    llm_concurrency: int = Config.LLM_CONCURRENCY
+    requests_per_minute: float = Config.LLM_REQUESTS_PER_MINUTE
+    tokens_per_minute: float = Config.LLM_TOKENS_PER_MINUTE
+    llm_timeout: float = Config.LLM_TIMEOUT
+    llm_retries: int = Config.LLM_MAX_RETRIES
+    hedge: bool = False
+    stream: bool = False
+    repair_attempts: int = Config.REPAIR_ATTEMPTS
+    repair_time: float = Config.REPAIR_TIME_BUDGET
+    refine_rounds: int = Config.REFINE_ROUNDS
+    jobs: Optional[int] = Config.BUILD_JOBS
+    use_compilation_cache: bool = True
+    fuzz_time: Optional[int] = Config.FUZZ_MAX_TOTAL_TIME
+    fuzz_runs: Optional[int] = Config.FUZZ_RUNS
+    rss_limit_mb: int = Config.FUZZ_RSS_LIMIT_MB
+    fuzz_mode: str = Config.FUZZ_MODE
+    fuzz_workers: Optional[int] = Config.FUZZ_WORKERS
+    plateau_window: Optional[float] = Config.PLATEAU_WINDOW
+    plateau_rate: float = Config.PLATEAU_MIN_RATE
+
+
+@dataclass
+class BatchArguments:
+    """Command line arguments of a batch of projects."""
+
+    projects: List[Arguments]
+    llm_concurrency: int = Config.LLM_CONCURRENCY
+    compile_concurrency: Optional[int] = Config.COMPILE_CONCURRENCY
+    fuzz_concurrency: Optional[int] = Config.EVAL_CONCURRENCY
 
 
 def parse_arguments() -> Arguments:
@@ -53,6 +101,142 @@ def parse_arguments() -> Arguments:
         "harnesses are to be generated.",
     )
 
+    _add_pipeline_arguments(parser)
+
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        metavar="TARGET",
+        default=None,
+        help="Write a harness for each of these functions in turn, instead "
+        "of --target. Their prompts share the project's context, which the "
+        "provider caches after the first",
+    )
+
+    parser.add_argument(
+        "--discover",
+        type=int,
+        metavar="N",
+        default=None,
+        help="Write harnesses for the N functions most worth fuzzing, as "
+        "ranked by their parameters, names, and the code they reach, "
+        "instead of --target",
+    )
+
+    args = parser.parse_args()
+
+    # Build the project path
+    project_path = os.path.join(".", "assets", args.project)
+    if not os.path.exists(project_path):
+        logger.error(f"Project path does not exist: {project_path}")
+        raise FileNotFoundError(f"Project path does not exist: {project_path}")
+
+    arguments = _to_arguments(args, project_path, args.target)
+    arguments.targets = list(args.targets or [])
+    arguments.discover = args.discover
+    return arguments
+
+
+def parse_batch_arguments() -> BatchArguments:
+    """
+    Parses the command-line arguments of a batch of projects.
+
+    Returns:
+        BatchArguments: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate fuzzing harnesses for many C/C++ projects at "
+        "once"
+    )
+
+    parser.add_argument(
+        "projects",
+        nargs="+",
+        help="Names of, or glob patterns over, the projects under the "
+        "`assets/` directory. A project's target may follow its name, as in "
+        "`dateparse:parse_date`; the others use --target.",
+    )
+
+    _add_pipeline_arguments(parser)
+
+    parser.add_argument(
+        "--compile-concurrency",
+        type=int,
+        default=Config.COMPILE_CONCURRENCY,
+        help="Maximum number of concurrent compilations across projects "
+        "(default: one per CPU)",
+    )
+
+    parser.add_argument(
+        "--fuzz-concurrency",
+        type=int,
+        default=Config.EVAL_CONCURRENCY,
+        help="Maximum number of concurrent fuzzing runs across projects "
+        "(default: one per CPU)",
+    )
+
+    args = parser.parse_args()
+
+    projects: List[Arguments] = []
+    # Overlapping patterns match a project more than once
+    seen = set()
+    for spec in args.projects:
+        pattern, _, target = spec.partition(":")
+        paths = sorted(
+            path
+            for path in glob.glob(os.path.join(".", "assets", pattern))
+            if os.path.isdir(path)
+        )
+        if not paths:
+            logger.error(f"No project matches: {pattern}")
+            raise FileNotFoundError(f"No project matches: {pattern}")
+        for path in paths:
+            key = (os.path.realpath(path), target or args.target)
+            if key in seen:
+                logger.warning(
+                    f"Skipping {path}:{key[1]}, which is already in the batch"
+                )
+                continue
+            seen.add(key)
+            projects.append(_to_arguments(args, path, key[1]))
+
+    return BatchArguments(
+        projects=projects,
+        llm_concurrency=args.llm_concurrency,
+        compile_concurrency=args.compile_concurrency,
+        fuzz_concurrency=args.fuzz_concurrency,
+    )
+
+
+def _positive_int(value: str) -> int:
+    """
+    Parses an option that must be a positive integer.
+
+    Args:
+        value (str): The option's value.
+
+    Returns:
+        int: The value.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be positive: {number}")
+    return number
+
+
+def _add_pipeline_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the options of the generation, build and evaluation pipeline.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser.
+    """
     parser.add_argument(
         "-m",
         "--model",
@@ -61,6 +245,16 @@ def parse_arguments() -> Arguments:
         help=f"LLM model to be used. Available: {', '.join(Config.AVAILABLE_MODELS)}",
     )
 
+    parser.add_argument(
+        "--cascade",
+        nargs="*",
+        metavar="MODEL",
+        default=None,
+        help="Try these models in turn, cheapest first, moving on only if "
+        "no harness of the previous one is accepted. Without models, uses "
+        f"{', '.join(Config.CASCADE_MODELS)}",
+    )
+
     parser.add_argument(
         "-f",
         "--files",
@@ -69,14 +263,251 @@ def parse_arguments() -> Arguments:
         help="File patterns to include in analysis (e.g. *.c *.h)",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "-t",
+        "--target",
+        default=Config.DEFAULT_TARGET,
+        help="Name of the function to write a harness for",
+    )
 
-    # Build the project path
-    project_path = os.path.join(".", "assets", args.project)
-    if not os.path.exists(project_path):
-        logger.error(f"Project path does not exist: {project_path}")
-        raise FileNotFoundError(f"Project path does not exist: {project_path}")
+    parser.add_argument(
+        "--context",
+        choices=["full", "symbols", "retrieval"],
+        default="full",
+        help="Context sent to the LLM: every project file, only the "
+        "declarations and callees the target depends on, or the code chunks "
+        "most relevant to the target",
+    )
+
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=Config.RETRIEVAL_TOP_K,
+        help="Number of code chunks sent to the LLM with --context retrieval",
+    )
+
+    parser.add_argument(
+        "--query",
+        default="",
+        help="Description of the target's API, searched for along with its "
+        "name with --context retrieval",
+    )
+
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=None,
+        help="Pack the project's files into this many prompt tokens, "
+        "summarizing or truncating the least relevant ones",
+    )
+
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Strip comments, whitespace, repeated includes and duplicate "
+        "files from the context sent to the LLM",
+    )
+
+    parser.add_argument(
+        "--signatures-only",
+        action="store_true",
+        help="With --compress, also reduce the functions of files not "
+        "mentioning the target to their signatures",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--candidates",
+        type=int,
+        default=Config.DEFAULT_CANDIDATES,
+        help="Generate this many harnesses concurrently, build and evaluate "
+        "each as soon as it is generated, and keep the best "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=Config.LLM_CONCURRENCY,
+        help="Maximum number of concurrent LLM calls (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=Config.LLM_REQUESTS_PER_MINUTE,
+        help="LLM requests per minute allowed by the provider "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=Config.LLM_TOKENS_PER_MINUTE,
+        help="LLM prompt tokens per minute allowed by the provider "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--llm-timeout",
+        type=float,
+        default=Config.LLM_TIMEOUT,
+        help="Seconds to wait for an LLM response (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--llm-retries",
+        type=int,
+        default=Config.LLM_MAX_RETRIES,
+        help="Retries of rate-limited, failed or timed out LLM requests, "
+        "with jittered exponential backoff (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send LLM requests unanswered past the 95th percentile of "
+        "recent latencies once more, and keep the first response",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream LLM responses, writing the harness as it arrives and "
+        "closing the response as soon as the harness is complete",
+    )
+
+    parser.add_argument(
+        "--repair-attempts",
+        type=int,
+        default=Config.REPAIR_ATTEMPTS,
+        help="Rounds of sending a harness that fails to build back to the "
+        "LLM with the compiler's errors, 0 to never repair "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--repair-time",
+        type=float,
+        default=Config.REPAIR_TIME_BUDGET,
+        help="Seconds the repair rounds of a harness may take in all "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--refine",
+        type=int,
+        default=Config.REFINE_ROUNDS,
+        help="Rounds of measuring the source-based coverage of the best "
+        "harness' corpus and asking the LLM for a harness reaching the code "
+        "it missed, nearest to the target first (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=Config.BUILD_JOBS,
+        help="Number of project sources compiled in parallel "
+        "(default: one per CPU)",
+    )
 
+    parser.add_argument(
+        "--fuzz-time",
+        type=_positive_int,
+        default=Config.FUZZ_MAX_TOTAL_TIME,
+        help="Seconds to fuzz for when evaluating the harness "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--fuzz-runs",
+        type=int,
+        default=Config.FUZZ_RUNS,
+        help="Number of inputs to run when evaluating the harness",
+    )
+
+    parser.add_argument(
+        "--rss-limit-mb",
+        type=int,
+        default=Config.FUZZ_RSS_LIMIT_MB,
+        help="Memory limit of the harness' evaluation, in MB "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--fuzz-mode",
+        choices=Config.FUZZ_MODES,
+        default=Config.FUZZ_MODE,
+        help="Evaluate with a single fuzzer, or with libFuzzer's -fork or "
+        "-jobs modes sharing one corpus (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--fuzz-workers",
+        type=int,
+        default=Config.FUZZ_WORKERS,
+        help="Number of fuzzers in the fork and jobs modes "
+        "(default: the CPUs divided among the concurrent evaluations)",
+    )
+
+    parser.add_argument(
+        "--plateau-window",
+        type=float,
+        default=Config.PLATEAU_WINDOW,
+        help="Stop evaluating once coverage grew by less than "
+        "--plateau-rate for this many seconds",
+    )
+
+    parser.add_argument(
+        "--plateau-rate",
+        type=float,
+        default=Config.PLATEAU_MIN_RATE,
+        help="New coverage features per second below which coverage is "
+        "considered flat (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the on-disk LLM response cache",
+    )
+
+    parser.add_argument(
+        "--no-compilation-cache",
+        action="store_true",
+        help="Do not read or write the on-disk cache of compiled objects, "
+        "shared across runs and projects",
+    )
+
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached LLM responses and overwrite them with new ones",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Keep a manifest of the project's files and only re-read the "
+        "ones that changed since the last run",
+    )
+
+
+def _to_arguments(
+    args: argparse.Namespace, project_path: str, target: str
+) -> Arguments:
+    """
+    Converts parsed options into the arguments of one project.
+
+    Args:
+        args (argparse.Namespace): The parsed options.
+        project_path (str): Path to the project directory.
+        target (str): Name of the function to write a harness for.
+
+    Returns:
+        Arguments: The project's arguments.
+    """
     # Validate model
     model = args.model
     if model not in Config.AVAILABLE_MODELS:
@@ -87,6 +518,46 @@ def parse_arguments() -> Arguments:
         )
         model = Config.DEFAULT_MODEL
 
+    cascade: List[str] = []
+    if args.cascade is not None:
+        cascade = list(args.cascade) or list(Config.CASCADE_MODELS)
+        for tier in cascade:
+            if tier not in Config.AVAILABLE_MODELS:
+                logger.warning(f"Model {tier} of the cascade not available")
+
     return Arguments(
-        project_path=project_path, model=model, file_patterns=args.files
+        project_path=project_path,
+        model=model,
+        file_patterns=args.files,
+        cascade=cascade,
+        use_cache=not args.no_cache,
+        refresh_cache=bool(args.refresh),
+        incremental=bool(args.incremental),
+        target=target,
+        token_budget=args.token_budget,
+        context=args.context,
+        top_k=args.top_k,
+        query=args.query,
+        compress=bool(args.compress),
+        signatures_only=bool(args.signatures_only),
+        candidates=args.candidates,
+        llm_concurrency=args.llm_concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        llm_timeout=args.llm_timeout,
+        llm_retries=args.llm_retries,
+        hedge=bool(args.hedge),
+        stream=bool(args.stream),
+        repair_attempts=args.repair_attempts,
+        repair_time=args.repair_time,
+        refine_rounds=args.refine,
+        jobs=args.jobs,
+        use_compilation_cache=not args.no_compilation_cache,
+        fuzz_time=args.fuzz_time,
+        fuzz_runs=args.fuzz_runs,
+        rss_limit_mb=args.rss_limit_mb,
+        fuzz_mode=args.fuzz_mode,
+        fuzz_workers=args.fuzz_workers,
+        plateau_window=args.plateau_window,
+        plateau_rate=args.plateau_rate,
     )
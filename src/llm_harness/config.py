@@ -42,13 +42,79 @@ class Config:
     # Default model if none provided
     DEFAULT_MODEL = "gpt-4.1-mini"
 
+    # Models tried in turn by a cascade, cheapest first. A model is only
+    # tried if no harness of the previous one was accepted.
+    CASCADE_MODELS = ["gpt-4.1-mini", "gpt-4.1"]
+
+    # Default function to write a harness for, if none specified
+    DEFAULT_TARGET = "dateparse"
+
+    # Default token budget of the prompt's project context
+    DEFAULT_TOKEN_BUDGET = 100_000
+
+    # Average number of characters per token, for estimating prompt sizes
+    CHARS_PER_TOKEN = 4
+
+    # Truncated files are left out if less than this many tokens would fit
+    MIN_TRUNCATED_TOKENS = 64
+
+    # Depth of the call graph below the target whose function definitions
+    # are sent to the LLM. Deeper callees are sent as declarations only.
+    SYMBOL_CALLEE_DEPTH = 3
+
+    # Filename of the symbol index, under `STATE_DIR`
+    SYMBOL_INDEX_FILENAME = "symbols.json"
+
+    # Filename of the retrieval index, under `STATE_DIR`
+    RETRIEVAL_INDEX_FILENAME = "retrieval.json"
+
+    # Number of chunks retrieved into the prompt's context
+    RETRIEVAL_TOP_K = 20
+
+    # Lines per chunk of files that are not split by function
+    CHUNK_LINES = 40
+
+    # BM25 parameters: term frequency saturation and length normalization
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+
     # Default files to include if none specified
     DEFAULT_FILES = ["*.c", "*.h", "*.cpp", "*.hpp", "Makefile"]
 
+    # Number of threads reading project files. `None` uses the default size
+    # of Python's thread pools.
+    ANALYZER_WORKERS = None
+
+    # Project files larger than this are not read, in bytes
+    MAX_FILE_BYTES = 1024 * 1024
+
+    # Cap on the bytes read from a project's files in total
+    MAX_TOTAL_BYTES = 64 * 1024 * 1024
+
     # Harness directory name
     # Defaults to project's root directory
     HARNESS_DIR = "harnesses"
 
+    # Directory holding llm_harness' state, relative to the project root
+    STATE_DIR = ".llm_harness"
+
+    # Filename of the analyzer's incremental manifest, under `STATE_DIR`
+    MANIFEST_FILENAME = "manifest.json"
+
+    # Name patterns of directories that are never walked: VCS metadata,
+    # build output and llm_harness' own directories
+    IGNORED_DIRS = [
+        ".git",
+        ".hg",
+        ".svn",
+        "build",
+        "_build",
+        "cmake-build-*",
+        "CMakeFiles",
+        STATE_DIR,
+        HARNESS_DIR,
+    ]
+
     # Harness default filename
     HARNESS_FILENAME = "harness.c"
 
@@ -60,6 +126,137 @@ class Config:
     ]  # needed for fuzzing
     EXECUTABLE_FILENAME = "harness"
 
+    # Directory of the prebuilt project objects, under `STATE_DIR`
+    OBJECTS_DIR = "objects"
+
+    # Compilation options of the coverage build, and the directory of its
+    # prebuilt project objects, under `STATE_DIR`
+    COVERAGE_CFLAGS = [
+        "-g",
+        "-fsanitize=fuzzer",
+        "-fprofile-instr-generate",
+        "-fcoverage-mapping",
+    ]
+    COVERAGE_OBJECTS_DIR = "coverage-objects"
+
+    # Tools merging and exporting coverage profiles
+    LLVM_PROFDATA = "llvm-profdata"
+    LLVM_COV = "llvm-cov"
+
+    # Seconds a corpus may take to replay through the coverage build, and
+    # maximum number of coverage gaps sent to the LLM
+    COVERAGE_TIMEOUT = 300
+    COVERAGE_MAX_GAPS = 15
+
+    # Number of sources compiled in parallel. `None` uses one per CPU.
+    BUILD_JOBS = None
+
+    # Limits of a harness' evaluation run: fuzzing time in seconds, number
+    # of inputs (`None` for no limit) and memory in MB
+    FUZZ_MAX_TOTAL_TIME = 60
+    FUZZ_RUNS = None
+    FUZZ_RSS_LIMIT_MB = 2048
+
+    # Seconds a run may exceed its fuzzing time before it is killed
+    FUZZ_KILL_GRACE = 15
+
+    # How the harness is fuzzed: by a single process, by libFuzzer's
+    # `-fork` mode or by its `-jobs`/`-workers` mode
+    FUZZ_MODES = ["single", "fork", "jobs"]
+    FUZZ_MODE = "single"
+
+    # Evaluation runs stop early once the fuzzer finds fewer than
+    # `PLATEAU_MIN_RATE` new features per second over `PLATEAU_WINDOW`
+    # seconds. `None` never stops early.
+    PLATEAU_WINDOW = None
+    PLATEAU_MIN_RATE = 1.0
+
+    # Seconds between two checks for a coverage plateau
+    PLATEAU_CHECK_INTERVAL = 1.0
+
+    # Number of fuzzing processes in the fork and jobs modes. `None` divides
+    # the CPUs among the concurrent evaluations.
+    FUZZ_WORKERS = None
+
+    # Number of candidate harnesses generated per run, of which the best is
+    # kept
+    DEFAULT_CANDIDATES = 1
+
+    # Sampling temperature of the candidates, when there are several, so
+    # that they differ from each other
+    CANDIDATE_TEMPERATURE = 1.0
+
+    # Maximum number of concurrent LLM calls
+    LLM_CONCURRENCY = 4
+
+    # Rate limits of the LLM provider, in requests and prompt tokens per
+    # minute
+    LLM_REQUESTS_PER_MINUTE = 500
+    LLM_TOKENS_PER_MINUTE = 200_000
+
+    # Seconds to wait for an LLM response
+    LLM_TIMEOUT = 300
+
+    # Retries of rate-limited or failed LLM requests, with a random delay
+    # of up to `LLM_BACKOFF_BASE * 2**retry` seconds, capped at
+    # `LLM_BACKOFF_MAX`
+    LLM_MAX_RETRIES = 5
+    LLM_BACKOFF_BASE = 1.0
+    LLM_BACKOFF_MAX = 60.0
+
+    # Hedged LLM requests are sent once more when unanswered past this
+    # quantile of the latencies of the last requests, once that many were
+    # observed
+    LLM_HEDGE_QUANTILE = 0.95
+    LLM_HEDGE_MIN_SAMPLES = 10
+
+    # Rounds of sending a harness that fails to build back to the LLM along
+    # with the compiler's errors, and seconds they may take in all, counted
+    # from the first failed build. 0 rounds never repairs a harness.
+    REPAIR_ATTEMPTS = 3
+    REPAIR_TIME_BUDGET = 180
+
+    # Maximum number of compiler errors, and lines of unparsed compiler
+    # output, sent with a repair request
+    REPAIR_MAX_DIAGNOSTICS = 10
+    REPAIR_MAX_OUTPUT_LINES = 20
+
+    # Rounds of refining the best harness, by sending the LLM the code its
+    # corpus never reached. 0 never refines.
+    REFINE_ROUNDS = 0
+
+    # Maximum number of candidates evaluated concurrently. `None` uses one
+    # per CPU.
+    EVAL_CONCURRENCY = None
+
+    # Maximum number of concurrent compilations of a batch of projects, each
+    # running one compiler unless `--jobs` is given. `None` uses one per
+    # CPU.
+    COMPILE_CONCURRENCY = None
+
+    # Thresholds a harness must reach to be accepted
+    MIN_EXECS_PER_SEC = 100
+    MIN_COVERAGE = 10
+
+    # Directory of the persistent on-disk caches
+    CACHE_DIR = os.path.join(
+        os.environ.get(
+            "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+        ),
+        "llm_harness",
+    )
+
+    # Size cap of each on-disk cache, in bytes
+    CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+    # Size cap of the cache of compiled objects, which are larger than the
+    # other caches' entries
+    COMPILATION_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+    # Version of the generation prompt. Bump it whenever the prompt changes,
+    # so that cached LLM responses for the old prompt are not reused.
+    PROMPT_VERSION = 2
+
     @staticmethod
     def load_env() -> str | None:
         """Load environment variables from .env file."""
@@ -20,10 +20,16 @@ Project analysis functionality.
 """
 
 import os
-import glob
-from typing import List, Optional
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 from llm_harness.models.project import ProjectFile, ProjectInfo
+from llm_harness.core.symbols import SymbolIndex
+from llm_harness.core.retrieval import RetrievalIndex
+from llm_harness.io.walker import ProjectTree
 from llm_harness.config import Config
 
 
@@ -33,7 +39,14 @@ class ProjectAnalyzer:
     """
 
     def __init__(
-        self, project_path: str, file_patterns: Optional[List[str]] = None
+        self,
+        project_path: str,
+        file_patterns: Optional[List[str]] = None,
+        incremental: bool = False,
+        workers: Optional[int] = Config.ANALYZER_WORKERS,
+        max_file_bytes: int = Config.MAX_FILE_BYTES,
+        max_total_bytes: int = Config.MAX_TOTAL_BYTES,
+        tree: Optional[ProjectTree] = None,
     ):
         """
         Initialize the project analyzer.
@@ -41,9 +54,34 @@ class ProjectAnalyzer:
         Args:
             project_path (str): Path to the project directory.
             file_patterns (List[str], optional): File patterns to include.
+            incremental (bool): Keep a manifest of the project's files and
+                only re-read the ones that changed since the last run.
+            workers (int, optional): Number of threads reading files.
+                Defaults to the thread pool's default size.
+            max_file_bytes (int): Files larger than this are skipped.
+            max_total_bytes (int): Cap on the bytes read in total. Files
+                that do not fit in the remaining budget are skipped.
+            tree (ProjectTree, optional): Listing of the project's files,
+                shared with the other stages. Walked anew if not given.
         """
         self.project_path = project_path
         self.file_patterns = file_patterns or Config.DEFAULT_FILES
+        self.incremental = incremental
+        self.tree = tree or ProjectTree(project_path)
+        self.workers = workers
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.manifest_path = os.path.join(
+            project_path, Config.STATE_DIR, Config.MANIFEST_FILENAME
+        )
+
+        # Contents read during previous runs of this analyzer, along with
+        # the stat data they were read with
+        self._contents: Dict[str, Tuple[int, int, str]] = {}
+
+        # Bytes read so far by the current run, shared between the workers
+        self._total_bytes = 0
+        self._budget_lock = threading.Lock()
 
     def collect_project_info(self) -> ProjectInfo:
         """
@@ -59,34 +97,300 @@ class ProjectAnalyzer:
             logger.error("No project files found!")
             return ProjectInfo(files=files)
 
+        if self.incremental:
+            files = self._read_files_incremental(project_files)
+        else:
+            contents = self._read_contents(project_files)
+            files = [
+                ProjectFile(
+                    path=file_path,
+                    name=os.path.basename(file_path),
+                    content=contents[file_path],
+                )
+                for file_path in project_files
+                if file_path in contents
+            ]
+
+        if not files:
+            logger.error("No project files found!")
+
+        return ProjectInfo(files=files, root=self.project_path)
+
+    def build_symbol_index(self, project_info: ProjectInfo) -> SymbolIndex:
+        """
+        Builds the symbol index of the project's C/C++ sources.
+
+        The index is saved under the project's state directory and reused
+        for as long as the project's fingerprint does not change.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+
+        Returns:
+            SymbolIndex: The index.
+        """
+        path = os.path.join(
+            self.project_path, Config.STATE_DIR, Config.SYMBOL_INDEX_FILENAME
+        )
+        fingerprint = project_info.get_fingerprint()
+
+        index = SymbolIndex.load(path, fingerprint)
+        if index is not None:
+            logger.info("Using cached symbol index")
+            return index
+
+        index = SymbolIndex.build(project_info)
+        logger.info(f"Indexed {len(index.symbols)} symbols")
+        index.save(path)
+        return index
+
+    def build_retrieval_index(
+        self, project_info: ProjectInfo
+    ) -> RetrievalIndex:
+        """
+        Builds the retrieval index of the project's files.
+
+        The index is saved under the project's state directory. On later
+        runs, only the files that changed since are chunked again.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+
+        Returns:
+            RetrievalIndex: The index.
+        """
+        path = os.path.join(
+            self.project_path,
+            Config.STATE_DIR,
+            Config.RETRIEVAL_INDEX_FILENAME,
+        )
+
+        index = RetrievalIndex.load(path)
+        changed = index.update(project_info)
+        logger.info(
+            f"Retrieval index holds {len(index.chunks)} chunks "
+            f"({changed} files updated)"
+        )
+        if changed:
+            index.save(path)
+        return index
+
+    def _read_files_incremental(
+        self, project_files: List[str]
+    ) -> List[ProjectFile]:
+        """
+        Reads the project files, reusing the results of previous runs for
+        files whose size and modification time did not change.
+
+        Contents read by this analyzer are reused as they are. A new
+        analyzer reads every file again, but takes the digests of the
+        unchanged ones from the manifest instead of hashing them. The
+        manifest is updated to reflect the current state of the files.
+
+        Args:
+            project_files (List[str]): Paths of the files to read.
+
+        Returns:
+            List[ProjectFile]: The project's files.
+        """
+        manifest = self._load_manifest()
+        stats: Dict[str, os.stat_result] = {}
+        to_read = []
+
         for file_path in project_files:
             try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    files.append(
-                        ProjectFile(
-                            path=file_path,
-                            name=os.path.basename(file_path),
-                            content=f.read(),
-                        )
-                    )
-            except IOError as e:
+                stat = os.stat(file_path)
+            except OSError as e:
                 logger.error(f"Error reading file {file_path}: {e}")
+                continue
+            stats[file_path] = stat
 
-        if not files:
-            logger.error("No project files found!")
+            cached = self._contents.get(file_path)
+            if cached is None or cached[:2] != (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                to_read.append(file_path)
+
+        contents = self._read_contents(to_read)
+        logger.info(f"Re-read {len(to_read)} of {len(stats)} project files")
+
+        files: list[ProjectFile] = []
+        new_manifest: Dict[str, Dict[str, int | str]] = {}
+        for file_path, stat in stats.items():
+            if file_path in contents:
+                content = contents[file_path]
+            elif file_path not in to_read:
+                content = self._contents[file_path][2]
+            else:
+                continue
+
+            relpath = os.path.relpath(file_path, self.project_path)
+            entry = manifest.get(relpath, {})
+            unchanged = (
+                entry.get("size") == stat.st_size
+                and entry.get("mtime_ns") == stat.st_mtime_ns
+            )
+            if unchanged and entry.get("digest"):
+                digest = str(entry["digest"])
+            else:
+                digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
 
-        return ProjectInfo(files=files)
+            self._contents[file_path] = (
+                stat.st_size,
+                stat.st_mtime_ns,
+                content,
+            )
+            new_manifest[relpath] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "digest": digest,
+            }
+            files.append(
+                ProjectFile(
+                    path=file_path,
+                    name=os.path.basename(file_path),
+                    content=content,
+                    digest=digest,
+                )
+            )
+
+        self._save_manifest(new_manifest)
+        return files
+
+    def _read_contents(self, file_paths: List[str]) -> Dict[str, str]:
+        """
+        Reads files concurrently, within the analyzer's byte caps.
+
+        Files that are too large, that do not fit in the remaining total
+        budget or that cannot be read are left out of the result.
+
+        Args:
+            file_paths (List[str]): Paths of the files to read.
+
+        Returns:
+            Dict[str, str]: Contents of the files read, keyed by path.
+        """
+        self._total_bytes = 0
+        workers = self.workers or min(32, (os.cpu_count() or 1) + 4)
+
+        # Hand out files in batches, as per-file tasks would cost more in
+        # scheduling than small files cost to read
+        batch_size = max(1, len(file_paths) // (workers * 4))
+        batches = [
+            file_paths[i : i + batch_size]
+            for i in range(0, len(file_paths), batch_size)
+        ]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(self._read_batch, batches)
+            return {
+                path: content
+                for batch, contents in zip(batches, results)
+                for path, content in zip(batch, contents)
+                if content is not None
+            }
+
+    def _read_batch(self, file_paths: List[str]) -> List[Optional[str]]:
+        """
+        Reads a batch of files on one worker.
+
+        Args:
+            file_paths (List[str]): Paths of the files to read.
+
+        Returns:
+            List[Optional[str]]: Content of each file, or None if skipped.
+        """
+        return [self._read_file(file_path) for file_path in file_paths]
+
+    def _read_file(self, file_path: str) -> Optional[str]:
+        """
+        Reads a file with a single unbuffered binary read, sized from the
+        file's stat data, and decodes it once.
+
+        Args:
+            file_path (str): Path of the file.
+
+        Returns:
+            Optional[str]: The file's content, or None if it was skipped.
+        """
+        try:
+            with open(file_path, "rb", buffering=0) as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > self.max_file_bytes:
+                    logger.warning(
+                        f"Skipping {file_path}: larger than "
+                        f"{self.max_file_bytes} bytes"
+                    )
+                    return None
+
+                # Reserve the bytes before reading them, so that memory use
+                # stays bounded by the total cap
+                with self._budget_lock:
+                    if self._total_bytes + size > self.max_total_bytes:
+                        logger.warning(
+                            f"Total size cap reached, skipping {file_path}"
+                        )
+                        return None
+                    self._total_bytes += size
+
+                data = f.read(size)
+        except IOError as e:
+            logger.error(f"Error reading file {file_path}: {e}")
+            return None
+
+        content = data.decode("utf-8", errors="replace")
+        if "\r" in content:
+            # Match the universal newlines of text mode reads
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+        return content
+
+    def _load_manifest(self) -> Dict[str, Dict[str, int | str]]:
+        """
+        Loads the manifest of the previous run.
+
+        Returns:
+            Dict[str, Dict[str, int | str]]: Size, modification time and
+            content digest of each file, keyed by path relative to the
+            project root. Empty if there is no usable manifest.
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+        if not isinstance(manifest, dict):
+            return {}
+        files = manifest.get("files", {})
+        return files if isinstance(files, dict) else {}
+
+    def _save_manifest(self, files: Dict[str, Dict[str, int | str]]) -> None:
+        """
+        Writes the manifest of the current run.
+
+        Args:
+            files (Dict[str, Dict[str, int | str]]): Size, modification time
+                and content digest of each file.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            with open(self.manifest_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "files": files}, f, indent=1)
+        except IOError as e:
+            logger.warning(
+                f"Could not write manifest {self.manifest_path}: {e}"
+            )
 
     def _find_project_files(self) -> List[str]:
         """
-        Finds all project files matching the specified patterns.
+        Finds all project files matching the specified patterns, at any
+        depth of the project.
 
         Returns:
             List[str]: List of file paths.
         """
-        all_files = []
-        for pattern in self.file_patterns:
-            matched_files = glob.glob(os.path.join(self.project_path, pattern))
-            all_files.extend(matched_files)
-
-        return all_files
+        return [
+            os.path.join(self.project_path, path)
+            for path in self.tree.match(self.file_patterns)
+        ]
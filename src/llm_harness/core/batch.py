@@ -0,0 +1,712 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Asyncio pipeline running many projects through generation, build and
+evaluation at once.
+"""
+
+import functools
+import os
+import time
+import asyncio
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from loguru import logger
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+from llm_harness.cli import Arguments
+from llm_harness.config import Config
+from llm_harness.core.analyzer import ProjectAnalyzer
+from llm_harness.core.builder import HarnessBuilder
+from llm_harness.core.candidates import (
+    can_refine,
+    generate_candidate,
+    keep_best,
+    make_candidates,
+    make_refinement,
+)
+from llm_harness.core.coverage import CoverageCollector
+from llm_harness.core.evaluator import HarnessEvaluator
+from llm_harness.core.generator import HarnessGenerator
+from llm_harness.core.pipeline import (
+    create_builder,
+    create_coverage,
+    create_evaluator,
+    create_generator,
+    select_context,
+)
+from llm_harness.core.repair import prepare_repair
+from llm_harness.io.file_manager import FileManager
+from llm_harness.io.walker import ProjectTree
+from llm_harness.models.batch import ProjectResult
+from llm_harness.models.candidate import Candidate
+from llm_harness.models.evaluation import OUTCOME_ERROR
+from llm_harness.models.project import ProjectInfo
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Project:
+    """State of a project going through the pipeline."""
+
+    args: Arguments
+    result: ProjectResult
+    project_info: Optional[ProjectInfo] = None
+    generator: Optional[HarnessGenerator] = None
+    builder: Optional[HarnessBuilder] = None
+    prebuild: Optional["asyncio.Future[List[str]]"] = None
+    coverage: Optional[CoverageCollector] = None
+    candidates: List[Candidate] = field(default_factory=list)
+    # Tier of the model cascade being run, and its candidates still in the
+    # pipeline
+    tier: int = 0
+    in_flight: int = 0
+    # Rounds of refinement of the best candidate run so far
+    refinements: int = 0
+    # Set once the project's last tier is done
+    done: Optional["asyncio.Future[None]"] = None
+    # Other entries of the batch share the project, so the harnesses are
+    # named after the target
+    name_by_target: bool = False
+
+    @property
+    def models(self) -> List[str]:
+        """Models of the project's tiers."""
+        return self.args.cascade or [self.args.model]
+
+    def make_candidates(self) -> List[Candidate]:
+        """Names the candidates of a tier of the project."""
+        return make_candidates(
+            max(1, self.args.candidates),
+            self.args.target if self.name_by_target else None,
+            self.tier,
+        )
+
+
+# A candidate of a project, as passed between the stages
+_Item = Tuple[_Project, Candidate]
+
+
+def _default_builder(args: Arguments, tree: ProjectTree) -> HarnessBuilder:
+    # Each compile slot of the batch runs one compiler, unless `--jobs`
+    # says otherwise
+    return create_builder(args, tree, jobs=1)
+
+
+def _default_coverage(
+    args: Arguments,
+    analyzer: ProjectAnalyzer,
+    project_info: ProjectInfo,
+    tree: ProjectTree,
+) -> Optional[CoverageCollector]:
+    # Like the builder, the coverage build runs one compiler
+    return create_coverage(args, analyzer, project_info, tree, jobs=1)
+
+
+class BatchRunner:
+    """
+    Runs a batch of projects through an asyncio pipeline.
+
+    The LLM calls, the compilations and the fuzzing runs are separate
+    stages, each with its own pool of workers, so that the network, the
+    compilers and the fuzzers are all kept busy at once. The stages are
+    connected by bounded queues: a stage that falls behind stalls the ones
+    before it, instead of piling up work. A project's sources are prebuilt
+    while its harnesses are being generated. Projects whose harnesses are
+    all rejected go through the pipeline again with the next model of
+    their cascade.
+    """
+
+    def __init__(
+        self,
+        llm_concurrency: int = Config.LLM_CONCURRENCY,
+        compile_concurrency: Optional[int] = Config.COMPILE_CONCURRENCY,
+        fuzz_concurrency: Optional[int] = Config.EVAL_CONCURRENCY,
+        generator_factory: Callable[
+            [Arguments], HarnessGenerator
+        ] = create_generator,
+        builder_factory: Callable[
+            [Arguments, ProjectTree], HarnessBuilder
+        ] = _default_builder,
+        evaluator_factory: Optional[
+            Callable[
+                [Arguments, str, Optional[CoverageCollector]],
+                HarnessEvaluator,
+            ]
+        ] = None,
+        coverage_factory: Callable[
+            [Arguments, ProjectAnalyzer, ProjectInfo, ProjectTree],
+            Optional[CoverageCollector],
+        ] = _default_coverage,
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            llm_concurrency (int): Maximum number of concurrent LLM calls.
+            compile_concurrency (int, optional): Maximum number of concurrent
+                prebuilds and harness builds. Defaults to the number of CPUs.
+            fuzz_concurrency (int, optional): Maximum number of concurrent
+                fuzzing runs. Defaults to the number of CPUs.
+            generator_factory (Callable): Creates a project's generator.
+            builder_factory (Callable): Creates a project's builder.
+            evaluator_factory (Callable, optional): Creates the evaluator
+                of a project's harness executable, measuring its coverage
+                with the project's collector, if any. Defaults to
+                `create_evaluator`, dividing the CPUs among the concurrent
+                fuzzing runs.
+            coverage_factory (Callable): Creates a project's coverage
+                collector, if its best harness is to be refined.
+        """
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.compile_concurrency = max(
+            1, compile_concurrency or os.cpu_count() or 1
+        )
+        self.fuzz_concurrency = max(1, fuzz_concurrency or os.cpu_count() or 1)
+        self.generator_factory = generator_factory
+        self.builder_factory = builder_factory
+        # The concurrent evaluations share the CPUs between their fuzzers
+        self.evaluator_factory = evaluator_factory or functools.partial(
+            create_evaluator, concurrency=self.fuzz_concurrency
+        )
+        self.coverage_factory = coverage_factory
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._compile_slots: Optional[asyncio.Semaphore] = None
+        self._generate_queue: Optional["asyncio.Queue[_Item]"] = None
+        # Candidates of escalated projects, waiting to be queued
+        self._requeued: Set["asyncio.Task[None]"] = set()
+        # Builder and prebuild of each project path, shared by its entries
+        self._builds: Dict[
+            str, Tuple[HarnessBuilder, "asyncio.Future[List[str]]"]
+        ] = {}
+        self._start = 0.0
+
+    async def run(self, projects: List[Arguments]) -> List[ProjectResult]:
+        """
+        Runs the projects through the pipeline.
+
+        Args:
+            projects (List[Arguments]): Arguments of each project.
+
+        Returns:
+            List[ProjectResult]: The results, in the order of `projects`.
+        """
+        self._start = time.monotonic()
+        # The blocking work of every stage runs on threads. The pool fits
+        # every stage's workers and the prebuilds, so no stage waits on
+        # another's threads.
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.llm_concurrency
+            + 2 * self.compile_concurrency
+            + self.fuzz_concurrency
+            + 1
+        )
+        self._compile_slots = asyncio.Semaphore(self.compile_concurrency)
+
+        generate_queue: "asyncio.Queue[_Item]" = asyncio.Queue(
+            self.llm_concurrency
+        )
+        self._generate_queue = generate_queue
+        build_queue: "asyncio.Queue[_Item]" = asyncio.Queue(
+            self.compile_concurrency
+        )
+        fuzz_queue: "asyncio.Queue[_Item]" = asyncio.Queue(
+            self.fuzz_concurrency
+        )
+        workers = [
+            *(
+                asyncio.create_task(
+                    self._worker(self._generate, generate_queue, build_queue)
+                )
+                for _ in range(self.llm_concurrency)
+            ),
+            *(
+                asyncio.create_task(
+                    self._worker(self._build, build_queue, fuzz_queue)
+                )
+                for _ in range(self.compile_concurrency)
+            ),
+            *(
+                asyncio.create_task(self._worker(self._fuzz, fuzz_queue))
+                for _ in range(self.fuzz_concurrency)
+            ),
+        ]
+
+        self._builds = {}
+        paths = Counter(os.path.realpath(a.project_path) for a in projects)
+
+        states = []
+        try:
+            for args in projects:
+                state = await self._prepare(
+                    args, paths[os.path.realpath(args.project_path)] > 1
+                )
+                states.append(state)
+                for candidate in state.candidates:
+                    # Waits while the LLM stage is full
+                    await generate_queue.put((state, candidate))
+
+            # Escalated projects go through the queues again, so they are
+            # not drained until every project's last tier is done
+            await asyncio.gather(
+                *(s.done for s in states if s.done is not None)
+            )
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Prebuilds of projects whose candidates all failed early
+            await asyncio.gather(
+                *(s.prebuild for s in states if s.prebuild is not None),
+                return_exceptions=True,
+            )
+            self._executor.shutdown()
+
+        results = [self._finish(state) for state in states]
+        logger.info(
+            f"Batch of {len(results)} projects done in "
+            f"{time.monotonic() - self._start:.1f}s"
+        )
+        return results
+
+    async def _worker(
+        self,
+        stage: Callable[[_Project, Candidate], Any],
+        inbox: "asyncio.Queue[_Item]",
+        outbox: "Optional[asyncio.Queue[_Item]]" = None,
+    ) -> None:
+        """
+        Feeds the items of a queue to a stage, forever.
+
+        Items the stage succeeds on are passed to the next stage's queue,
+        waiting while it is full. Failed items leave the pipeline.
+
+        Args:
+            stage (Callable): Coroutine function returning whether the item
+                moves on.
+            inbox (asyncio.Queue): The stage's queue.
+            outbox (asyncio.Queue, optional): The next stage's queue.
+        """
+        while True:
+            project, candidate = await inbox.get()
+            try:
+                try:
+                    passed = await stage(project, candidate)
+                except Exception as e:
+                    logger.error(
+                        f"{project.result.name}: candidate "
+                        f"{candidate.index} failed: {e}"
+                    )
+                    candidate.error = str(e)
+                    candidate.metrics.outcome = OUTCOME_ERROR
+                    candidate.metrics.reason = str(e)
+                    passed = False
+
+                if passed and outbox is not None:
+                    await outbox.put((project, candidate))
+                else:
+                    candidate.finished_at = time.monotonic() - self._start
+                    project.in_flight -= 1
+                    if project.in_flight == 0:
+                        self._end_tier(project)
+            finally:
+                inbox.task_done()
+
+    async def _prepare(
+        self, args: Arguments, name_by_target: bool = False
+    ) -> _Project:
+        """
+        Analyzes a project and starts prebuilding it.
+
+        Entries of the batch for the same project share its builder and
+        prebuild.
+
+        Args:
+            args (Arguments): The project's arguments.
+            name_by_target (bool): Name the harnesses after the target, as
+                other entries share the project.
+
+        Returns:
+            _Project: The project, with its candidates yet to be generated,
+            or none if it could not be analyzed.
+        """
+        state = _Project(
+            args=args,
+            result=ProjectResult(
+                project_path=args.project_path, target=args.target
+            ),
+            name_by_target=name_by_target,
+        )
+        try:
+            if not os.path.isdir(args.project_path):
+                raise FileNotFoundError(
+                    f"Project path does not exist: {args.project_path}"
+                )
+            tree = ProjectTree(args.project_path)
+            analyzer = ProjectAnalyzer(
+                args.project_path,
+                args.file_patterns,
+                incremental=args.incremental,
+                tree=tree,
+            )
+            project_info = await self._in_thread(analyzer.collect_project_info)
+            key = os.path.realpath(args.project_path)
+            if key in self._builds:
+                state.builder, state.prebuild = self._builds[key]
+            else:
+                state.builder = self.builder_factory(args, tree)
+                state.prebuild = asyncio.ensure_future(self._prebuild(state))
+                self._builds[key] = (state.builder, state.prebuild)
+            state.coverage = await self._in_thread(
+                self.coverage_factory, args, analyzer, project_info, tree
+            )
+            state.project_info = await self._in_thread(
+                select_context, args, analyzer, project_info
+            )
+            state.generator = self.generator_factory(
+                replace(args, model=state.models[0])
+            )
+        except Exception as e:
+            logger.error(f"{state.result.name}: could not analyze: {e}")
+            state.result.error = str(e)
+            return state
+
+        state.candidates = state.make_candidates()
+        state.in_flight = len(state.candidates)
+        state.done = asyncio.get_running_loop().create_future()
+        logger.info(
+            f"{state.result.name}: queued {len(state.candidates)} "
+            f"candidates for {args.target}"
+        )
+        return state
+
+    def _end_tier(self, project: _Project) -> None:
+        """
+        Ranks the candidates of a project's tier, once all are done, and
+        escalates to the next tier if none was accepted.
+
+        Args:
+            project (_Project): The project.
+        """
+        project.candidates = keep_best(
+            project.args.project_path, project.candidates
+        )
+
+        model = project.models[project.tier]
+        if project.candidates[0].accepted or project.tier + 1 == len(
+            project.models
+        ):
+            if project.candidates[0].accepted and len(project.models) > 1:
+                logger.info(
+                    f"{project.result.name}: accepted at tier "
+                    f"{project.tier} ({model})"
+                )
+            if not self._refine(project):
+                assert project.done is not None
+                project.done.set_result(None)
+            return
+
+        project.tier += 1
+        next_model = project.models[project.tier]
+        logger.info(
+            f"{project.result.name}: no harness of {model} was accepted, "
+            f"escalating to {next_model}"
+        )
+        project.generator = self.generator_factory(
+            replace(project.args, model=next_model)
+        )
+        project.candidates = project.make_candidates()
+        project.in_flight = len(project.candidates)
+        for candidate in project.candidates:
+            self._requeue(project, candidate)
+
+    def _refine(self, project: _Project) -> bool:
+        """
+        Sends a refinement of a project's best candidate down the pipeline,
+        if the project has rounds left.
+
+        Args:
+            project (_Project): The project, at the end of its last tier.
+
+        Returns:
+            bool: Whether a refinement was queued.
+        """
+        best = project.candidates[0]
+        if project.refinements >= project.args.refine_rounds or not (
+            can_refine(best)
+        ):
+            return False
+
+        project.refinements += 1
+        refined = make_refinement(
+            best,
+            max(c.index for c in project.candidates) + 1,
+            project.args.target if project.name_by_target else None,
+        )
+        logger.info(
+            f"{project.result.name}: refining {best.harness_filename} into "
+            f"{refined.harness_filename}"
+        )
+        project.candidates.append(refined)
+        project.in_flight = 1
+        self._requeue(project, refined)
+        return True
+
+    def _requeue(self, project: _Project, candidate: Candidate) -> None:
+        """
+        Sends a candidate to the generation stage again.
+
+        The candidate is queued without waiting, as the stage calling this
+        may be the one the generation stage is waiting on.
+
+        Args:
+            project (_Project): The candidate's project.
+            candidate (Candidate): The candidate.
+        """
+        assert self._generate_queue is not None
+        task = asyncio.ensure_future(
+            self._generate_queue.put((project, candidate))
+        )
+        self._requeued.add(task)
+        task.add_done_callback(self._requeued.discard)
+
+    async def _prebuild(self, project: _Project) -> List[str]:
+        """
+        Compiles a project's sources, within the compile stage's cap.
+
+        Args:
+            project (_Project): The project.
+
+        Returns:
+            List[str]: Paths of the object files, relative to the project.
+        """
+        assert project.builder is not None and self._compile_slots
+        async with self._compile_slots:
+            return await self._in_thread(project.builder.prebuild)
+
+    async def _generate(self, project: _Project, candidate: Candidate) -> bool:
+        """
+        Generates, repairs or refines a candidate, and writes it to its
+        project.
+
+        Args:
+            project (_Project): The project.
+            candidate (Candidate): The candidate.
+
+        Returns:
+            bool: Always True; failures raise.
+        """
+        assert project.generator is not None
+        assert project.project_info is not None
+        candidate.model = project.generator.model
+        generator = project.generator
+        project_info = project.project_info
+        file_manager = FileManager(project.args.project_path)
+
+        def generate() -> str:
+            # Streamed harnesses are written as they arrive
+            with file_manager.open_harness(
+                candidate.harness_filename
+            ) as writer:
+                return generate_candidate(
+                    generator,
+                    project_info,
+                    project.args.target,
+                    candidate,
+                    writer,
+                )
+
+        candidate.harness = await self._in_thread(generate)
+        return True
+
+    async def _build(self, project: _Project, candidate: Candidate) -> bool:
+        """
+        Builds a candidate, once its project's sources are prebuilt.
+
+        A candidate that fails to build is sent back to the generation
+        stage for repair, within its project's repair budget.
+
+        Args:
+            project (_Project): The project.
+            candidate (Candidate): The candidate.
+
+        Returns:
+            bool: Whether the candidate was built.
+        """
+        assert project.builder is not None and project.prebuild is not None
+        assert self._compile_slots is not None
+        try:
+            await project.prebuild
+        except subprocess.CalledProcessError as e:
+            candidate.build_output = f"Error {e.returncode}: {e.stderr}"
+            return False
+
+        async with self._compile_slots:
+            result = await self._in_thread(
+                project.builder.build_harness,
+                candidate.harness_filename,
+                candidate.executable,
+            )
+        candidate.build_output = result.output
+        candidate.built = result.success
+        if (
+            not candidate.built
+            and not result.prebuild_failed
+            and prepare_repair(
+                candidate,
+                project.args.repair_attempts,
+                project.args.repair_time,
+            )
+        ):
+            # The candidate stays in the pipeline, despite leaving this
+            # stage unbuilt
+            project.in_flight += 1
+            self._requeue(project, candidate)
+        return candidate.built
+
+    async def _fuzz(self, project: _Project, candidate: Candidate) -> bool:
+        """
+        Evaluates a built candidate, and measures its coverage if its
+        project is to be refined.
+
+        Args:
+            project (_Project): The project.
+            candidate (Candidate): The candidate.
+
+        Returns:
+            bool: Always False, as this is the last stage.
+        """
+        evaluator = self.evaluator_factory(
+            project.args, candidate.executable, project.coverage
+        )
+        candidate.accepted = await self._in_thread(evaluator.evaulate_harness)
+        candidate.metrics = evaluator.metrics
+        if project.coverage is not None:
+            candidate.coverage = await self._in_thread(
+                evaluator.measure_coverage, candidate.harness_filename
+            )
+        return False
+
+    def _finish(self, project: _Project) -> ProjectResult:
+        """
+        Keeps a project's best candidate and completes its result.
+
+        Args:
+            project (_Project): The project.
+
+        Returns:
+            ProjectResult: The project's result.
+        """
+        result = project.result
+        if project.candidates:
+            # Ranked at the end of the project's last tier
+            result.candidates = project.candidates
+            result.finished_at = max(c.finished_at for c in project.candidates)
+        return result
+
+    async def _in_thread(self, function: Callable[..., T], *args: Any) -> T:
+        """
+        Runs a blocking function on the runner's threads.
+
+        Args:
+            function (Callable): The function.
+            *args (Any): Its arguments.
+
+        Returns:
+            T: The function's result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+
+def format_results(results: List[ProjectResult]) -> str:
+    """
+    Formats the results of a batch as a table.
+
+    Args:
+        results (List[ProjectResult]): The batch's results.
+
+    Returns:
+        str: One row per project, with its best harness' metrics.
+    """
+    header = (
+        "project",
+        "target",
+        "harness",
+        "model",
+        "status",
+        "outcome",
+        "cov",
+        "ft",
+        "exec/s",
+        "time",
+    )
+    rows = []
+    for result in results:
+        best = result.best
+        if best is None:
+            rows.append(
+                (
+                    result.name,
+                    result.target,
+                    "-",
+                    "-",
+                    "failed",
+                    OUTCOME_ERROR,
+                    "-",
+                    "-",
+                    "-",
+                    "-",
+                )
+            )
+            continue
+        rows.append(
+            (
+                result.name,
+                result.target,
+                best.harness_filename,
+                best.model,
+                best.status,
+                best.metrics.outcome,
+                str(best.metrics.cov),
+                str(best.metrics.ft),
+                str(best.metrics.execs_per_sec),
+                f"{result.finished_at:.1f}s",
+            )
+        )
+
+    widths = [
+        max(len(row[i]) for row in [header, *rows]) for i in range(len(header))
+    ]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) for cell, width in zip(row, widths)
+        ).rstrip()
+        for row in [header, *rows]
+    )
@@ -20,10 +20,41 @@ Builds the generated harness.
 """
 
 import os
+import json
+import shutil
+import hashlib
 import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from loguru import logger
-from typing import Optional
+from typing import Dict, List, Optional
 from llm_harness.config import Config
+from llm_harness.core.csource import C_EXTENSIONS
+from llm_harness.core.compilation import CompilationCache
+from llm_harness.io.walker import ProjectTree
+from llm_harness.models.build import BuildResult, Diagnostic
+
+# Locks of the prebuilt objects' directories, shared by every builder of a
+# directory, so that builders of the same project, e.g. for different
+# targets, do not remove each other's objects
+_PREBUILD_LOCKS: Dict[str, threading.Lock] = {}
+_PREBUILD_LOCKS_LOCK = threading.Lock()
+
+
+def _objects_lock(objects_root: str) -> threading.Lock:
+    """
+    Returns the lock of a directory of prebuilt objects.
+
+    Args:
+        objects_root (str): Path to the directory.
+
+    Returns:
+        threading.Lock: The lock, the same for every path to the directory.
+    """
+    key = os.path.realpath(objects_root)
+    with _PREBUILD_LOCKS_LOCK:
+        return _PREBUILD_LOCKS.setdefault(key, threading.Lock())
 
 
 class HarnessBuilder:
@@ -31,69 +62,362 @@ class HarnessBuilder:
     Builds a project's generated harness.
     """
 
-    def __init__(self, project_path: str):
+    def __init__(
+        self,
+        project_path: str,
+        tree: Optional[ProjectTree] = None,
+        jobs: Optional[int] = Config.BUILD_JOBS,
+        compilation_cache: Optional[CompilationCache] = None,
+        cflags: Optional[List[str]] = None,
+        objects_dir: str = Config.OBJECTS_DIR,
+    ):
         """
         Initialize the builder.
 
         Args:
             project_path (str): Path to the project directory.
+            tree (ProjectTree, optional): Listing of the project's files,
+                shared with the other stages. Walked anew if not given.
+            jobs (int, optional): Number of sources compiled in parallel.
+                Defaults to the number of CPUs.
+            compilation_cache (CompilationCache, optional): Cache of object
+                files shared across runs and projects. Not used if not given.
+            cflags (List[str], optional): Compilation options. Defaults to
+                `Config.CFLAGS`.
+            objects_dir (str): Directory of the prebuilt objects, under
+                `Config.STATE_DIR`. Builders with other options need their
+                own, as each directory keeps the objects of one set of
+                options only.
         """
         self.project_path = project_path
+        self.tree = tree or ProjectTree(project_path)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.compilation_cache = compilation_cache
+        # Compiler errors of the sources that failed to prebuild
+        self.failures: Dict[str, str] = {}
         self.cc = Config().CC
-        self.cflags = Config().CFLAGS
+        self.cflags = cflags or Config().CFLAGS
+        self.objects_dir = objects_dir
         self.executable = Config().EXECUTABLE_FILENAME
         self.harness_dir = Config().HARNESS_DIR
+        # Harnesses built concurrently share one prebuild, as do the
+        # builders of the same objects
+        self._prebuild_lock = _objects_lock(
+            os.path.join(project_path, Config.STATE_DIR, objects_dir)
+        )
+        # Prebuild started in the background, not yet waited for
+        self._pending_prebuild: Optional[Future[List[str]]] = None
 
     def build_harness(
-        self, harness_filename: Optional[str] = Config().HARNESS_FILENAME
-    ) -> str:
+        self,
+        harness_filename: Optional[str] = Config().HARNESS_FILENAME,
+        executable: Optional[str] = None,
+    ) -> BuildResult:
         """
         Builds the LLM-generated harness.
 
+        Safe to call from several threads at once, for different harnesses.
+
         Args:
             filename (Optional[str]): Name of the harness file. Defaults to `harness.c`.
+            executable (Optional[str]): Name of the executable. Defaults to
+                `Config.EXECUTABLE_FILENAME`.
 
         Returns:
-            str: Build output including success or error message.
+            BuildResult: Whether the harness was built, the build's output
+            or error message, the diagnostics of its syntax check, and
+            whether the project's sources failed to compile.
         """
         if not harness_filename:
             harness_filename = Config().HARNESS_FILENAME
 
         harness_filename = os.path.join(self.harness_dir, harness_filename)
+        executable = executable or self.executable
 
-        # Collect source files recursively
-        source_files = [harness_filename]
-        for _, _, files in os.walk(self.project_path):
-            for f in files:
-                if f != os.path.basename(harness_filename) and f.endswith(
-                    ".c"
-                ):
-                    source_files.append(f)
-
-        compilation_command = [
-            self.cc,
-            *self.cflags,
-            *source_files,
-            "-I.",
-            "-o",
-            self.executable,
-        ]
+        diagnostics = self.check_syntax(harness_filename)
+        errors = [d for d in diagnostics if d.is_error]
+        if errors:
+            logger.error(
+                f"Harness has {len(errors)} syntax errors, not building it"
+            )
+            return BuildResult(
+                success=False,
+                output="Error 1: " + "\n".join(str(d) for d in errors),
+                diagnostics=diagnostics,
+            )
+
+        try:
+            objects = self._wait_for_prebuild()
+        except subprocess.CalledProcessError as e:
+            logger.error("The project's sources failed to compile")
+            return BuildResult(
+                success=False,
+                output=f"Error {e.returncode}: {e.stderr}",
+                diagnostics=diagnostics,
+                prebuild_failed=True,
+            )
 
         logger.info(f"Starting compilation of harness: {harness_filename}")
         try:
             completed_process = subprocess.run(
-                compilation_command,
+                [
+                    self.cc,
+                    *self.cflags,
+                    harness_filename,
+                    *objects,
+                    "-I.",
+                    "-o",
+                    executable,
+                ],
                 check=True,
                 capture_output=True,
                 text=True,
                 cwd=self.project_path,
             )
             logger.info("Harness compiled successfully")
-            return completed_process.stdout
+            return BuildResult(
+                success=True,
+                output=completed_process.stdout,
+                diagnostics=diagnostics,
+            )
 
         except subprocess.CalledProcessError as e:
             logger.error("Error during harness compilation")
             logger.error(
                 f"Standard Output:\n{e.stdout}\nStandard Error:\n{e.stderr}"
             )
-            return f"Error {e.returncode}: {e.stderr}"
+            return BuildResult(
+                success=False,
+                output=f"Error {e.returncode}: {e.stderr}",
+                diagnostics=diagnostics,
+            )
+
+    def check_syntax(self, harness_filename: str) -> List[Diagnostic]:
+        """
+        Checks the harness' syntax, without compiling the project.
+
+        The check parses only the harness, with the project's include paths
+        but without instrumentation, so a broken harness is rejected in a
+        fraction of the time of a full build.
+
+        Args:
+            harness_filename (str): Path of the harness, relative to the
+                project.
+
+        Returns:
+            List[Diagnostic]: The compiler's diagnostics.
+        """
+        completed_process = subprocess.run(
+            [self.cc, "-fsyntax-only", "-I.", harness_filename],
+            check=False,
+            capture_output=True,
+            text=True,
+            cwd=self.project_path,
+        )
+        diagnostics = Diagnostic.parse(completed_process.stderr)
+        if completed_process.returncode != 0 and not any(
+            d.is_error for d in diagnostics
+        ):
+            # Failed without a diagnostic of its own, e.g. a linker-style
+            # error or a crash
+            diagnostics.append(
+                Diagnostic(
+                    file=harness_filename,
+                    line=0,
+                    column=0,
+                    severity="error",
+                    message=completed_process.stderr.strip()
+                    or f"{self.cc} exited with {completed_process.returncode}",
+                )
+            )
+
+        for diagnostic in diagnostics:
+            logger.debug(f"{diagnostic}")
+        return diagnostics
+
+    def start_prebuild(self) -> "Future[List[str]]":
+        """
+        Starts compiling the project's sources in the background.
+
+        The sources do not depend on the harness, so they can be compiled
+        while the harness is still being generated. The next build waits for
+        the background prebuild instead of starting its own.
+
+        Returns:
+            Future[List[str]]: Paths of the object files, once compiled.
+        """
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prebuild"
+        )
+        self._pending_prebuild = executor.submit(self.prebuild)
+        # Lets the thread exit once the prebuild is done
+        executor.shutdown(wait=False)
+        return self._pending_prebuild
+
+    def _wait_for_prebuild(self) -> List[str]:
+        """
+        Returns the project's objects, from the background prebuild if one
+        was started.
+
+        Returns:
+            List[str]: Paths of the object files, relative to the project.
+
+        Raises:
+            subprocess.CalledProcessError: If a source fails to compile.
+        """
+        pending = self._pending_prebuild
+        if pending is None:
+            return self.prebuild()
+
+        start = time.monotonic()
+        try:
+            return pending.result()
+        finally:
+            # Later builds check the sources again
+            self._pending_prebuild = None
+            logger.info(
+                f"Waited {time.monotonic() - start:.1f}s for the background "
+                "prebuild"
+            )
+
+    def prebuild(self) -> List[str]:
+        """
+        Compiles the project's sources into object files, once.
+
+        The objects are kept under the project's state directory, keyed by
+        the compiler, its flags and the contents of the project's C/C++
+        files, and reused by every harness built from the same sources.
+        Concurrent calls wait for the first one's objects.
+
+        Returns:
+            List[str]: Paths of the object files, relative to the project.
+
+        Raises:
+            subprocess.CalledProcessError: If a source fails to compile.
+        """
+        with self._prebuild_lock:
+            return self._prebuild()
+
+    def _prebuild(self) -> List[str]:
+        """
+        Compiles the project's sources, unless they are already compiled.
+
+        Returns:
+            List[str]: Paths of the object files, relative to the project.
+        """
+        # The harness directory is never part of the listing, so other
+        # harnesses are not linked in
+        sources = self.tree.match(["*.c"])
+        key = self._objects_key()
+        objects_root = os.path.join(Config.STATE_DIR, self.objects_dir)
+        objects_dir = os.path.join(objects_root, key)
+        objects = [
+            os.path.join(objects_dir, self._object_name(source))
+            for source in sources
+        ]
+
+        done_marker = os.path.join(self.project_path, objects_dir, "done")
+        if os.path.exists(done_marker):
+            logger.info(f"Reusing {len(objects)} prebuilt project objects")
+            return objects
+
+        # Objects built from older sources or flags are of no further use
+        shutil.rmtree(
+            os.path.join(self.project_path, objects_root), ignore_errors=True
+        )
+        os.makedirs(os.path.join(self.project_path, objects_dir))
+
+        logger.info(
+            f"Prebuilding {len(sources)} project sources with {self.jobs} jobs"
+        )
+        # The compiler runs in its own process, so threads suffice to keep
+        # `jobs` of them busy
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            results = list(
+                executor.map(self._compile_object, sources, objects)
+            )
+        if self.compilation_cache is not None:
+            logger.info(f"Compilation cache: {self.compilation_cache.stats()}")
+
+        self.failures = {
+            source: error
+            for source, error in zip(sources, results)
+            if error is not None
+        }
+        if self.failures:
+            for source, error in self.failures.items():
+                logger.error(f"Could not compile {source}:\n{error}")
+            raise subprocess.CalledProcessError(
+                1,
+                self.cc,
+                stderr="".join(
+                    f"{source}:\n{error}"
+                    for source, error in self.failures.items()
+                ),
+            )
+
+        with open(done_marker, "w", encoding="utf-8") as f:
+            f.write("\n".join(sources))
+        return objects
+
+    def _compile_object(self, source: str, obj: str) -> Optional[str]:
+        """
+        Compiles one source into an object file.
+
+        Args:
+            source (str): Path of the source, relative to the project.
+            obj (str): Path of the object file, relative to the project.
+
+        Returns:
+            Optional[str]: The compiler's errors, or None on success.
+        """
+        if self.compilation_cache is not None:
+            return self.compilation_cache.compile(
+                self.cc, [*self.cflags, "-I."], source, obj, self.project_path
+            )
+
+        try:
+            subprocess.run(
+                [self.cc, *self.cflags, "-I.", "-c", source, "-o", obj],
+                check=True,
+                capture_output=True,
+                text=True,
+                cwd=self.project_path,
+            )
+        except subprocess.CalledProcessError as e:
+            return str(e.stderr)
+        return None
+
+    def _objects_key(self) -> str:
+        """
+        Returns the key of the project's prebuilt objects.
+
+        Headers are part of the key, as they are compiled into the objects.
+
+        Returns:
+            str: A hex digest of the compiler, its flags and the contents of
+            the project's C/C++ files.
+        """
+        digest = hashlib.sha256(json.dumps([self.cc, self.cflags]).encode())
+        for path in self.tree.match([f"*{ext}" for ext in C_EXTENSIONS]):
+            digest.update(f"{path}\0".encode())
+            try:
+                with open(os.path.join(self.project_path, path), "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+            except IOError as e:
+                logger.warning(f"Could not read {path}: {e}")
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def _object_name(source: str) -> str:
+        """
+        Returns the name of a source's object file.
+
+        Args:
+            source (str): Path of the source, relative to the project.
+
+        Returns:
+            str: A name unique to the source's path.
+        """
+        suffix = hashlib.sha256(source.encode()).hexdigest()[:8]
+        return f"{os.path.basename(source)}.{suffix}.o"
@@ -0,0 +1,525 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Concurrent generation, building and evaluation of candidate harnesses.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from typing import Callable, List, Optional, Tuple
+from llm_harness.config import Config
+from llm_harness.core.builder import HarnessBuilder
+from llm_harness.core.evaluator import HarnessEvaluator
+from llm_harness.core.generator import HarnessGenerator
+from llm_harness.core.repair import prepare_repair
+from llm_harness.io.file_manager import FileManager, HarnessWriter
+from llm_harness.models.build import BuildResult
+from llm_harness.models.candidate import Candidate
+from llm_harness.models.evaluation import OUTCOME_ERROR
+from llm_harness.models.project import ProjectInfo
+
+
+def _names(
+    index: Optional[int], target: Optional[str] = None, tier: int = 0
+) -> Tuple[str, str]:
+    """
+    Names the harness and executable of a candidate.
+
+    Args:
+        index (int, optional): Index of the candidate, or None for the
+            default names.
+        target (str, optional): Name of the function to be fuzzed, if the
+            harnesses are named after it.
+        tier (int): Tier of the candidate in a cascade. Tiers after the
+            first are named after it, so that they keep the sources of
+            the tiers before.
+
+    Returns:
+        Tuple[str, str]: The harness' filename and the executable's name.
+    """
+    stem, extension = os.path.splitext(Config.HARNESS_FILENAME)
+    executable = Config.EXECUTABLE_FILENAME
+    parts = (target, f"t{tier}" if tier else None, index)
+    suffix = "".join(f"_{part}" for part in parts if part is not None)
+    return f"{stem}{suffix}{extension}", f"{executable}{suffix}"
+
+
+def make_candidates(
+    count: int, target: Optional[str] = None, tier: int = 0
+) -> List[Candidate]:
+    """
+    Names the harnesses and executables of a run's candidates.
+
+    A lone candidate uses the default names, as a single harness run does.
+
+    Args:
+        count (int): Number of candidates.
+        target (str, optional): Name of the function to be fuzzed, to name
+            the harnesses after, so that those of other targets are kept.
+        tier (int): Tier of the candidates in a cascade.
+
+    Returns:
+        List[Candidate]: The candidates, yet to be generated.
+    """
+    candidates = []
+    for index in range(count):
+        harness_filename, executable = _names(
+            index if count > 1 else None, target, tier
+        )
+        candidates.append(
+            Candidate(
+                index=index,
+                harness_filename=harness_filename,
+                executable=executable,
+                tier=tier,
+            )
+        )
+    return candidates
+
+
+def make_refinement(
+    best: Candidate, index: int, target: Optional[str] = None
+) -> Candidate:
+    """
+    Creates a candidate improving on the coverage of another.
+
+    Args:
+        best (Candidate): The candidate to improve on, with its coverage.
+        index (int): Index of the new candidate, unused by the run's others.
+        target (str, optional): Name of the function to be fuzzed, if the
+            harnesses are named after it.
+
+    Returns:
+        Candidate: The candidate, yet to be generated.
+    """
+    harness_filename, executable = _names(index, target, best.tier)
+    return Candidate(
+        index=index,
+        harness_filename=harness_filename,
+        executable=executable,
+        tier=best.tier,
+        refines=best,
+        refinement=best.refinement + 1,
+    )
+
+
+def can_refine(candidate: Candidate) -> bool:
+    """
+    Checks whether a candidate's coverage leaves anything to refine.
+
+    Args:
+        candidate (Candidate): The candidate.
+
+    Returns:
+        bool: Whether the candidate built and its coverage has gaps.
+    """
+    return (
+        candidate.built
+        and candidate.coverage is not None
+        and bool(candidate.coverage.gaps)
+    )
+
+
+def generate_candidate(
+    generator: HarnessGenerator,
+    project_info: ProjectInfo,
+    target: str,
+    candidate: Candidate,
+    writer: HarnessWriter,
+) -> str:
+    """
+    Generates a candidate's harness, as its state calls for.
+
+    A refinement asks to improve on its parent's coverage, a candidate that
+    failed to build asks for a repair, and any other for a new harness.
+
+    Args:
+        generator (HarnessGenerator): The generator.
+        project_info (ProjectInfo): The project information.
+        target (str): Name of the function to be fuzzed.
+        candidate (Candidate): The candidate.
+        writer (HarnessWriter): Writer of the candidate's harness file.
+
+    Returns:
+        str: The harness code.
+    """
+    parent = candidate.refines
+    if parent is not None and parent.coverage is not None:
+        return generator.refine_harness(
+            project_info,
+            target,
+            parent.harness,
+            parent.coverage,
+            candidate.index,
+            writer,
+            candidate.build_errors,
+        )
+    if candidate.build_errors:
+        return generator.repair_harness(
+            project_info,
+            target,
+            candidate.build_errors,
+            candidate.index,
+            writer,
+        )
+    return generator.create_harness(
+        project_info, target, candidate.index, writer
+    )
+
+
+def keep_best(
+    project_path: str, candidates: List[Candidate]
+) -> List[Candidate]:
+    """
+    Ranks the candidates and removes the executables of all but the best.
+
+    Their sources are kept under the harness directory.
+
+    Args:
+        project_path (str): Path to the project directory.
+        candidates (List[Candidate]): The evaluated candidates.
+
+    Returns:
+        List[Candidate]: The candidates, best first.
+    """
+    ranked = sorted(candidates, key=lambda c: c.score, reverse=True)
+    for candidate in ranked[1:]:
+        path = os.path.join(project_path, candidate.executable)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+    return ranked
+
+
+def report_candidates(ranked: List[Candidate], elapsed: float) -> None:
+    """
+    Logs the candidates' results.
+
+    Args:
+        ranked (List[Candidate]): The candidates, best first.
+        elapsed (float): Wall time of the run, in seconds.
+    """
+    logger.info(f"Evaluated {len(ranked)} candidates in {elapsed:.1f}s")
+    for candidate in ranked:
+        metrics = candidate.metrics
+        repairs = (
+            f" after {candidate.repairs} repairs" if candidate.repairs else ""
+        )
+        logger.info(
+            f"{candidate.harness_filename} ({candidate.model}): "
+            f"{candidate.status}{repairs}, "
+            f"{metrics.outcome}, cov {metrics.cov}, ft {metrics.ft}, "
+            f"{metrics.execs_per_sec} exec/s, "
+            f"done at {candidate.finished_at:.1f}s"
+        )
+    logger.info(f"Keeping {ranked[0].harness_filename}")
+
+
+class CandidateRunner:
+    """
+    Generates several harnesses for the same target and keeps the best.
+
+    Every candidate moves through the LLM call, the build and the
+    evaluation on its own, so a candidate is built as soon as its response
+    arrives, while the others are still being generated. Each stage has its
+    own concurrency cap, and the run takes about as long as its slowest
+    candidate, rather than as long as all of them together.
+    """
+
+    def __init__(
+        self,
+        generator: HarnessGenerator,
+        file_manager: FileManager,
+        builder: HarnessBuilder,
+        evaluator_factory: Callable[[str], HarnessEvaluator],
+        llm_concurrency: int = Config.LLM_CONCURRENCY,
+        build_concurrency: Optional[int] = Config.BUILD_JOBS,
+        eval_concurrency: Optional[int] = Config.EVAL_CONCURRENCY,
+        repair_attempts: int = Config.REPAIR_ATTEMPTS,
+        repair_time: float = Config.REPAIR_TIME_BUDGET,
+        refine_rounds: int = Config.REFINE_ROUNDS,
+        name_by_target: bool = False,
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            generator (HarnessGenerator): Generates the harnesses.
+            file_manager (FileManager): Writes the harnesses to the project.
+            builder (HarnessBuilder): Builds the harnesses. The project's
+                sources are prebuilt once, for all candidates.
+            evaluator_factory (Callable[[str], HarnessEvaluator]): Creates
+                the evaluator of a harness executable.
+            llm_concurrency (int): Maximum number of concurrent LLM calls.
+            build_concurrency (int, optional): Maximum number of concurrent
+                builds. Defaults to the number of CPUs.
+            eval_concurrency (int, optional): Maximum number of concurrent
+                evaluations. Defaults to the number of CPUs.
+            repair_attempts (int): Maximum number of rounds of repairing a
+                harness that fails to build.
+            repair_time (float): Seconds the repair rounds of a candidate
+                may take in all.
+            refine_rounds (int): Rounds of refining the best candidate of a
+                cascade, given the coverage gaps of its corpus. The
+                evaluators must measure the coverage.
+            name_by_target (bool): Name the harnesses after their target,
+                so that runs for several targets of a project keep each
+                other's harnesses.
+        """
+        self.generator = generator
+        self.file_manager = file_manager
+        self.builder = builder
+        self.evaluator_factory = evaluator_factory
+        self.repair_attempts = repair_attempts
+        self.repair_time = repair_time
+        self.refine_rounds = refine_rounds
+        self.name_by_target = name_by_target
+        self._llm_slots = threading.Semaphore(max(1, llm_concurrency))
+        self._build_slots = threading.Semaphore(
+            build_concurrency or os.cpu_count() or 1
+        )
+        self._eval_slots = threading.Semaphore(
+            eval_concurrency or os.cpu_count() or 1
+        )
+
+    def run(
+        self,
+        project_info: ProjectInfo,
+        target: str = Config.DEFAULT_TARGET,
+        count: int = Config.DEFAULT_CANDIDATES,
+        tier: int = 0,
+    ) -> List[Candidate]:
+        """
+        Generates, builds and evaluates the candidates.
+
+        The executables of all but the best candidate are removed; their
+        sources are kept under the harness directory.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+            count (int): Number of candidates.
+            tier (int): Tier of the candidates in a cascade.
+
+        Returns:
+            List[Candidate]: The candidates, best first.
+        """
+        candidates = make_candidates(
+            count, target if self.name_by_target else None, tier
+        )
+        start = time.monotonic()
+
+        # Each thread spends most of its time waiting on the LLM or a
+        # subprocess, so there is one per candidate and the stages' caps
+        # bound the actual work
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            list(
+                executor.map(
+                    lambda candidate: self._process(
+                        candidate, project_info, target, start
+                    ),
+                    candidates,
+                )
+            )
+
+        ranked = keep_best(self.builder.project_path, candidates)
+        report_candidates(ranked, time.monotonic() - start)
+        return ranked
+
+    def run_cascade(
+        self,
+        project_info: ProjectInfo,
+        target: str,
+        count: int,
+        generators: List[HarnessGenerator],
+    ) -> List[Candidate]:
+        """
+        Runs the candidates of each generator in turn, until one is
+        accepted.
+
+        Generators are meant to be ordered from the fastest and cheapest
+        model to the strongest, so that simple targets never reach the
+        expensive tiers.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+            count (int): Number of candidates per tier.
+            generators (List[HarnessGenerator]): The tiers' generators.
+
+        Returns:
+            List[Candidate]: The candidates of the last tier run, best
+            first.
+        """
+        ranked: List[Candidate] = []
+        for tier, generator in enumerate(generators):
+            self.generator = generator
+            ranked = self.run(project_info, target, count, tier)
+            if ranked[0].accepted:
+                logger.info(
+                    f"Harness accepted at tier {tier} ({generator.model})"
+                )
+                break
+            if tier + 1 < len(generators):
+                logger.info(
+                    f"No harness of {generator.model} was accepted, "
+                    f"escalating to {generators[tier + 1].model}"
+                )
+        return self.refine(project_info, target, ranked)
+
+    def refine(
+        self, project_info: ProjectInfo, target: str, ranked: List[Candidate]
+    ) -> List[Candidate]:
+        """
+        Improves on the best candidate's coverage, for the runner's rounds.
+
+        Each round asks the LLM for a harness reaching the code the best
+        candidate's corpus missed, and keeps the better of the two.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+            ranked (List[Candidate]): The evaluated candidates, best first.
+
+        Returns:
+            List[Candidate]: The candidates and their refinements, best
+            first.
+        """
+        start = time.monotonic()
+        for _ in range(self.refine_rounds):
+            best = ranked[0]
+            if not can_refine(best):
+                break
+            refined = make_refinement(
+                best,
+                max(c.index for c in ranked) + 1,
+                target if self.name_by_target else None,
+            )
+            logger.info(
+                f"Refining {best.harness_filename} into "
+                f"{refined.harness_filename}"
+            )
+            self._process(refined, project_info, target, start)
+            ranked = keep_best(self.builder.project_path, [*ranked, refined])
+            logger.info(
+                f"Refinement {refined.refinement}: {refined.status}, "
+                f"cov {refined.metrics.cov} against {best.metrics.cov}, "
+                f"keeping {ranked[0].harness_filename}"
+            )
+        return ranked
+
+    def _process(
+        self,
+        candidate: Candidate,
+        project_info: ProjectInfo,
+        target: str,
+        start: float,
+    ) -> None:
+        """
+        Takes one candidate through generation, build and evaluation.
+
+        A harness that fails to build is sent back to the LLM along with
+        the compiler's errors, within the runner's repair budget.
+
+        Errors are recorded on the candidate rather than raised, so that
+        one failing candidate does not stop the others.
+
+        Args:
+            candidate (Candidate): The candidate.
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+            start (float): Monotonic time the run started at.
+        """
+        candidate.model = self.generator.model
+        try:
+            self._generate(candidate, project_info, target)
+            result = self._build(candidate)
+            # Errors in the project's own sources are not the harness' to
+            # repair
+            while (
+                not candidate.built
+                and not result.prebuild_failed
+                and prepare_repair(
+                    candidate, self.repair_attempts, self.repair_time
+                )
+            ):
+                self._generate(candidate, project_info, target)
+                result = self._build(candidate)
+            if not candidate.built:
+                return
+
+            with self._eval_slots:
+                evaluator = self.evaluator_factory(candidate.executable)
+                candidate.accepted = evaluator.evaulate_harness()
+                candidate.metrics = evaluator.metrics
+                if self.refine_rounds > 0:
+                    candidate.coverage = evaluator.measure_coverage(
+                        candidate.harness_filename
+                    )
+        except Exception as e:
+            logger.error(f"Candidate {candidate.index} failed: {e}")
+            candidate.error = str(e)
+            candidate.metrics.outcome = OUTCOME_ERROR
+            candidate.metrics.reason = str(e)
+        finally:
+            candidate.finished_at = time.monotonic() - start
+
+    def _generate(
+        self, candidate: Candidate, project_info: ProjectInfo, target: str
+    ) -> None:
+        """
+        Generates a candidate's harness and writes it to the project.
+
+        Args:
+            candidate (Candidate): The candidate.
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+        """
+        with (
+            self._llm_slots,
+            self.file_manager.open_harness(
+                candidate.harness_filename
+            ) as writer,
+        ):
+            candidate.harness = generate_candidate(
+                self.generator, project_info, target, candidate, writer
+            )
+
+    def _build(self, candidate: Candidate) -> BuildResult:
+        """
+        Builds a candidate.
+
+        Args:
+            candidate (Candidate): The candidate.
+
+        Returns:
+            BuildResult: The build's result.
+        """
+        with self._build_slots:
+            result = self.builder.build_harness(
+                candidate.harness_filename, candidate.executable
+            )
+        candidate.build_output = result.output
+        candidate.built = result.success
+        return result
@@ -0,0 +1,163 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Content-addressed cache of compiled object files.
+"""
+
+import os
+import hashlib
+import threading
+import subprocess
+from typing import Dict, List, Optional
+from loguru import logger
+from llm_harness.io.cache import DiskCache
+
+
+class CompilationCache:
+    """
+    Cache of object files, keyed by what the compiler actually sees.
+
+    Like ccache, the key is the hash of the preprocessed translation unit,
+    the compiler's version and the compilation flags. Sources that
+    preprocess identically are compiled only once, regardless of the
+    project or the directory they are compiled in. Objects reused in
+    another directory keep the debug information of the first one.
+    """
+
+    def __init__(self, cache: DiskCache):
+        """
+        Initialize the cache.
+
+        Args:
+            cache (DiskCache): Store of the object files.
+        """
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def compile(
+        self, cc: str, cflags: List[str], source: str, obj: str, cwd: str
+    ) -> Optional[str]:
+        """
+        Compiles a source into an object file, unless it is cached.
+
+        Args:
+            cc (str): The compiler.
+            cflags (List[str]): The compilation flags, including include
+                paths.
+            source (str): Path of the source, relative to `cwd`.
+            obj (str): Path of the object file, relative to `cwd`.
+            cwd (str): Directory to compile in.
+
+        Returns:
+            Optional[str]: The compiler's errors, or None on success.
+        """
+        try:
+            preprocessed = subprocess.run(
+                [cc, *cflags, "-E", source],
+                check=True,
+                capture_output=True,
+                cwd=cwd,
+            ).stdout
+        except subprocess.CalledProcessError as e:
+            self._count(hit=False)
+            return bytes(e.stderr).decode("utf-8", errors="replace")
+
+        # Compilers note the working directory in the output, e.g. for
+        # debug information, which would tie the key to the checkout
+        preprocessed = preprocessed.replace(
+            os.path.abspath(cwd).encode(), b"."
+        )
+        key = DiskCache.make_key(
+            self._version(cc),
+            cflags,
+            hashlib.sha256(preprocessed).hexdigest(),
+        )
+        obj_path = os.path.join(cwd, obj)
+
+        data = self.cache.get(key)
+        if data is not None:
+            with open(obj_path, "wb") as f:
+                f.write(data)
+            self._count(hit=True)
+            return None
+
+        self._count(hit=False)
+        try:
+            subprocess.run(
+                [cc, *cflags, "-c", source, "-o", obj],
+                check=True,
+                capture_output=True,
+                cwd=cwd,
+            )
+        except subprocess.CalledProcessError as e:
+            return bytes(e.stderr).decode("utf-8", errors="replace")
+
+        with open(obj_path, "rb") as f:
+            self.cache.put(key, f.read())
+        return None
+
+    def stats(self) -> str:
+        """
+        Summarizes the cache's hits and misses.
+
+        Returns:
+            str: The number of hits and misses, and the hit rate.
+        """
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0%} hit rate)"
+
+    def _version(self, cc: str) -> str:
+        """
+        Returns the version of a compiler, as reported by the compiler.
+
+        Args:
+            cc (str): The compiler.
+
+        Returns:
+            str: Its `--version` output, or the compiler's name if unknown.
+        """
+        with self._lock:
+            if cc not in self._versions:
+                try:
+                    self._versions[cc] = subprocess.run(
+                        [cc, "--version"],
+                        check=True,
+                        capture_output=True,
+                        text=True,
+                    ).stdout
+                except (OSError, subprocess.CalledProcessError) as e:
+                    logger.warning(f"Could not get the version of {cc}: {e}")
+                    self._versions[cc] = cc
+            return self._versions[cc]
+
+    def _count(self, hit: bool) -> None:
+        """
+        Records a lookup.
+
+        Args:
+            hit (bool): Whether the object file was cached.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
@@ -0,0 +1,190 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compression of project files into fewer prompt tokens.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+from loguru import logger
+from llm_harness.core.csource import C_EXTENSIONS, strip_comments
+from llm_harness.core.packer import estimate_tokens, summarize_source
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+# Literals, which are kept as they are, or runs of blanks
+BLANKS_REGEX = re.compile(
+    r"""(?P<literal>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|[ \t\f\v]+"""
+)
+
+INCLUDE_LINE_REGEX = re.compile(r"#\s*include\b")
+
+
+def collapse_whitespace(content: str) -> str:
+    """
+    Collapses the whitespace of C/C++ source code.
+
+    Indentation, trailing whitespace and blank lines are removed, and runs
+    of blanks are reduced to a single space. Literals are left intact.
+
+    Args:
+        content (str): The source code, without comments.
+
+    Returns:
+        str: The collapsed source code.
+    """
+    collapsed = BLANKS_REGEX.sub(
+        lambda match: match.group("literal") or " ", content
+    )
+    lines = (line.strip() for line in collapsed.splitlines())
+    return "\n".join(line for line in lines if line) + "\n"
+
+
+def dedupe_includes(content: str) -> str:
+    """
+    Removes repeated `#include` lines of a file.
+
+    Args:
+        content (str): The source code, with collapsed whitespace.
+
+    Returns:
+        str: The source code, including each file only once.
+    """
+    seen = set()
+    lines = []
+    for line in content.splitlines():
+        if INCLUDE_LINE_REGEX.match(line):
+            if line in seen:
+                continue
+            seen.add(line)
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class CompressedContext:
+    """The compressed project files, along with a report of the savings."""
+
+    project_info: ProjectInfo
+    original_tokens: int
+    compressed_tokens: int
+    summarized: List[str] = field(default_factory=list)
+    duplicates: List[str] = field(default_factory=list)
+
+    @property
+    def ratio(self) -> float:
+        """Compressed tokens as a fraction of the original ones."""
+        if not self.original_tokens:
+            return 1.0
+        return self.compressed_tokens / self.original_tokens
+
+
+class PromptCompressor:
+    """
+    Compresses a project's C/C++ files before they are sent to the LLM.
+
+    Comments, including license headers, and redundant whitespace are
+    removed, repeated includes and files identical to an earlier one are
+    dropped, and, optionally, the function bodies of files unrelated to the
+    target are reduced to their signatures. Other files are kept as they
+    are, as whitespace may be significant in them, e.g. in Makefiles.
+    """
+
+    def __init__(self, signatures_only: bool = False):
+        """
+        Initialize the compressor.
+
+        Args:
+            signatures_only (bool): Reduce the function bodies of files not
+                mentioning the target to their signatures.
+        """
+        self.signatures_only = signatures_only
+
+    def compress(
+        self,
+        project_info: ProjectInfo,
+        target: Optional[Union[str, List[str]]] = None,
+    ) -> CompressedContext:
+        """
+        Compresses the project's files.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (Union[str, List[str]], optional): Name of the function
+                to be fuzzed, or of several. Files mentioning any of them
+                keep their function bodies.
+
+        Returns:
+            CompressedContext: The compressed files and the savings.
+        """
+        targets = [target] if isinstance(target, str) else target or []
+        mention = (
+            re.compile(
+                rf"\b(?:{'|'.join(re.escape(name) for name in targets)})\b"
+            )
+            if targets
+            else None
+        )
+        files: List[ProjectFile] = []
+        summarized: List[str] = []
+        duplicates: List[str] = []
+        # Digests of the compressed files so far, and their paths
+        seen: Dict[str, str] = {}
+
+        for file in project_info.files:
+            content = file.content
+            if file.name.endswith(C_EXTENSIONS):
+                content = dedupe_includes(
+                    collapse_whitespace(strip_comments(content))
+                )
+                if self.signatures_only and not (
+                    mention and mention.search(content)
+                ):
+                    content = summarize_source(content)
+                    summarized.append(file.path)
+
+            compressed = ProjectFile(
+                path=file.path, name=file.name, content=content
+            )
+            digest = compressed.get_digest()
+            if digest in seen:
+                logger.debug(f"{file.path} is identical to {seen[digest]}")
+                duplicates.append(file.path)
+                continue
+            seen[digest] = file.path
+            files.append(compressed)
+
+        compressed_info = ProjectInfo(files=files, root=project_info.root)
+        context = CompressedContext(
+            project_info=compressed_info,
+            original_tokens=estimate_tokens(
+                project_info.get_concatenated_content()
+            ),
+            compressed_tokens=estimate_tokens(
+                compressed_info.get_concatenated_content()
+            ),
+            summarized=summarized,
+            duplicates=duplicates,
+        )
+        logger.info(
+            f"Compressed the project from {context.original_tokens} to "
+            f"{context.compressed_tokens} tokens "
+            f"(ratio {context.ratio:.2f}, {len(summarized)} files "
+            f"summarized, {len(duplicates)} duplicates dropped)"
+        )
+        return context
@@ -0,0 +1,321 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Source-based coverage of a harness' corpus, condensed for the LLM.
+"""
+
+import os
+import glob
+import json
+import tempfile
+import subprocess
+from collections import deque
+from loguru import logger
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from llm_harness.config import Config
+from llm_harness.core.builder import HarnessBuilder
+from llm_harness.core.symbols import SymbolIndex
+from llm_harness.models.coverage import CoverageGap, CoverageReport
+
+# Kind of the regions of `llvm-cov export` holding code
+CODE_REGION = 0
+
+
+def call_distances(index: SymbolIndex, target: str) -> Dict[str, int]:
+    """
+    Measures how many calls away from the target each function is.
+
+    Args:
+        index (SymbolIndex): The project's symbol index.
+        target (str): Name of the fuzzed function.
+
+    Returns:
+        Dict[str, int]: Distance of each function the target reaches,
+        through the calls the index knows of, the target being 0.
+    """
+    distances: Dict[str, int] = {}
+    queue: Deque[Tuple[str, int]] = deque([(target, 0)])
+    while queue:
+        name, distance = queue.popleft()
+        if name in distances:
+            continue
+        functions = [s for s in index.lookup(name) if s.kind == "function"]
+        if not functions and distance:
+            continue
+        distances[name] = distance
+        for symbol in functions:
+            for ref in symbol.references:
+                if ref not in distances:
+                    queue.append((ref, distance + 1))
+    return distances
+
+
+def parse_export(
+    data: Dict[str, Any],
+    project_path: str,
+    distances: Optional[Dict[str, int]] = None,
+    max_gaps: int = Config.COVERAGE_MAX_GAPS,
+) -> CoverageReport:
+    """
+    Condenses the output of `llvm-cov export` into a report.
+
+    Gaps are functions never called, code never reached in the functions
+    that were, and branches only ever taken one way. Only the project's
+    own files count, not the harness or system headers. Gaps in the
+    functions nearest to the target come first.
+
+    Args:
+        data (Dict[str, Any]): The exported JSON.
+        project_path (str): Path to the project directory.
+        distances (Dict[str, int], optional): Calls from the target to each
+            function, as by `call_distances`. Gaps are ordered by file and
+            line only if not given.
+        max_gaps (int): Maximum number of gaps reported.
+
+    Returns:
+        CoverageReport: The report.
+    """
+    distances = distances or {}
+    report = CoverageReport()
+    lines: Dict[str, List[str]] = {}
+
+    def project_file(filename: str) -> Optional[str]:
+        path = os.path.relpath(
+            os.path.join(project_path, filename), project_path
+        )
+        if path.startswith(("..", Config.HARNESS_DIR + os.sep)):
+            return None
+        return path
+
+    def source_line(path: str, line: int) -> str:
+        if path not in lines:
+            try:
+                with open(
+                    os.path.join(project_path, path),
+                    "r",
+                    encoding="utf-8",
+                    errors="replace",
+                ) as f:
+                    lines[path] = f.read().splitlines()
+            except OSError:
+                lines[path] = []
+        source = lines[path]
+        return source[line - 1].strip() if 0 < line <= len(source) else ""
+
+    for export in data.get("data", []):
+        for file in export.get("files", []):
+            if project_file(file["filename"]) is None:
+                continue
+            summary = file.get("summary", {})
+            for name in ("functions", "lines", "branches"):
+                totals = summary.get(name, {})
+                setattr(
+                    report,
+                    f"{name}_covered",
+                    getattr(report, f"{name}_covered")
+                    + totals.get("covered", 0),
+                )
+                setattr(
+                    report,
+                    f"{name}_total",
+                    getattr(report, f"{name}_total") + totals.get("count", 0),
+                )
+
+    ranked: List[Tuple[Tuple[int, str, int], CoverageGap]] = []
+    seen = set()
+
+    def add(path: str, line: int, function: str, kind: str) -> None:
+        if (path, line) in seen:
+            return
+        seen.add((path, line))
+        gap = CoverageGap(path, line, function, kind, source_line(path, line))
+        distance = distances.get(function, len(distances) + 1)
+        ranked.append(((distance, path, line), gap))
+
+    for export in data.get("data", []):
+        for function in export.get("functions", []):
+            filenames = function.get("filenames", [])
+            regions = function.get("regions", [])
+            if not filenames or not regions:
+                continue
+            path = project_file(filenames[0])
+            if path is None:
+                continue
+            # File-local functions are prefixed with their file's name
+            name = function["name"].rsplit(":", 1)[-1]
+            if not function.get("count"):
+                add(path, regions[0][0], name, "never called")
+                continue
+
+            # A branch says more than the region it leads to
+            for branch in function.get("branches", []):
+                # Line, column, end line, end column, true and false
+                # counts, file, expanded file and kind
+                true_count, false_count = branch[4], branch[5]
+                if bool(true_count) == bool(false_count):
+                    continue
+                branch_path = project_file(filenames[branch[6]])
+                if branch_path is not None:
+                    add(
+                        branch_path,
+                        branch[0],
+                        name,
+                        "never false" if true_count else "never true",
+                    )
+            for region in regions:
+                # Line, column, end line, end column, count, file, expanded
+                # file and kind
+                if region[4] == 0 and region[7] == CODE_REGION:
+                    region_path = project_file(filenames[region[5]])
+                    if region_path is not None:
+                        add(region_path, region[0], name, "never reached")
+
+    ranked.sort(key=lambda item: item[0])
+    report.gaps = [gap for _, gap in ranked[:max_gaps]]
+    return report
+
+
+class CoverageCollector:
+    """
+    Measures the source-based coverage of a harness' corpus.
+
+    The harness is built once more, with the project's sources, with
+    Clang's coverage instrumentation. The corpus of the harness' fuzzing
+    run is replayed through it, and the resulting profile is exported with
+    `llvm-profdata` and `llvm-cov`.
+    """
+
+    def __init__(
+        self,
+        builder: HarnessBuilder,
+        distances: Optional[Dict[str, int]] = None,
+        max_gaps: int = Config.COVERAGE_MAX_GAPS,
+        timeout: float = Config.COVERAGE_TIMEOUT,
+    ):
+        """
+        Initialize the collector.
+
+        Args:
+            builder (HarnessBuilder): Builds the harness and the project's
+                sources with the coverage instrumentation, apart from the
+                fuzzing build.
+            distances (Dict[str, int], optional): Calls from the target to
+                each function, ranking the gaps of the reports.
+            max_gaps (int): Maximum number of gaps of a report.
+            timeout (float): Seconds the corpus may take to replay.
+        """
+        self.builder = builder
+        self.distances = distances
+        self.max_gaps = max_gaps
+        self.timeout = timeout
+
+    def collect(
+        self, harness_filename: str, executable: str, corpus_dir: str
+    ) -> Optional[CoverageReport]:
+        """
+        Measures the coverage of a harness' corpus.
+
+        Args:
+            harness_filename (str): Name of the harness file.
+            executable (str): Name of the harness' fuzzing executable.
+            corpus_dir (str): Absolute path of the corpus.
+
+        Returns:
+            Optional[CoverageReport]: The report, or None if the coverage
+            could not be measured.
+        """
+        project_path = self.builder.project_path
+        coverage_executable = f"{executable}-coverage"
+        result = self.builder.build_harness(
+            harness_filename, coverage_executable
+        )
+        if not result.success:
+            logger.warning(
+                f"Could not build {harness_filename} for coverage: "
+                f"{result.output}"
+            )
+            return None
+
+        try:
+            with tempfile.TemporaryDirectory(prefix="coverage-") as tmp:
+                subprocess.run(
+                    [f"./{coverage_executable}", "-runs=0", corpus_dir],
+                    capture_output=True,
+                    check=False,
+                    timeout=self.timeout,
+                    cwd=project_path,
+                    env={
+                        **os.environ,
+                        "LLVM_PROFILE_FILE": os.path.join(tmp, "%p.profraw"),
+                    },
+                )
+                profiles = glob.glob(os.path.join(tmp, "*.profraw"))
+                if not profiles:
+                    logger.warning(
+                        f"Replaying the corpus of {harness_filename} wrote no "
+                        "coverage profile"
+                    )
+                    return None
+
+                profile = os.path.join(tmp, "harness.profdata")
+                subprocess.run(
+                    [
+                        Config.LLVM_PROFDATA,
+                        "merge",
+                        "-sparse",
+                        *profiles,
+                        "-o",
+                        profile,
+                    ],
+                    capture_output=True,
+                    check=True,
+                )
+                exported = subprocess.run(
+                    [
+                        Config.LLVM_COV,
+                        "export",
+                        "-format=text",
+                        "-skip-expansions",
+                        f"-instr-profile={profile}",
+                        coverage_executable,
+                    ],
+                    capture_output=True,
+                    check=True,
+                    text=True,
+                    cwd=project_path,
+                )
+            report = parse_export(
+                json.loads(exported.stdout),
+                project_path,
+                self.distances,
+                self.max_gaps,
+            )
+        except (subprocess.SubprocessError, OSError, ValueError) as e:
+            logger.warning(f"Could not measure coverage: {e}")
+            return None
+        finally:
+            try:
+                os.remove(os.path.join(project_path, coverage_executable))
+            except OSError:
+                pass
+
+        logger.info(
+            f"Coverage of {harness_filename}: "
+            f"{report.summary().splitlines()[0]}"
+        )
+        return report
@@ -0,0 +1,131 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Lexical helpers for C/C++ source code.
+"""
+
+import re
+from typing import Match, Optional
+
+C_EXTENSIONS = (".c", ".h", ".cc", ".cpp", ".cxx", ".hh", ".hpp", ".hxx")
+
+TOKEN_REGEX = re.compile(
+    r"""
+    (?P<line_comment>//[^\n]*)
+    | (?P<block_comment>/\*.*?(?:\*/|\Z))
+    | (?P<string>"(?:\\.|[^"\\\n])*")
+    | (?P<char>'(?:\\.|[^'\\\n])*')
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+PREPROCESSOR_REGEX = re.compile(r"^[ \t]*#(?:[^\n]*\\\n)*[^\n]*", re.MULTILINE)
+
+BRACE_REGEX = re.compile(r"[{}]")
+
+
+def _blank(text: str) -> str:
+    """
+    Replaces every character but newlines with a space.
+
+    Args:
+        text (str): The text to blank out.
+
+    Returns:
+        str: Text of the same length and line structure.
+    """
+    return "\n".join(" " * len(line) for line in text.split("\n"))
+
+
+def mask_source(
+    content: str, strings: bool = True, preprocessor: bool = False
+) -> str:
+    """
+    Blanks out comments and, optionally, literals and directives.
+
+    The result keeps the length and line structure of the source, so
+    offsets and line numbers found in it apply to the original as well.
+
+    Args:
+        content (str): The source code.
+        strings (bool): Also blank out the contents of string and character
+            literals, keeping their quotes.
+        preprocessor (bool): Also blank out preprocessor directives.
+
+    Returns:
+        str: The masked source code.
+    """
+
+    def replace(match: Match[str]) -> str:
+        token = match.group(0)
+        if match.lastgroup in ("line_comment", "block_comment"):
+            return _blank(token)
+        if strings:
+            return token[0] + _blank(token[1:-1]) + token[-1]
+        return token
+
+    masked = TOKEN_REGEX.sub(replace, content)
+    if preprocessor:
+        masked = PREPROCESSOR_REGEX.sub(
+            lambda match: _blank(match.group(0)), masked
+        )
+    return masked
+
+
+def find_matching_brace(masked: str, start: int) -> Optional[int]:
+    """
+    Finds the brace closing the one at `start`.
+
+    Args:
+        masked (str): Source code with comments and literals masked.
+        start (int): Offset of an opening brace.
+
+    Returns:
+        Optional[int]: Offset of the closing brace, or None if unbalanced.
+    """
+    depth = 0
+    for match in BRACE_REGEX.finditer(masked, start):
+        depth += 1 if match.group(0) == "{" else -1
+        if depth == 0:
+            return match.start()
+    return None
+
+
+def strip_comments(content: str) -> str:
+    """
+    Removes the comments of source code, keeping literals intact.
+
+    Block comments spanning lines are replaced with a newline, so that code
+    before and after them never ends up on the same line, e.g. on a
+    preprocessor directive's line.
+
+    Args:
+        content (str): The source code.
+
+    Returns:
+        str: The source code without comments.
+    """
+
+    def replace(match: Match[str]) -> str:
+        if match.lastgroup == "line_comment":
+            return ""
+        if match.lastgroup == "block_comment":
+            return "\n" if "\n" in match.group(0) else " "
+        return match.group(0)
+
+    return TOKEN_REGEX.sub(replace, content)
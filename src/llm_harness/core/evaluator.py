@@ -19,9 +19,201 @@
 Runs and evaluates the generated harness.
 """
 
+import os
+import re
+import time
+import signal
+import shutil
+import tempfile
+import threading
 import subprocess
+from collections import deque
 from loguru import logger
+from typing import Deque, List, Optional, Tuple
 from llm_harness.config import Config
+from llm_harness.core.coverage import CoverageCollector
+from llm_harness.models.coverage import CoverageReport
+from llm_harness.models.evaluation import (
+    FuzzMetrics,
+    OUTCOME_CRASH,
+    OUTCOME_ERROR,
+    OUTCOME_KILLED,
+    OUTCOME_LEAK,
+    OUTCOME_OK,
+    OUTCOME_OOM,
+    OUTCOME_TIMEOUT,
+)
+
+# e.g. `#4096	pulse  cov: 40 ft: 52 corp: 9/77b lim: 43 exec/s: 2048 rss: 31Mb`
+STATUS_REGEX = re.compile(r"^#(?P<execs>\d+)\s+(?P<event>[A-Za-z]+)\s")
+COV_REGEX = re.compile(r"\bcov: (\d+)")
+FT_REGEX = re.compile(r"\bft: (\d+)")
+CORPUS_REGEX = re.compile(r"\bcorp: (\d+)/(\d+)(b|Kb|Mb)")
+EXECS_PER_SEC_REGEX = re.compile(r"\bexec/s: (\d+)")
+RSS_REGEX = re.compile(r"\brss: (\d+)Mb")
+
+# e.g. `#38829: cov: 1023 ft: 2819 corp: 345 exec/s 3882
+# oom/timeout/crash: 0/0/1 time: 10s job: 3 dft_time: 0`, in fork mode
+FORK_STATUS_REGEX = re.compile(
+    r"^#(?P<execs>\d+): cov: (?P<cov>\d+) ft: (?P<ft>\d+) "
+    r"corp: (?P<corpus>\d+) exec/s:? (?P<execs_per_sec>\d+) "
+    r"oom/timeout/crash: (?P<oom>\d+)/(?P<timeout>\d+)/(?P<crash>\d+)"
+)
+
+# e.g. `stat::peak_rss_mb:              31`, printed by `-print_final_stats`
+FINAL_STAT_REGEX = re.compile(r"^stat::(?P<name>\w+):\s*(?P<value>\d+)")
+
+# Reports of the sanitizers and libFuzzer, with the outcome they stand for
+ERROR_PATTERNS = [
+    (re.compile(r"ERROR: libFuzzer: timeout"), OUTCOME_TIMEOUT),
+    (re.compile(r"ERROR: libFuzzer: out-of-memory"), OUTCOME_OOM),
+    (re.compile(r"ERROR: LeakSanitizer"), OUTCOME_LEAK),
+    (re.compile(r"ERROR: (?:libFuzzer|\w+Sanitizer)"), OUTCOME_CRASH),
+    (re.compile(r"runtime error: "), OUTCOME_CRASH),
+]
+
+CORPUS_UNITS = {"b": 1, "Kb": 1024, "Mb": 1024 * 1024}
+
+
+def parse_output_line(metrics: FuzzMetrics, line: str) -> None:
+    """
+    Updates metrics with a line of libFuzzer's output.
+
+    Args:
+        metrics (FuzzMetrics): The metrics to update.
+        line (str): A line of the fuzzer's combined output.
+    """
+    status = STATUS_REGEX.match(line)
+    if status:
+        metrics.execs = max(metrics.execs, int(status.group("execs")))
+        for regex, name in (
+            (COV_REGEX, "cov"),
+            (FT_REGEX, "ft"),
+            (EXECS_PER_SEC_REGEX, "execs_per_sec"),
+        ):
+            match = regex.search(line)
+            if match:
+                setattr(metrics, name, int(match.group(1)))
+        corpus = CORPUS_REGEX.search(line)
+        if corpus:
+            metrics.corpus_units = int(corpus.group(1))
+            metrics.corpus_bytes = (
+                int(corpus.group(2)) * CORPUS_UNITS[corpus.group(3)]
+            )
+        rss = RSS_REGEX.search(line)
+        if rss:
+            metrics.peak_rss_mb = max(metrics.peak_rss_mb, int(rss.group(1)))
+        return
+
+    fork_status = FORK_STATUS_REGEX.match(line)
+    if fork_status:
+        metrics.execs = max(metrics.execs, int(fork_status.group("execs")))
+        metrics.cov = int(fork_status.group("cov"))
+        metrics.ft = int(fork_status.group("ft"))
+        metrics.corpus_units = int(fork_status.group("corpus"))
+        metrics.execs_per_sec = int(fork_status.group("execs_per_sec"))
+        for name, outcome in (
+            ("crash", OUTCOME_CRASH),
+            ("timeout", OUTCOME_TIMEOUT),
+            ("oom", OUTCOME_OOM),
+        ):
+            if metrics.outcome == OUTCOME_OK and int(fork_status.group(name)):
+                metrics.outcome = outcome
+                metrics.reason = line.strip()
+        return
+
+    final_stat = FINAL_STAT_REGEX.match(line)
+    if final_stat:
+        name, value = final_stat.group("name"), int(final_stat.group("value"))
+        if name == "number_of_executed_units":
+            metrics.execs = max(metrics.execs, value)
+        elif name == "average_exec_per_sec":
+            metrics.execs_per_sec = value
+        elif name == "peak_rss_mb":
+            metrics.peak_rss_mb = max(metrics.peak_rss_mb, value)
+        return
+
+    if metrics.outcome == OUTCOME_OK:
+        for regex, outcome in ERROR_PATTERNS:
+            if regex.search(line):
+                metrics.outcome = outcome
+                metrics.reason = line.strip()
+                break
+
+
+def merge_metrics(runs: List[FuzzMetrics]) -> FuzzMetrics:
+    """
+    Merges the metrics of fuzzers that ran side by side.
+
+    Executions and their rates add up. Coverage is that of the best run, as
+    runs sharing a corpus cover mostly the same code.
+
+    Args:
+        runs (List[FuzzMetrics]): Metrics of the individual fuzzers.
+
+    Returns:
+        FuzzMetrics: The merged metrics, with the first unclean outcome.
+    """
+    merged = FuzzMetrics()
+    for run in runs:
+        merged.execs += run.execs
+        merged.execs_per_sec += run.execs_per_sec
+        merged.cov = max(merged.cov, run.cov)
+        merged.ft = max(merged.ft, run.ft)
+        merged.corpus_units = max(merged.corpus_units, run.corpus_units)
+        merged.corpus_bytes = max(merged.corpus_bytes, run.corpus_bytes)
+        merged.peak_rss_mb = max(merged.peak_rss_mb, run.peak_rss_mb)
+        merged.elapsed = max(merged.elapsed, run.elapsed)
+        if merged.outcome == OUTCOME_OK and run.outcome != OUTCOME_OK:
+            merged.outcome, merged.reason = run.outcome, run.reason
+    return merged
+
+
+class PlateauDetector:
+    """
+    Detects when a fuzzer's coverage stops growing.
+
+    Growth is measured in new features (`ft:`) per second, as features
+    grow whenever coverage does, and also on new hit counts of covered
+    edges.
+    """
+
+    def __init__(self, window: float, min_rate: float):
+        """
+        Initialize the detector.
+
+        Args:
+            window (float): Seconds over which growth is measured.
+            min_rate (float): New features per second below which the
+                coverage is considered flat.
+        """
+        self.window = window
+        self.min_rate = min_rate
+        # Time and number of features of the samples within the window,
+        # plus the last one before it
+        self._samples: Deque[Tuple[float, int]] = deque()
+
+    def update(self, elapsed: float, ft: int) -> bool:
+        """
+        Records a sample and checks for a plateau.
+
+        Args:
+            elapsed (float): Seconds since the start of the run.
+            ft (int): Number of features covered so far.
+
+        Returns:
+            bool: Whether growth stayed below the rate for a whole window.
+        """
+        self._samples.append((elapsed, ft))
+        while len(self._samples) > 1 and (
+            self._samples[1][0] <= elapsed - self.window
+        ):
+            self._samples.popleft()
+
+        since, ft_then = self._samples[0]
+        if elapsed - since < self.window:
+            return False
+        return (ft - ft_then) / (elapsed - since) < self.min_rate
 
 
 class HarnessEvaluator:
@@ -29,15 +221,78 @@ class HarnessEvaluator:
     Runs and evaluates a project's generated harness.
     """
 
-    def __init__(self, project_path: str):
+    def __init__(
+        self,
+        project_path: str,
+        max_total_time: Optional[int] = Config.FUZZ_MAX_TOTAL_TIME,
+        runs: Optional[int] = Config.FUZZ_RUNS,
+        rss_limit_mb: int = Config.FUZZ_RSS_LIMIT_MB,
+        kill_grace: float = Config.FUZZ_KILL_GRACE,
+        min_execs_per_sec: int = Config.MIN_EXECS_PER_SEC,
+        min_coverage: int = Config.MIN_COVERAGE,
+        mode: str = Config.FUZZ_MODE,
+        workers: Optional[int] = Config.FUZZ_WORKERS,
+        concurrency: int = 1,
+        plateau_window: Optional[float] = Config.PLATEAU_WINDOW,
+        plateau_min_rate: float = Config.PLATEAU_MIN_RATE,
+        executable: Optional[str] = None,
+        coverage: Optional[CoverageCollector] = None,
+    ):
         """
         Initialize the evaluator.
 
         Args:
             project_path (str): Path to the project directory.
+            max_total_time (int, optional): Seconds to fuzz for. Not limited
+                if None.
+            runs (int, optional): Number of inputs to run. Not limited if
+                None.
+            rss_limit_mb (int): Memory limit of the fuzzer, in MB.
+            kill_grace (float): Seconds the fuzzer may run past
+                `max_total_time` before it is killed.
+            min_execs_per_sec (int): Minimum executions per second of an
+                accepted harness.
+            min_coverage (int): Minimum number of covered edges of an
+                accepted harness.
+            mode (str): One of `Config.FUZZ_MODES`: a single fuzzer,
+                libFuzzer's `-fork` mode, or its `-jobs` mode.
+            workers (int, optional): Number of fuzzing processes in the fork
+                and jobs modes. Defaults to the CPUs' share of one of the
+                `concurrency` evaluations.
+            concurrency (int): Number of evaluations running at once, among
+                which the CPUs are divided.
+            plateau_window (float, optional): Stop the run once coverage
+                grew by less than `plateau_min_rate` features per second
+                for this many seconds. Never stops early if None, or in the
+                jobs mode, whose fuzzers report to their own logs.
+            plateau_min_rate (float): New features per second below which
+                coverage is considered flat.
+            executable (str, optional): Name of the harness executable.
+                Defaults to `Config.EXECUTABLE_FILENAME`.
+            coverage (CoverageCollector, optional): Measures the coverage
+                of the run's corpus. The corpus is kept for
+                `measure_coverage` if given, and removed after the run
+                otherwise.
         """
         self.project_path = project_path
-        self.executable = Config().EXECUTABLE_FILENAME
+        self.executable = executable or Config().EXECUTABLE_FILENAME
+        self.max_total_time = max_total_time
+        self.runs = runs
+        self.rss_limit_mb = rss_limit_mb
+        self.kill_grace = kill_grace
+        self.min_execs_per_sec = min_execs_per_sec
+        self.min_coverage = min_coverage
+        self.mode = mode
+        self.workers = workers or max(
+            1, (os.cpu_count() or 1) // max(1, concurrency)
+        )
+        self.plateau_window = plateau_window
+        self.plateau_min_rate = plateau_min_rate
+        self.coverage = coverage
+        # Metrics of the last run
+        self.metrics = FuzzMetrics()
+        # Corpus of the last run, kept to measure its coverage
+        self._corpus_dir: Optional[str] = None
 
     def evaulate_harness(self) -> bool:
         """
@@ -46,13 +301,258 @@ class HarnessEvaluator:
         Returns:
             bool: Returns whether the harness "passes" the evaluation.
         """
-        execution_command = f"./{self.executable}"
         logger.info("Starting execution of harness...")
-        subprocess.run(
-            execution_command,
-            check=False,
-            text=True,
-            cwd=self.project_path,
+        self.metrics = self.run()
+        logger.info(f"Fuzzing metrics: {self.metrics}")
+        return self.accept(self.metrics)
+
+    def run(self) -> FuzzMetrics:
+        """
+        Fuzzes with the harness, within the configured limits.
+
+        The fuzzer's output is parsed as it is printed. If the fuzzer does
+        not stop on its own in time, it is killed, along with the processes
+        it started. In the fork and jobs modes, the fuzzers share one corpus
+        and their stats are merged into one report.
+
+        The fuzzer runs in a work directory of its own, where the jobs mode
+        writes its logs, so that concurrent runs keep apart. Crashing inputs
+        are still written to the project.
+
+        Returns:
+            FuzzMetrics: The metrics of the run.
+        """
+        metrics = FuzzMetrics()
+        corpus_dir = tempfile.mkdtemp(prefix="corpus-")
+        work_dir = tempfile.mkdtemp(prefix="fuzz-")
+        executable = os.path.abspath(
+            os.path.join(self.project_path, self.executable)
         )
+        try:
+            process = subprocess.Popen(
+                [executable, *self._fuzzer_options(), corpus_dir],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                cwd=work_dir,
+                # Own process group, so that forked fuzzers are killed too
+                start_new_session=True,
+            )
+        except OSError as e:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+            shutil.rmtree(work_dir, ignore_errors=True)
+            logger.error(f"Could not run the harness: {e}")
+            metrics.outcome, metrics.reason = OUTCOME_ERROR, str(e)
+            return metrics
+
+        killed = threading.Event()
+
+        def kill() -> None:
+            killed.set()
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+        start = time.monotonic()
+        finished = threading.Event()
+
+        def watch_plateau(detector: PlateauDetector) -> None:
+            # Every new feature is reported as soon as it is found, so the
+            # counters are current even when the fuzzer prints nothing
+            while not finished.wait(Config.PLATEAU_CHECK_INTERVAL):
+                elapsed = time.monotonic() - start
+                # Startup, up to the first features, is not a plateau
+                if metrics.ft and detector.update(elapsed, metrics.ft):
+                    metrics.plateau_at = elapsed
+                    logger.info(
+                        f"Coverage plateaued at {metrics.ft} features after "
+                        f"{elapsed:.1f}s, stopping the fuzzer"
+                    )
+                    # libFuzzer prints its final stats and exits on SIGINT
+                    try:
+                        os.killpg(process.pid, signal.SIGINT)
+                    except OSError:
+                        pass
+                    return
+
+        watcher = None
+        if self.plateau_window is not None and self.mode != "jobs":
+            watcher = threading.Thread(
+                target=watch_plateau,
+                args=(
+                    PlateauDetector(
+                        self.plateau_window, self.plateau_min_rate
+                    ),
+                ),
+                daemon=True,
+            )
+            watcher.start()
+
+        timer = None
+        if self.max_total_time is not None:
+            timer = threading.Timer(
+                self.max_total_time + self.kill_grace, kill
+            )
+            timer.start()
+
+        try:
+            assert process.stdout is not None
+            for line in process.stdout:
+                logger.debug(line.rstrip())
+                parse_output_line(metrics, line)
+            process.wait()
+            metrics.elapsed = time.monotonic() - start
+            if self.mode == "jobs":
+                metrics = merge_metrics(
+                    [metrics, *self._collect_job_logs(work_dir)]
+                )
+            if self.mode != "single":
+                self._measure_corpus(metrics, corpus_dir)
+        finally:
+            finished.set()
+            if watcher is not None:
+                watcher.join()
+            if timer is not None:
+                timer.cancel()
+            shutil.rmtree(work_dir, ignore_errors=True)
+            if self.coverage is None:
+                shutil.rmtree(corpus_dir, ignore_errors=True)
+            else:
+                self._discard_corpus()
+                self._corpus_dir = corpus_dir
+
+        if killed.is_set():
+            metrics.outcome = OUTCOME_KILLED
+            metrics.reason = "Fuzzer did not stop in time"
+        elif (
+            process.returncode != 0
+            and metrics.outcome == OUTCOME_OK
+            and metrics.plateau_at is None
+        ):
+            metrics.outcome = OUTCOME_ERROR
+            metrics.reason = f"Fuzzer exited with {process.returncode}"
+        return metrics
+
+    def measure_coverage(
+        self, harness_filename: str
+    ) -> Optional[CoverageReport]:
+        """
+        Measures the source-based coverage of the last run's corpus.
+
+        The corpus is removed afterwards.
+
+        Args:
+            harness_filename (str): Name of the harness file.
+
+        Returns:
+            Optional[CoverageReport]: The report, or None without a
+            coverage collector, a run, or if the coverage could not be
+            measured.
+        """
+        if self.coverage is None or self._corpus_dir is None:
+            return None
+        try:
+            return self.coverage.collect(
+                harness_filename, self.executable, self._corpus_dir
+            )
+        finally:
+            self._discard_corpus()
+
+    def _discard_corpus(self) -> None:
+        """Removes the corpus kept from the last run, if any."""
+        if self._corpus_dir is not None:
+            shutil.rmtree(self._corpus_dir, ignore_errors=True)
+            self._corpus_dir = None
+
+    def accept(self, metrics: FuzzMetrics) -> bool:
+        """
+        Decides whether a harness is good enough, based on its metrics.
 
+        Args:
+            metrics (FuzzMetrics): Metrics of the harness' run.
+
+        Returns:
+            bool: Whether the run finished cleanly, fast enough and with
+            enough coverage.
+        """
+        if metrics.outcome != OUTCOME_OK:
+            logger.warning(
+                f"Rejecting harness: {metrics.outcome} ({metrics.reason})"
+            )
+            return False
+        if metrics.execs_per_sec < self.min_execs_per_sec:
+            logger.warning(
+                f"Rejecting harness: {metrics.execs_per_sec} exec/s, "
+                f"below {self.min_execs_per_sec}"
+            )
+            return False
+        if metrics.cov < self.min_coverage:
+            logger.warning(
+                f"Rejecting harness: {metrics.cov} edges covered, "
+                f"below {self.min_coverage}"
+            )
+            return False
         return True
+
+    def _fuzzer_options(self) -> List[str]:
+        """
+        Returns the libFuzzer options enforcing the run's limits.
+
+        Returns:
+            List[str]: The options.
+        """
+        options = [
+            f"-rss_limit_mb={self.rss_limit_mb}",
+            "-print_final_stats=1",
+            "-artifact_prefix="
+            + os.path.join(os.path.abspath(self.project_path), ""),
+        ]
+        if self.max_total_time is not None:
+            options.append(f"-max_total_time={self.max_total_time}")
+        if self.runs is not None:
+            options.append(f"-runs={self.runs}")
+        if self.mode == "fork":
+            options.append(f"-fork={self.workers}")
+        elif self.mode == "jobs":
+            options += [f"-jobs={self.workers}", f"-workers={self.workers}"]
+        return options
+
+    def _collect_job_logs(self, work_dir: str) -> List[FuzzMetrics]:
+        """
+        Parses, then removes, the logs of the jobs mode's fuzzers.
+
+        Args:
+            work_dir (str): The run's work directory.
+
+        Returns:
+            List[FuzzMetrics]: The metrics of each job.
+        """
+        runs = []
+        for job in range(self.workers):
+            path = os.path.join(work_dir, f"fuzz-{job}.log")
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    run = FuzzMetrics()
+                    for line in f:
+                        parse_output_line(run, line)
+                os.remove(path)
+            except OSError:
+                continue
+            runs.append(run)
+        return runs
+
+    @staticmethod
+    def _measure_corpus(metrics: FuzzMetrics, corpus_dir: str) -> None:
+        """
+        Records the size of the corpus shared by the fuzzers.
+
+        Args:
+            metrics (FuzzMetrics): The metrics to update.
+            corpus_dir (str): The corpus directory.
+        """
+        entries = [e for e in os.scandir(corpus_dir) if e.is_file()]
+        if entries:
+            metrics.corpus_units = len(entries)
+            metrics.corpus_bytes = sum(e.stat().st_size for e in entries)
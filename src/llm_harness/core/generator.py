@@ -20,24 +20,83 @@ Harness generation functionality.
 """
 
 import dspy
+import os
+import json
+import openai
+import hashlib
+import threading
 from loguru import logger
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from llm_harness.models.project import ProjectInfo
+from llm_harness.core.packer import ContextPacker, estimate_tokens
+from llm_harness.core.scheduler import RequestScheduler
+from llm_harness.core.streaming import HarnessExtractor
+from llm_harness.io.cache import DiskCache
+from llm_harness.io.file_manager import HarnessWriter
+from llm_harness.models.coverage import CoverageReport
 from llm_harness.config import Config
 
 
+def _estimate_messages(messages: List[Dict[str, str]]) -> int:
+    """
+    Estimates the number of prompt tokens of a conversation.
+
+    Args:
+        messages (List[Dict[str, str]]): The conversation's messages.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
 class HarnessGenerator:
     """
     Generates a harness for a project using an LLM.
     """
 
-    def __init__(self, model: str):
+    def __init__(
+        self,
+        model: str,
+        cache: Optional[DiskCache] = None,
+        refresh: bool = False,
+        lm_kwargs: Optional[Dict[str, Any]] = None,
+        packer: Optional[ContextPacker] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        stream: bool = False,
+        shared_context: bool = False,
+    ):
         """
         Initialize the harness generator.
 
         Args:
             model (str): The model to be used for LLM.
+            cache (DiskCache, optional): Cache of LLM responses. Responses
+                are neither looked up nor stored if not given.
+            refresh (bool): Ignore cached responses, but still store the new
+                ones.
+            lm_kwargs (Dict[str, Any], optional): Sampling parameters passed
+                to the LM, e.g. `temperature`.
+            packer (ContextPacker, optional): Packs the project's files into
+                a token budget. All files are sent verbatim if not given.
+            scheduler (RequestScheduler, optional): Paces, retries and
+                hedges the LLM requests. Requests are sent once, as soon as
+                they are made, if not given.
+            stream (bool): Stream the responses, extracting the harness as
+                it arrives and dropping the rest of the response once the
+                harness is complete.
+            shared_context (bool): Pack the project's files the same way
+                for every target, so that the prompts of a project's targets
+                share their context as a prefix.
         """
         self.model = model
+        self.cache = cache
+        self.refresh = refresh
+        self.lm_kwargs = lm_kwargs or {}
+        self.packer = packer
+        self.scheduler = scheduler
+        self.stream = stream
+        self.shared_context = shared_context
 
         # Ensure environment variables are loaded
         api_key = Config.load_env()
@@ -46,29 +105,373 @@ class HarnessGenerator:
                 "No API key found. Make sure to set OPENAI_API_KEY in .env file."
             )
 
-    def create_harness(self, project_info: ProjectInfo) -> str:
+    def create_harness(
+        self,
+        project_info: ProjectInfo,
+        target: str = Config.DEFAULT_TARGET,
+        candidate: int = 0,
+        writer: Optional[HarnessWriter] = None,
+    ) -> str:
         """
         Calls the LLM to create a harness for the project.
 
+        Safe to call from several threads at once.
+
         Args:
             project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+            candidate (int): Index of the candidate, when several harnesses
+                are generated from the same prompt. Each candidate's
+                response is cached separately.
+            writer (HarnessWriter, optional): Writer of the harness file.
+                Streamed harnesses are written as they arrive, others once
+                complete.
 
         Returns:
             str: The generated harness code.
         """
         try:
-            lm = dspy.LM(f"openai/{self.model}", cache=False)
-            dspy.configure(lm=lm)
+            prompt = self._project_prompt(project_info, target)
+            return self._respond(
+                [{"role": "user", "content": prompt}],
+                self._cache_key(prompt, candidate),
+                writer,
+            )
+        except Exception as e:
+            logger.error(f"Error creating harness: {e}")
+            raise
+
+    def repair_harness(
+        self,
+        project_info: ProjectInfo,
+        target: str,
+        build_errors: List[Tuple[str, str]],
+        candidate: int = 0,
+        writer: Optional[HarnessWriter] = None,
+    ) -> str:
+        """
+        Calls the LLM to fix a harness that fails to build.
+
+        The request continues the conversation that generated the harness:
+        the project's prompt comes first and unchanged, followed by each
+        failed harness and its errors. Every request of the conversation
+        thus starts with the same prefix, which the provider's prompt cache
+        serves, so a repair round costs little more than the harness and
+        its errors.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+            build_errors (List[Tuple[str, str]]): The harnesses that failed
+                to build so far, oldest first, each with its compiler
+                errors.
+            candidate (int): Index of the candidate.
+            writer (HarnessWriter, optional): Writer of the harness file.
+
+        Returns:
+            str: The repaired harness code.
+        """
+        try:
+            return self._continue(
+                project_info,
+                target,
+                [
+                    (harness, self._repair_prompt(errors))
+                    for harness, errors in build_errors
+                ],
+                candidate,
+                writer,
+            )
+        except Exception as e:
+            logger.error(f"Error repairing harness: {e}")
+            raise
+
+    def refine_harness(
+        self,
+        project_info: ProjectInfo,
+        target: str,
+        harness: str,
+        coverage: CoverageReport,
+        candidate: int = 0,
+        writer: Optional[HarnessWriter] = None,
+        build_errors: Sequence[Tuple[str, str]] = (),
+    ) -> str:
+        """
+        Calls the LLM to improve a harness, given the code it never reached.
+
+        Like a repair, the request continues the conversation that
+        generated the harness, so that the project's prompt is served from
+        the provider's prompt cache.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+            harness (str): The harness to improve.
+            coverage (CoverageReport): Coverage of the harness' corpus.
+            candidate (int): Index of the candidate.
+            writer (HarnessWriter, optional): Writer of the harness file.
+            build_errors (Sequence[Tuple[str, str]]): The improved harnesses
+                that failed to build so far, each with its compiler errors,
+                to be repaired.
+
+        Returns:
+            str: The improved harness code.
+        """
+        try:
+            return self._continue(
+                project_info,
+                target,
+                [
+                    (harness, self._refine_prompt(coverage, target)),
+                    *(
+                        (failed, self._repair_prompt(errors))
+                        for failed, errors in build_errors
+                    ),
+                ],
+                candidate,
+                writer,
+            )
+        except Exception as e:
+            logger.error(f"Error refining harness: {e}")
+            raise
+
+    def _continue(
+        self,
+        project_info: ProjectInfo,
+        target: str,
+        turns: List[Tuple[str, str]],
+        candidate: int = 0,
+        writer: Optional[HarnessWriter] = None,
+    ) -> str:
+        """
+        Continues the conversation that generated a harness.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+            turns (List[Tuple[str, str]]): Each harness of the conversation,
+                with the request that followed it.
+            candidate (int): Index of the candidate.
+            writer (HarnessWriter, optional): Writer of the harness file.
+
+        Returns:
+            str: The LLM's response to the last request.
+        """
+        messages = [
+            {
+                "role": "user",
+                "content": self._project_prompt(project_info, target),
+            }
+        ]
+        for harness, request in turns:
+            messages.append({"role": "assistant", "content": harness})
+            messages.append({"role": "user", "content": request})
+        return self._respond(
+            messages,
+            self._cache_key(json.dumps(messages), candidate),
+            writer,
+        )
+
+    def _respond(
+        self,
+        messages: List[Dict[str, str]],
+        key: str,
+        writer: Optional[HarnessWriter] = None,
+    ) -> str:
+        """
+        Gets the LLM's response to a conversation, from the cache if there.
+
+        Args:
+            messages (List[Dict[str, str]]): The conversation's messages.
+            key (str): Cache key of the response.
+            writer (HarnessWriter, optional): Writer of the harness file.
+
+        Returns:
+            str: The response.
+        """
+        if self.cache is not None and not self.refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info("Using cached LLM response")
+                response = cached.decode("utf-8")
+                if writer is not None:
+                    writer.write(response)
+                return response
+
+        if self.stream:
+            response = self._stream(messages, writer)
+            if self.cache is not None:
+                self.cache.put(key, response.encode("utf-8"))
+            return response
+
+        if self.scheduler is None:
+            lm = dspy.LM(f"openai/{self.model}", cache=False, **self.lm_kwargs)
+        else:
+            # Retries are left to the scheduler
+            lm = dspy.LM(
+                f"openai/{self.model}",
+                cache=False,
+                num_retries=0,
+                timeout=self.scheduler.timeout,
+                **self.lm_kwargs,
+            )
+
+        def request() -> str:
+            # Unlike `dspy.configure`, which only the first thread to call
+            # it may call, the context is local to the calling thread
+            with dspy.context(lm=lm):
+                return str(lm(messages=messages)[0])
+
+        if self.scheduler is None:
+            response = request()
+        else:
+            response = self.scheduler.call(
+                request, tokens=_estimate_messages(messages)
+            )
+
+        if self.cache is not None:
+            self.cache.put(key, response.encode("utf-8"))
+
+        if writer is not None:
+            writer.write(response)
+        return response
 
+    def _stream(
+        self,
+        messages: List[Dict[str, str]],
+        writer: Optional[HarnessWriter] = None,
+    ) -> str:
+        """
+        Streams the LLM's response, extracting the harness as it arrives.
+
+        Markdown fences and chatter around the harness are dropped. The
+        connection is closed as soon as the harness is complete, so the
+        rest of the response is neither waited for nor paid for.
+
+        Args:
+            messages (List[Dict[str, str]]): The conversation's messages.
+            writer (HarnessWriter, optional): Writer of the harness file.
+
+        Returns:
+            str: The extracted harness code.
+        """
+        kwargs = dict(self.lm_kwargs)
+        # The same endpoint as the non-streaming requests, which go through
+        # litellm's OpenAI provider
+        client = openai.OpenAI(
+            api_key=kwargs.pop("api_key", None),
+            base_url=kwargs.pop("api_base", None)
+            or os.environ.get("OPENAI_API_BASE"),
+        )
+        if self.scheduler is not None:
+            # Retries are left to the scheduler
+            client = client.with_options(
+                max_retries=0, timeout=self.scheduler.timeout
+            )
+
+        lock = threading.Lock()
+        attempts = [0]
+
+        def request() -> str:
+            # A retry starts the harness over. An attempt that timed out may
+            # still be streaming, so only the latest one writes
+            with lock:
+                attempts[0] += 1
+                attempt = attempts[0]
+                if writer is not None:
+                    writer.reset()
+
+            extractor = HarnessExtractor()
+            try:
+                response = client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,  # type: ignore[arg-type]
+                    stream=True,
+                    **kwargs,
+                )
+                assert isinstance(response, openai.Stream)
+                # Leaving the block closes the connection, aborting the
+                # response if it was not read to the end
+                with response:
+                    for chunk in response:
+                        if not chunk.choices:
+                            continue
+                        code = extractor.feed(
+                            chunk.choices[0].delta.content or ""
+                        )
+                        with lock:
+                            if attempt != attempts[0]:
+                                break
+                            if writer is not None:
+                                writer.write(code)
+                        if extractor.complete:
+                            logger.info("Harness complete, closing the stream")
+                            break
+                    else:
+                        code = extractor.finish()
+                        with lock:
+                            if writer is not None and attempt == attempts[0]:
+                                writer.write(code)
+            # The scheduler retries the standard errors
+            except openai.APITimeoutError as e:
+                raise TimeoutError(str(e)) from e
+            except openai.APIConnectionError as e:
+                raise ConnectionError(str(e)) from e
+            return extractor.text
+
+        if self.scheduler is None:
+            return request()
+        # Two attempts at once would write over each other
+        return self.scheduler.call(
+            request, tokens=_estimate_messages(messages), hedge=False
+        )
+
+    def _project_prompt(self, project_info: ProjectInfo, target: str) -> str:
+        """
+        Assembles the harness generation prompt of a project.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (str): Name of the function to be fuzzed.
+
+        Returns:
+            str: The prompt, with the project's files packed into the token
+            budget if there is one.
+        """
+        if self.packer is not None:
+            concatenated_content = self.packer.pack(
+                project_info, None if self.shared_context else target
+            ).text
+        else:
             concatenated_content = project_info.get_concatenated_content()
+        return self._build_prompt(concatenated_content, target)
+
+    def _build_prompt(self, concatenated_content: str, target: str) -> str:
+        """
+        Assembles the harness generation prompt.
+
+        The instructions and the project's source code, which are the same
+        for every target of a project, come first, and the target last.
+        Requests for several targets thus share all but the end of their
+        prompt, which the provider's prompt cache serves after the first.
 
-            response = lm(
-                f"""
+        Changes to the prompt's wording must be accompanied by a bump of
+        `Config.PROMPT_VERSION`.
+
+        Args:
+            concatenated_content (str): The project's source code.
+            target (str): Name of the function to be fuzzed.
+
+        Returns:
+            str: The prompt to be sent to the LLM.
+        """
+        return f"""
                 I have this C project, for which you will find the contents
-                below. Write me a fuzzing harness for the dateparse function.
-                Respond **only** with the harness' code. Make sure to write all
-                the necessary includes etc. The harness will be located in the
-                project root, so make sure the includes work appropriately.
+                below. I will ask you to write a fuzzing harness for one of
+                its functions. Respond **only** with the harness' code. Make
+                sure to write all the necessary includes etc. The harness
+                will be located in the project root, so make sure the
+                includes work appropriately.
 
                 Do not even wrap the code in markdown fences, e.g. ```, because
                 it will be automatically written to a .c file.
@@ -76,10 +479,76 @@ class HarnessGenerator:
                 === Source Code ===
 
                 {concatenated_content}
+
+                === Task ===
+
+                Write me a fuzzing harness for the {target} function.
                 """
-            )
 
-            return str(response[0])
-        except Exception as e:
-            logger.error(f"Error creating harness: {e}")
-            raise
+    def _repair_prompt(self, errors: str) -> str:
+        """
+        Assembles the request to fix a harness that fails to build.
+
+        Args:
+            errors (str): The harness' trimmed compiler errors.
+
+        Returns:
+            str: The prompt to be sent to the LLM, after the harness.
+        """
+        return f"""
+                This harness fails to compile, with these errors:
+
+                {errors}
+
+                Fix the harness. Respond **only** with the complete fixed
+                harness' code, without markdown fences.
+                """
+
+    def _refine_prompt(self, coverage: CoverageReport, target: str) -> str:
+        """
+        Assembles the request to improve a harness' coverage.
+
+        Args:
+            coverage (CoverageReport): Coverage of the harness' corpus.
+            target (str): Name of the function to be fuzzed.
+
+        Returns:
+            str: The prompt to be sent to the LLM, after the harness.
+        """
+        return f"""
+                After fuzzing with this harness, its corpus covers the
+                project as follows. The code listed was never reached, or
+                its branches only ever went one way, nearest to the {target}
+                function first:
+
+                {coverage.summary()}
+
+                Improve the harness so that the fuzzer reaches this code,
+                e.g. by using the input to choose between more of the
+                project's API, or by setting up the state the code depends
+                on. Respond **only** with the complete improved harness'
+                code, without markdown fences.
+                """
+
+    def _cache_key(self, prompt: str, candidate: int = 0) -> str:
+        """
+        Derives the response cache key of a prompt.
+
+        Args:
+            prompt (str): The prompt to be sent to the LLM.
+            candidate (int): Index of the candidate.
+
+        Returns:
+            str: Key identifying the model, prompt, sampling parameters and
+            candidate.
+        """
+        parts: List[Any] = [
+            self.model,
+            Config.PROMPT_VERSION,
+            hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            self.lm_kwargs,
+        ]
+        # The first candidate shares the key of single harness runs
+        if candidate:
+            parts.append(candidate)
+        return DiskCache.make_key(*parts)
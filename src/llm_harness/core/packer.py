@@ -0,0 +1,267 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Token-budgeted packing of project files into prompt context.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from loguru import logger
+from llm_harness.core.csource import mask_source
+from llm_harness.models.project import ProjectFile, ProjectInfo
+from llm_harness.config import Config
+
+HEADER_EXTENSIONS = (".h", ".hh", ".hpp", ".hxx")
+SOURCE_EXTENSIONS = (".c", ".cc", ".cpp", ".cxx")
+
+TRUNCATION_MARKER = "\n/* ... truncated ... */\n"
+SUMMARY_MARKER = "/* Summary: function bodies omitted */\n"
+
+INCLUDE_REGEX = re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a text.
+
+    Uses the common approximation of four characters per token, which
+    needs no tokenizer and is close enough for budgeting source code.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return (len(text) + Config.CHARS_PER_TOKEN - 1) // Config.CHARS_PER_TOKEN
+
+
+def summarize_source(content: str) -> str:
+    """
+    Reduces C/C++ source code to its top-level declarations.
+
+    Function bodies are replaced with `{ ... }`, while the bodies of
+    structs, unions, enums and typedefs are kept, as they describe types the
+    harness may need. Braces in comments, literals and directives are not
+    counted.
+
+    Args:
+        content (str): The source code.
+
+    Returns:
+        str: The summarized source code.
+    """
+    lines = []
+    depth = 0
+    skipping = False
+
+    masked_lines = mask_source(content, preprocessor=True).split("\n")
+    for line, masked in zip(content.split("\n"), masked_lines):
+        stripped = line.strip()
+        opens, closes = masked.count("{"), masked.count("}")
+
+        if skipping:
+            depth += opens - closes
+            if depth <= 0:
+                depth = 0
+                skipping = False
+            continue
+
+        if depth == 0 and opens > closes:
+            is_type = re.match(
+                r"(typedef|struct|union|enum|class|namespace|extern)\b",
+                stripped,
+            )
+            if not is_type:
+                lines.append(line[: masked.index("{")].rstrip() + " { ... }")
+                depth = opens - closes
+                skipping = True
+                continue
+
+        depth = max(0, depth + opens - closes)
+        if stripped:
+            lines.append(line)
+
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class PackedContext:
+    """The packed prompt context, along with a report of its contents."""
+
+    text: str
+    tokens_per_file: Dict[str, int] = field(default_factory=dict)
+    summarized: List[str] = field(default_factory=list)
+    truncated: List[str] = field(default_factory=list)
+    omitted: List[str] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated number of tokens of the packed context."""
+        return sum(self.tokens_per_file.values())
+
+
+class ContextPacker:
+    """
+    Packs project files into a prompt context that fits a token budget.
+
+    Files are ranked by relevance to the target: headers first, then the
+    files defining the target, then their dependencies and the rest of the
+    sources. Files that do not fit whole are summarized, or truncated if
+    even their summary does not fit.
+    """
+
+    def __init__(self, token_budget: int = Config.DEFAULT_TOKEN_BUDGET):
+        """
+        Initialize the packer.
+
+        Args:
+            token_budget (int): Maximum number of tokens of the context.
+        """
+        self.token_budget = token_budget
+
+    def pack(
+        self, project_info: ProjectInfo, target: Optional[str] = None
+    ) -> PackedContext:
+        """
+        Packs the project's files into the token budget.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+            target (str, optional): Name of the function to be fuzzed.
+
+        Returns:
+            PackedContext: The context and how much each file contributed.
+        """
+        packed = PackedContext(text="")
+        parts = []
+        remaining = self.token_budget
+
+        for file in self._rank(project_info.files, target):
+            header = f"\n>>>> {file.name}\n"
+            cost = estimate_tokens(header)
+
+            content = file.content
+            if cost + estimate_tokens(content) > remaining:
+                content = SUMMARY_MARKER + summarize_source(content)
+                if cost + estimate_tokens(content) <= remaining:
+                    packed.summarized.append(file.path)
+                else:
+                    content = self._truncate(content, remaining - cost)
+                    if not content:
+                        packed.omitted.append(file.path)
+                        packed.tokens_per_file[file.path] = 0
+                        continue
+                    packed.truncated.append(file.path)
+
+            tokens = cost + estimate_tokens(content)
+            parts.append(header)
+            parts.append(content)
+            packed.tokens_per_file[file.path] = tokens
+            remaining -= tokens
+
+        packed.text = "".join(parts)
+        self._report(packed)
+        return packed
+
+    def _rank(
+        self, files: List[ProjectFile], target: Optional[str]
+    ) -> List[ProjectFile]:
+        """
+        Orders the files by relevance to the target.
+
+        Args:
+            files (List[ProjectFile]): The project's files.
+            target (str, optional): Name of the function to be fuzzed.
+
+        Returns:
+            List[ProjectFile]: The files, most relevant first. The original
+            order is kept within each rank.
+        """
+        defines: Set[str] = set()
+        dependencies: Set[str] = set()
+
+        if target:
+            definition = re.compile(
+                rf"\b{re.escape(target)}\s*\([^;{{}}]*\)\s*\{{"
+            )
+            mention = re.compile(rf"\b{re.escape(target)}\b")
+            for file in files:
+                if definition.search(file.content):
+                    defines.add(file.path)
+                    dependencies.update(
+                        os.path.basename(include)
+                        for include in INCLUDE_REGEX.findall(file.content)
+                    )
+                elif mention.search(file.content):
+                    dependencies.add(file.name)
+
+        def rank(file: ProjectFile) -> int:
+            if file.name.endswith(HEADER_EXTENSIONS):
+                return 0
+            if file.path in defines:
+                return 1
+            if file.name in dependencies:
+                return 2
+            if file.name.endswith(SOURCE_EXTENSIONS):
+                return 3
+            return 4
+
+        return sorted(files, key=rank)
+
+    @staticmethod
+    def _truncate(content: str, budget: int) -> str:
+        """
+        Truncates content to a token budget.
+
+        Args:
+            content (str): The content to truncate.
+            budget (int): Number of tokens available.
+
+        Returns:
+            str: The truncated content, or an empty string if the budget is
+            too small to hold anything useful.
+        """
+        available = budget - estimate_tokens(TRUNCATION_MARKER)
+        if available < Config.MIN_TRUNCATED_TOKENS:
+            return ""
+
+        content = content[: available * Config.CHARS_PER_TOKEN]
+        # Cut at a line boundary, so that no statement is split midway
+        if "\n" in content:
+            content = content[: content.rindex("\n") + 1]
+        return content + TRUNCATION_MARKER
+
+    def _report(self, packed: PackedContext) -> None:
+        """
+        Logs how many tokens each file contributed.
+
+        Args:
+            packed (PackedContext): The packed context.
+        """
+        logger.info(
+            f"Packed {len(packed.tokens_per_file)} files into "
+            f"{packed.total_tokens}/{self.token_budget} tokens "
+            f"({len(packed.summarized)} summarized, "
+            f"{len(packed.truncated)} truncated, "
+            f"{len(packed.omitted)} omitted)"
+        )
+        for path, tokens in packed.tokens_per_file.items():
+            logger.debug(f"{tokens:>8} tokens: {path}")
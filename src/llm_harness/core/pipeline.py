@@ -0,0 +1,306 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Construction of the pipeline's stages from the command-line arguments.
+"""
+
+import os
+from dataclasses import replace
+from loguru import logger
+from typing import List, Optional
+from llm_harness.cli import Arguments
+from llm_harness.config import Config
+from llm_harness.core.analyzer import ProjectAnalyzer
+from llm_harness.core.builder import HarnessBuilder
+from llm_harness.core.compilation import CompilationCache
+from llm_harness.core.compressor import PromptCompressor
+from llm_harness.core.coverage import CoverageCollector, call_distances
+from llm_harness.core.evaluator import HarnessEvaluator
+from llm_harness.core.generator import HarnessGenerator
+from llm_harness.core.packer import ContextPacker
+from llm_harness.core.scheduler import RequestScheduler
+from llm_harness.core.targets import rank_targets
+from llm_harness.io.cache import DiskCache
+from llm_harness.io.walker import ProjectTree
+from llm_harness.models.project import ProjectInfo
+
+
+def discover_targets(
+    args: Arguments, analyzer: ProjectAnalyzer, project_info: ProjectInfo
+) -> List[str]:
+    """
+    Picks the functions most worth fuzzing, before any LLM call.
+
+    Args:
+        args (Arguments): The command-line arguments.
+        analyzer (ProjectAnalyzer): The project's analyzer.
+        project_info (ProjectInfo): The whole project's information.
+
+    Returns:
+        List[str]: The names of the `--discover` best targets, best first.
+    """
+    index = analyzer.build_symbol_index(project_info)
+    targets = rank_targets(index, args.discover)
+    logger.info(f"Discovered {len(targets)} targets:")
+    for target in targets:
+        logger.info(f"  {target}")
+    return [target.name for target in targets]
+
+
+def select_context(
+    args: Arguments,
+    analyzer: ProjectAnalyzer,
+    project_info: ProjectInfo,
+    targets: Optional[List[str]] = None,
+) -> ProjectInfo:
+    """
+    Selects the part of the project sent to the LLM.
+
+    Args:
+        args (Arguments): The command-line arguments.
+        analyzer (ProjectAnalyzer): The project's analyzer.
+        project_info (ProjectInfo): The whole project's information.
+        targets (List[str], optional): Functions the context is shared by,
+            if not only `--target`. The context serves all of them.
+
+    Returns:
+        ProjectInfo: The context, as chosen by `--context` and `--compress`.
+    """
+    targets = targets or [args.target]
+    names = ", ".join(targets)
+    if args.context == "symbols":
+        index = analyzer.build_symbol_index(project_info)
+        found = [target for target in targets if index.lookup(target)]
+        if found:
+            project_info = index.context_for(found)
+        else:
+            logger.warning(
+                f"Target {names} not found in the symbol index. "
+                "Sending the whole project."
+            )
+    elif args.context == "retrieval":
+        retrieval_index = analyzer.build_retrieval_index(project_info)
+        retrieved = retrieval_index.context_for(
+            f"{' '.join(targets)} {args.query}", args.top_k
+        )
+        if retrieved.files:
+            project_info = retrieved
+        else:
+            logger.warning(
+                f"Nothing relevant to {names} was retrieved. "
+                "Sending the whole project."
+            )
+
+    if args.compress:
+        compressor = PromptCompressor(signatures_only=args.signatures_only)
+        project_info = compressor.compress(project_info, targets).project_info
+    return project_info
+
+
+def create_scheduler(args: Arguments) -> RequestScheduler:
+    """
+    Creates the scheduler of LLM requests.
+
+    Args:
+        args (Arguments): The command-line arguments.
+
+    Returns:
+        RequestScheduler: The scheduler.
+    """
+    return RequestScheduler(
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        timeout=args.llm_timeout,
+        concurrency=args.llm_concurrency,
+        max_retries=args.llm_retries,
+        hedge=args.hedge,
+    )
+
+
+def create_generator(
+    args: Arguments, scheduler: Optional[RequestScheduler] = None
+) -> HarnessGenerator:
+    """
+    Creates the harness generator.
+
+    Args:
+        args (Arguments): The command-line arguments.
+        scheduler (RequestScheduler, optional): Scheduler of the LLM
+            requests, shared with the other generators.
+
+    Returns:
+        HarnessGenerator: The generator.
+    """
+    cache = (
+        DiskCache(os.path.join(Config.CACHE_DIR, "responses"))
+        if args.use_cache
+        else None
+    )
+    packer = (
+        ContextPacker(args.token_budget)
+        if args.token_budget is not None
+        else None
+    )
+    return HarnessGenerator(
+        model=args.model,
+        cache=cache,
+        refresh=args.refresh_cache,
+        # Candidates sampled at the default temperature would barely differ
+        lm_kwargs=(
+            {"temperature": Config.CANDIDATE_TEMPERATURE}
+            if args.candidates > 1
+            else None
+        ),
+        packer=packer,
+        scheduler=scheduler,
+        stream=args.stream,
+        shared_context=len(args.targets) > 1,
+    )
+
+
+def create_generators(
+    args: Arguments, scheduler: Optional[RequestScheduler] = None
+) -> List[HarnessGenerator]:
+    """
+    Creates the generators of each tier of the model cascade.
+
+    Args:
+        args (Arguments): The command-line arguments.
+        scheduler (RequestScheduler, optional): Scheduler of the LLM
+            requests, shared by the generators.
+
+    Returns:
+        List[HarnessGenerator]: One generator per model of `--cascade`, or
+        only the one of `--model` without a cascade.
+    """
+    return [
+        create_generator(replace(args, model=model), scheduler)
+        for model in args.cascade or [args.model]
+    ]
+
+
+def create_builder(
+    args: Arguments,
+    tree: ProjectTree,
+    jobs: Optional[int] = None,
+    coverage: bool = False,
+) -> HarnessBuilder:
+    """
+    Creates the harness builder.
+
+    Args:
+        args (Arguments): The command-line arguments.
+        tree (ProjectTree): Listing of the project's files.
+        jobs (int, optional): Number of sources compiled in parallel, if
+            not `--jobs`.
+        coverage (bool): Build with the coverage instrumentation instead
+            of the fuzzing one, without the shared compilation cache.
+
+    Returns:
+        HarnessBuilder: The builder.
+    """
+    # Shared objects keep the directory of the checkout that compiled them
+    # in their coverage mapping, so llvm-cov would report their files
+    # outside the project. Coverage builds compile the project's own.
+    compilation_cache = (
+        CompilationCache(
+            DiskCache(
+                os.path.join(Config.CACHE_DIR, "objects"),
+                max_bytes=Config.COMPILATION_CACHE_MAX_BYTES,
+            )
+        )
+        if args.use_compilation_cache and not coverage
+        else None
+    )
+    return HarnessBuilder(
+        args.project_path,
+        tree=tree,
+        jobs=args.jobs or jobs,
+        compilation_cache=compilation_cache,
+        cflags=Config.COVERAGE_CFLAGS if coverage else None,
+        objects_dir=(
+            Config.COVERAGE_OBJECTS_DIR if coverage else Config.OBJECTS_DIR
+        ),
+    )
+
+
+def create_coverage(
+    args: Arguments,
+    analyzer: ProjectAnalyzer,
+    project_info: ProjectInfo,
+    tree: ProjectTree,
+    jobs: Optional[int] = None,
+) -> Optional[CoverageCollector]:
+    """
+    Creates the collector of the harnesses' coverage, if it is needed.
+
+    Args:
+        args (Arguments): The command-line arguments.
+        analyzer (ProjectAnalyzer): The project's analyzer.
+        project_info (ProjectInfo): The whole project's information.
+        tree (ProjectTree): Listing of the project's files.
+        jobs (int, optional): Number of sources compiled in parallel, if
+            not `--jobs`.
+
+    Returns:
+        Optional[CoverageCollector]: The collector, ranking the code nearest
+        to the target first, or None without `--refine`.
+    """
+    if args.refine_rounds <= 0:
+        return None
+    distances = call_distances(
+        analyzer.build_symbol_index(project_info), args.target
+    )
+    return CoverageCollector(
+        create_builder(args, tree, jobs, coverage=True), distances
+    )
+
+
+def create_evaluator(
+    args: Arguments,
+    executable: str,
+    coverage: Optional[CoverageCollector] = None,
+    concurrency: int = 1,
+) -> HarnessEvaluator:
+    """
+    Creates the evaluator of a harness executable.
+
+    Args:
+        args (Arguments): The command-line arguments.
+        executable (str): Name of the harness executable.
+        coverage (CoverageCollector, optional): Measures the coverage of
+            the harness' corpus.
+        concurrency (int): Number of evaluations running at once, which
+            share the CPUs.
+
+    Returns:
+        HarnessEvaluator: The evaluator.
+    """
+    return HarnessEvaluator(
+        args.project_path,
+        max_total_time=args.fuzz_time,
+        runs=args.fuzz_runs,
+        rss_limit_mb=args.rss_limit_mb,
+        mode=args.fuzz_mode,
+        workers=args.fuzz_workers,
+        concurrency=concurrency,
+        plateau_window=args.plateau_window,
+        plateau_min_rate=args.plateau_rate,
+        executable=executable,
+        coverage=coverage,
+    )
@@ -0,0 +1,116 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Repair of harnesses that fail to build.
+"""
+
+import re
+import time
+from typing import List, Set, Tuple
+from loguru import logger
+from llm_harness.config import Config
+from llm_harness.models.build import Diagnostic
+from llm_harness.models.candidate import Candidate
+
+# Prefix of the output of a failed build, e.g. `Error 1: `
+BUILD_ERROR_REGEX = re.compile(r"^Error -?\d+: ")
+
+
+def trim_diagnostics(
+    build_output: str,
+    harness: str,
+    max_diagnostics: int = Config.REPAIR_MAX_DIAGNOSTICS,
+    max_lines: int = Config.REPAIR_MAX_OUTPUT_LINES,
+) -> str:
+    """
+    Reduces the output of a failed build to what a repair needs.
+
+    Only errors are kept, without repetitions, each followed by the line of
+    the harness it points at. Warnings, notes and code excerpts are
+    dropped, as they would only lengthen the repair prompt. Output without
+    any parsable error, e.g. a linker's, is cut to its last lines instead.
+
+    Args:
+        build_output (str): Output of the failed build.
+        harness (str): The harness' code.
+        max_diagnostics (int): Maximum number of errors kept.
+        max_lines (int): Maximum number of lines of unparsable output kept.
+
+    Returns:
+        str: The trimmed errors.
+    """
+    output = BUILD_ERROR_REGEX.sub("", build_output.strip())
+    harness_lines = harness.splitlines()
+
+    errors: List[str] = []
+    seen: Set[Tuple[int, str]] = set()
+    for diagnostic in Diagnostic.parse(output):
+        key = (diagnostic.line, diagnostic.message)
+        if not diagnostic.is_error or key in seen:
+            continue
+        seen.add(key)
+        errors.append(str(diagnostic))
+        if diagnostic.file.startswith(
+            Config.HARNESS_DIR
+        ) and 0 < diagnostic.line <= len(harness_lines):
+            errors.append(f"    {harness_lines[diagnostic.line - 1].strip()}")
+        if len(seen) == max_diagnostics:
+            break
+
+    if not errors:
+        return "\n".join(output.splitlines()[-max_lines:])
+    return "\n".join(errors)
+
+
+def prepare_repair(
+    candidate: Candidate,
+    attempts: int = Config.REPAIR_ATTEMPTS,
+    time_budget: float = Config.REPAIR_TIME_BUDGET,
+) -> bool:
+    """
+    Records a candidate's failed build, if it is to be repaired.
+
+    Args:
+        candidate (Candidate): The candidate, after a failed build.
+        attempts (int): Maximum number of repair rounds.
+        time_budget (float): Seconds the rounds may take in all, counted
+            from the first failed build.
+
+    Returns:
+        bool: Whether the candidate is to be repaired, i.e. it has rounds
+        and time left.
+    """
+    now = time.monotonic()
+    if not candidate.build_errors:
+        candidate.repair_started = now
+    if candidate.repairs >= attempts:
+        return False
+    if now - candidate.repair_started >= time_budget:
+        logger.info(
+            f"{candidate.harness_filename}: out of time for repairs after "
+            f"{candidate.repairs} rounds"
+        )
+        return False
+
+    errors = trim_diagnostics(candidate.build_output, candidate.harness)
+    candidate.build_errors.append((candidate.harness, errors))
+    logger.info(
+        f"{candidate.harness_filename} failed to build, repairing it "
+        f"(round {candidate.repairs} of {attempts})"
+    )
+    return True
@@ -0,0 +1,344 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+BM25 retrieval of source code chunks.
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+from loguru import logger
+from llm_harness.core.csource import C_EXTENSIONS
+from llm_harness.core.symbols import KEYWORDS, parse_symbols
+from llm_harness.models.project import ProjectFile, ProjectInfo
+from llm_harness.config import Config
+
+# Version of the saved index format. Saved indexes of other versions are
+# rebuilt.
+INDEX_VERSION = 1
+
+WORD_REGEX = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Parts of an identifier: `parseHTTPHeader_v2` -> parse, HTTP, Header, v, 2
+SUBWORD_REGEX = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+|[a-z]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into search terms.
+
+    Identifiers are kept whole and also split into their snake_case and
+    camelCase parts, so that `parse_date` matches queries for `date`.
+    Terms are lowercased and C/C++ keywords are left out.
+
+    Args:
+        text (str): Source code or a query.
+
+    Returns:
+        List[str]: The terms, with repetitions.
+    """
+    terms = []
+    for word in WORD_REGEX.findall(text):
+        if word in KEYWORDS:
+            continue
+        terms.append(word.lower())
+        parts = SUBWORD_REGEX.findall(word)
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts if len(part) > 1)
+    return terms
+
+
+@dataclass
+class Chunk:
+    """A function-sized piece of a project file."""
+
+    path: str
+    line: int
+    text: str
+    name: str = ""
+    terms: Dict[str, int] = field(default_factory=dict)
+
+
+def chunk_file(
+    file: ProjectFile, lines_per_chunk: int = Config.CHUNK_LINES
+) -> List[Chunk]:
+    """
+    Splits a file into chunks.
+
+    C/C++ files are split into their top-level functions and type
+    declarations. Other files, and C/C++ files without any, are split into
+    windows of consecutive lines.
+
+    Args:
+        file (ProjectFile): The file.
+        lines_per_chunk (int): Number of lines of each window.
+
+    Returns:
+        List[Chunk]: The file's chunks, with their term counts.
+    """
+    chunks = []
+    if file.name.endswith(C_EXTENSIONS):
+        seen = set()
+        for symbol in parse_symbols(file):
+            # A typedef'd struct is found under both of its names
+            if symbol.line in seen:
+                continue
+            seen.add(symbol.line)
+            chunks.append(
+                Chunk(
+                    path=file.path,
+                    line=symbol.line,
+                    text=symbol.text,
+                    name=symbol.name,
+                )
+            )
+
+    if not chunks:
+        lines = file.content.splitlines()
+        for i in range(0, len(lines), lines_per_chunk):
+            text = "\n".join(lines[i : i + lines_per_chunk]).strip()
+            if text:
+                chunks.append(Chunk(path=file.path, line=i + 1, text=text))
+
+    # The name is counted once more, so that a chunk defining a symbol
+    # outranks the ones merely using it
+    for chunk in chunks:
+        chunk.terms = dict(Counter(tokenize(f"{chunk.name} {chunk.text}")))
+    return chunks
+
+
+class RetrievalIndex:
+    """
+    BM25 index over function-sized chunks of a project's files.
+
+    The index is lexical, so it works offline and needs no embedding
+    model. Postings are kept in memory, so a search only visits the chunks
+    sharing a term with the query.
+    """
+
+    def __init__(
+        self,
+        k1: float = Config.BM25_K1,
+        b: float = Config.BM25_B,
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        # Chunks of each indexed file, along with the file's digest
+        self.files: Dict[str, Tuple[str, List[Chunk]]] = {}
+        self._chunks: List[Chunk] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        self._average_length = 0.0
+
+    @property
+    def chunks(self) -> List[Chunk]:
+        """All indexed chunks."""
+        return self._chunks
+
+    def update(self, project_info: ProjectInfo) -> int:
+        """
+        Brings the index up to date with the project's files.
+
+        Only files whose digest changed are chunked again. Files no longer
+        in the project are dropped.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+
+        Returns:
+            int: Number of files added, changed or dropped.
+        """
+        files: Dict[str, Tuple[str, List[Chunk]]] = {}
+        changed = 0
+        for file in project_info.files:
+            digest = file.get_digest()
+            indexed = self.files.get(file.path)
+            if indexed is not None and indexed[0] == digest:
+                files[file.path] = indexed
+            else:
+                files[file.path] = (digest, chunk_file(file))
+                changed += 1
+
+        changed += len(self.files.keys() - files.keys())
+        if changed:
+            self.files = files
+            self._build_postings()
+        return changed
+
+    def search(
+        self, query: str, top_k: int = Config.RETRIEVAL_TOP_K
+    ) -> List[Tuple[float, Chunk]]:
+        """
+        Finds the chunks most relevant to a query.
+
+        Args:
+            query (str): The query, e.g. the target's name and a description
+                of its API.
+            top_k (int): Number of chunks to return.
+
+        Returns:
+            List[Tuple[float, Chunk]]: The best chunks and their scores, best
+            first.
+        """
+        total = len(self._chunks)
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (total - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for chunk_id, frequency in postings:
+                norm = self.k1 * (
+                    1
+                    - self.b
+                    + self.b * self._lengths[chunk_id] / self._average_length
+                )
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * (
+                    frequency * (self.k1 + 1) / (frequency + norm)
+                )
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda s: s[1])
+        return [(score, self._chunks[chunk_id]) for chunk_id, score in best]
+
+    def context_for(
+        self, query: str, top_k: int = Config.RETRIEVAL_TOP_K
+    ) -> ProjectInfo:
+        """
+        Builds a project context from the chunks most relevant to a query.
+
+        Args:
+            query (str): The query.
+            top_k (int): Number of chunks to include.
+
+        Returns:
+            ProjectInfo: One file per source file, holding its retrieved
+            chunks in line order.
+        """
+        results = self.search(query, top_k)
+        snippets: Dict[str, List[Chunk]] = {}
+        for _, chunk in results:
+            snippets.setdefault(chunk.path, []).append(chunk)
+
+        logger.info(
+            f"Retrieved {len(results)} chunks from {len(snippets)} files "
+            f"for {query!r}"
+        )
+        return ProjectInfo(
+            files=[
+                ProjectFile(
+                    path=path,
+                    name=os.path.basename(path),
+                    content="\n\n".join(
+                        chunk.text
+                        for chunk in sorted(chunks, key=lambda c: c.line)
+                    )
+                    + "\n",
+                )
+                for path, chunks in snippets.items()
+            ]
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RetrievalIndex":
+        """
+        Loads a saved index.
+
+        Args:
+            path (str): Path of the saved index.
+
+        Returns:
+            RetrievalIndex: The index, or an empty one if it is missing,
+            unreadable or of another format version.
+        """
+        index = cls()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return index
+
+        if data.get("version") != INDEX_VERSION:
+            return index
+
+        index.files = {
+            file_path: (
+                entry["digest"],
+                [Chunk(**chunk) for chunk in entry["chunks"]],
+            )
+            for file_path, entry in data.get("files", {}).items()
+        }
+        index._build_postings()
+        return index
+
+    def save(self, path: str) -> None:
+        """
+        Saves the index.
+
+        Args:
+            path (str): Path to save the index to.
+        """
+        data: Dict[str, Any] = {
+            "version": INDEX_VERSION,
+            "files": {
+                file_path: {
+                    "digest": digest,
+                    # Shallow, as `asdict` deep-copies every chunk's terms
+                    "chunks": [vars(chunk) for chunk in chunks],
+                }
+                for file_path, (digest, chunks) in self.files.items()
+            },
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                # Faster than json.dump, which encodes piecewise in Python
+                f.write(json.dumps(data))
+        except IOError as e:
+            logger.warning(f"Could not save retrieval index to {path}: {e}")
+
+    def _build_postings(self) -> None:
+        """Rebuilds the inverted index from the files' chunks."""
+        self._chunks = [
+            chunk for _, chunks in self.files.values() for chunk in chunks
+        ]
+        self._postings = {}
+        self._lengths = [sum(chunk.terms.values()) for chunk in self._chunks]
+        for chunk_id, chunk in enumerate(self._chunks):
+            for term, frequency in chunk.terms.items():
+                self._postings.setdefault(term, []).append(
+                    (chunk_id, frequency)
+                )
+
+        self._average_length = (
+            sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        )
@@ -0,0 +1,378 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Scheduling of LLM requests within the provider's rate limits.
+"""
+
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from loguru import logger
+from typing import Callable, Deque, Optional, Set, Tuple, TypeVar
+from llm_harness.config import Config
+
+T = TypeVar("T")
+
+# HTTP statuses of failures worth retrying: rate limits and server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decides whether a failed request is worth retrying.
+
+    Provider errors carry the HTTP status of the response, e.g. litellm's
+    and openai's exceptions as `status_code`.
+
+    Args:
+        error (BaseException): The request's error.
+
+    Returns:
+        bool: Whether the request was rate limited, failed on the server's
+        side or timed out.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUSES
+
+
+class TokenBucket:
+    """
+    Token bucket limiting an amount per minute, e.g. requests or tokens.
+
+    The bucket holds up to a minute's worth, so short bursts are allowed as
+    long as the average stays within the limit.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute (float): The limit, per minute.
+            clock (Callable[[], float]): Monotonic clock, in seconds.
+            sleep (Callable[[float], None]): Sleeps for some seconds.
+        """
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.clock = clock
+        self.sleep = sleep
+        self._level = per_minute
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, amount: float) -> bool:
+        """
+        Takes an amount out of the bucket, if it holds enough.
+
+        Args:
+            amount (float): The amount. Amounts over the capacity are
+                clamped to it, so that they are not refused forever.
+
+        Returns:
+            bool: Whether the amount was taken.
+        """
+        return self._take(amount) == 0
+
+    def release(self, amount: float) -> None:
+        """
+        Puts back an amount taken but not used.
+
+        Args:
+            amount (float): The amount.
+        """
+        with self._lock:
+            self._level = min(
+                self.capacity, self._level + min(amount, self.capacity)
+            )
+
+    def acquire(self, amount: float) -> float:
+        """
+        Takes an amount out of the bucket, waiting until it holds enough.
+
+        Args:
+            amount (float): The amount.
+
+        Returns:
+            float: Seconds waited.
+        """
+        waited = 0.0
+        while True:
+            wait_time = self._take(amount)
+            if wait_time == 0:
+                return waited
+            self.sleep(wait_time)
+            waited += wait_time
+
+    def _take(self, amount: float) -> float:
+        """
+        Takes an amount out of the bucket, if it holds enough.
+
+        Args:
+            amount (float): The amount.
+
+        Returns:
+            float: 0 if the amount was taken, else the seconds until the
+            bucket holds enough.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = self.clock()
+            self._level = min(
+                self.capacity,
+                self._level + (now - self._updated) * self.rate,
+            )
+            self._updated = now
+            if self._level >= amount:
+                self._level -= amount
+                return 0
+            return (amount - self._level) / self.rate
+
+
+class RequestScheduler:
+    """
+    Sends LLM requests within rate limits, retrying and hedging them.
+
+    Requests wait for their share of the requests and tokens per minute.
+    Rate-limited, failed and timed out requests are retried with jittered
+    exponential backoff. Optionally, a request still unanswered past the
+    95th percentile of recent latencies is sent once more, and the first
+    response is kept. One scheduler is meant to be shared by every
+    generator of a process, from any number of threads.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = Config.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = Config.LLM_TOKENS_PER_MINUTE,
+        timeout: float = Config.LLM_TIMEOUT,
+        concurrency: int = Config.LLM_CONCURRENCY,
+        max_retries: int = Config.LLM_MAX_RETRIES,
+        backoff_base: float = Config.LLM_BACKOFF_BASE,
+        backoff_max: float = Config.LLM_BACKOFF_MAX,
+        hedge: bool = False,
+        hedge_quantile: float = Config.LLM_HEDGE_QUANTILE,
+        hedge_min_samples: int = Config.LLM_HEDGE_MIN_SAMPLES,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_minute (float): Limit of requests per minute.
+            tokens_per_minute (float): Limit of prompt tokens per minute.
+            timeout (float): Seconds to wait for a response once the
+                request is sent, before it is considered failed.
+            concurrency (int): Maximum number of requests in flight, not
+                counting hedged duplicates. Requests that time out count
+                until they return.
+            max_retries (int): Number of retries of a failed request.
+            backoff_base (float): Upper bound of the first retry's delay, in
+                seconds. It doubles with every retry.
+            backoff_max (float): Upper bound of any retry's delay.
+            hedge (bool): Send a duplicate of slow requests.
+            hedge_quantile (float): Quantile of recent latencies past which
+                a request is considered slow.
+            hedge_min_samples (int): Number of latencies observed before
+                requests are hedged.
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        # Requests that time out keep their thread until they return, so
+        # new requests queue for a thread rather than pile up on the
+        # provider. Hedged duplicates get threads of their own.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, concurrency) * (2 if hedge else 1),
+            thread_name_prefix="llm",
+        )
+        self._latencies: Deque[float] = deque(maxlen=100)
+        self._lock = threading.Lock()
+        self.hedged = 0
+        self.retried = 0
+
+    def call(
+        self, request: Callable[[], T], tokens: int = 0, hedge: bool = True
+    ) -> T:
+        """
+        Sends a request.
+
+        Args:
+            request (Callable[[], T]): Sends the request and returns its
+                response.
+            tokens (int): Estimated number of tokens of the request.
+            hedge (bool): Whether the request may be hedged, if hedging is
+                on. Requests with side effects, such as writing out a
+                streamed response, must not run twice at once.
+
+        Returns:
+            T: The response.
+
+        Raises:
+            Exception: The request's last error, if it is not retryable or
+                still fails after the retries.
+        """
+        for attempt in range(self.max_retries + 1):
+            waited = self.requests.acquire(1) + self.tokens.acquire(tokens)
+            if waited:
+                logger.debug(f"Waited {waited:.1f}s for the rate limits")
+            try:
+                return self._attempt(request, tokens, hedge)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = random.uniform(
+                    0, min(self.backoff_max, self.backoff_base * 2**attempt)
+                )
+                logger.warning(
+                    f"LLM request failed ({type(e).__name__}: {e}), "
+                    f"retrying in {delay:.1f}s"
+                )
+                with self._lock:
+                    self.retried += 1
+                time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def hedge_threshold(self) -> Optional[float]:
+        """
+        Returns the latency past which a request is hedged.
+
+        Returns:
+            Optional[float]: The quantile of the recent latencies, or None
+            if hedging is off or too few latencies were observed.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not self.hedge or len(latencies) < self.hedge_min_samples:
+            return None
+        index = min(
+            len(latencies) - 1, int(self.hedge_quantile * len(latencies))
+        )
+        return latencies[index]
+
+    def _attempt(
+        self, request: Callable[[], T], tokens: int, hedge: bool = True
+    ) -> T:
+        """
+        Sends a request once, hedging it if it is slow.
+
+        Args:
+            request (Callable[[], T]): Sends the request.
+            tokens (int): Estimated number of tokens of the request.
+            hedge (bool): Whether the request may be hedged.
+
+        Returns:
+            T: The first response.
+
+        Raises:
+            TimeoutError: If no response arrived in time.
+        """
+        first, start = self._send(request)
+        deadline = start + self.timeout
+        pending: Set["Future[T]"] = {first}
+        error: Optional[BaseException] = None
+
+        threshold = self.hedge_threshold() if hedge else None
+        if threshold is not None and threshold < self.timeout:
+            done, pending = wait(
+                pending, timeout=max(0.0, start + threshold - time.monotonic())
+            )
+            # A duplicate must fit the rate limits as well, but is not worth
+            # waiting for
+            if not done and self._try_acquire(tokens):
+                logger.info(
+                    f"No response after {threshold:.1f}s, hedging the request"
+                )
+                with self._lock:
+                    self.hedged += 1
+                pending.add(self._executor.submit(request))
+            pending |= done
+
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(0.0, deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    with self._lock:
+                        self._latencies.append(time.monotonic() - start)
+                    return future.result()
+
+        if error is not None and not pending:
+            raise error
+        raise TimeoutError(f"No response within {self.timeout}s")
+
+    def _send(self, request: Callable[[], T]) -> Tuple["Future[T]", float]:
+        """
+        Sends a request on a thread of the pool.
+
+        Args:
+            request (Callable[[], T]): Sends the request.
+
+        Returns:
+            Tuple[Future[T], float]: The request's future, and the time it
+            was sent at, once a thread is free to send it.
+        """
+        sent: "Future[float]" = Future()
+
+        def send() -> T:
+            sent.set_result(time.monotonic())
+            return request()
+
+        future = self._executor.submit(send)
+        return future, sent.result()
+
+    def _try_acquire(self, tokens: int) -> bool:
+        """
+        Takes a request and its tokens out of the rate limits, if they allow
+        it without waiting.
+
+        Args:
+            tokens (int): Estimated number of tokens of the request.
+
+        Returns:
+            bool: Whether both were taken. Neither is taken otherwise.
+        """
+        if not self.requests.try_acquire(1):
+            return False
+        if not self.tokens.try_acquire(tokens):
+            self.requests.release(1)
+            return False
+        return True
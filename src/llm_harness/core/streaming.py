@@ -0,0 +1,216 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Incremental extraction of harness code from streamed LLM responses.
+"""
+
+import re
+from typing import List, Optional
+
+FENCE_REGEX = re.compile(r"^\s*```")
+
+# Lines that may start a C translation unit: directives, comments, and
+# declarations such as `int x` or `static const char *s`
+CODE_START_REGEX = re.compile(
+    r"^\s*(#|/[/*]|(?:[A-Za-z_]\w*[\s*]+)+[A-Za-z_*]\w*\s*[(;=\[{,])"
+)
+
+ENTRY_POINT = "LLVMFuzzerTestOneInput"
+
+ENTRY_POINT_REGEX = re.compile(rf"\b{ENTRY_POINT}\b")
+
+
+class HarnessExtractor:
+    """
+    Extracts the harness' code from a response, as it is streamed.
+
+    Markdown fences are dropped, along with any chatter around a fenced
+    block. The harness is complete once a closing fence arrives or the body
+    of `LLVMFuzzerTestOneInput` is closed, so the rest of the response need
+    not be waited for.
+
+    Text is fed in arbitrary pieces and processed a line at a time, so that
+    a fence is never split; code is returned as soon as its line is
+    complete.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an extractor expecting the start of a response."""
+        self.complete = False
+        # Text of the harness returned so far
+        self.text = ""
+        self._partial = ""
+        # Whether the code started, and whether it started with a fence
+        self._started = False
+        self._fenced = False
+        # Lines of chatter before any code, in case there is no code at all
+        self._held: List[str] = []
+        # Lexical state of the code
+        self._depth = 0
+        self._in_comment = False
+        self._entry_seen = False
+        self._in_entry = False
+
+    def feed(self, piece: str) -> str:
+        """
+        Processes the next piece of the response.
+
+        Args:
+            piece (str): Text of the response, following the previous piece.
+
+        Returns:
+            str: Harness code completed by this piece, possibly empty.
+        """
+        if self.complete:
+            return ""
+        lines = (self._partial + piece).split("\n")
+        self._partial = lines.pop()
+        code = []
+        for line in lines:
+            extracted = self._line(line)
+            if extracted is not None:
+                code.append(extracted + "\n")
+            if self.complete:
+                break
+        return self._emit("".join(code))
+
+    def finish(self) -> str:
+        """
+        Processes the end of the response.
+
+        A response whose only lines were held as chatter is returned as is,
+        since it held no recognizable code at all.
+
+        Returns:
+            str: The harness code not yet returned, possibly empty.
+        """
+        code = ""
+        if not self.complete and self._partial:
+            extracted = self._line(self._partial)
+            if extracted is not None:
+                code = extracted
+        self._partial = ""
+        if not self._started and self._held:
+            code = "\n".join(self._held) + "\n"
+            self._held = []
+        self.complete = True
+        return self._emit(code)
+
+    def _emit(self, code: str) -> str:
+        """
+        Records returned code.
+
+        Args:
+            code (str): The code.
+
+        Returns:
+            str: The same code.
+        """
+        self.text += code
+        return code
+
+    def _line(self, line: str) -> Optional[str]:
+        """
+        Processes a complete line.
+
+        Args:
+            line (str): The line, without its newline.
+
+        Returns:
+            Optional[str]: The line's code, or None if it is not code.
+        """
+        if FENCE_REGEX.match(line):
+            if self._started:
+                self.complete = True
+            else:
+                # Anything before the opening fence was chatter
+                self._started = self._fenced = True
+                self._held = []
+            return None
+
+        if not self._started:
+            if not line.strip():
+                return None
+            if not CODE_START_REGEX.match(line):
+                self._held.append(line)
+                return None
+            self._started = True
+            self._held = []
+
+        end = self._scan(line)
+        if end is not None:
+            self.complete = True
+            return line[:end]
+        return line
+
+    def _scan(self, line: str) -> Optional[int]:
+        """
+        Tracks the braces of a line of code.
+
+        Args:
+            line (str): The line.
+
+        Returns:
+            Optional[int]: Offset just past the brace closing the body of
+            `LLVMFuzzerTestOneInput`, if it is on this line.
+        """
+        i = 0
+        while i < len(line):
+            if self._in_comment:
+                end = line.find("*/", i)
+                if end < 0:
+                    return None
+                self._in_comment = False
+                i = end + 2
+                continue
+
+            char = line[i]
+            if line.startswith("//", i):
+                return None
+            if line.startswith("/*", i):
+                self._in_comment = True
+                i += 2
+                continue
+            if char in "\"'":
+                # Skip the literal, which never spans lines
+                i += 1
+                while i < len(line) and line[i] != char:
+                    i += 2 if line[i] == "\\" else 1
+                i += 1
+                continue
+
+            if self._depth == 0:
+                match = ENTRY_POINT_REGEX.match(line, i)
+                if match:
+                    self._entry_seen = True
+                    i = match.end()
+                    continue
+                if char == ";":
+                    # A prototype, not the definition
+                    self._entry_seen = False
+
+            if char == "{":
+                if self._depth == 0 and self._entry_seen:
+                    self._in_entry = True
+                self._depth += 1
+            elif char == "}":
+                self._depth = max(0, self._depth - 1)
+                if self._depth == 0 and self._in_entry:
+                    return i + 1
+            i += 1
+        return None
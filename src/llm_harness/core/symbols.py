@@ -0,0 +1,511 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Symbol index over a project's C/C++ sources.
+"""
+
+import os
+import re
+import json
+import bisect
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from loguru import logger
+from llm_harness.core.csource import (
+    C_EXTENSIONS,
+    find_matching_brace,
+    mask_source,
+)
+from llm_harness.models.project import ProjectFile, ProjectInfo
+from llm_harness.config import Config
+
+# Version of the saved index format and of `parse_symbols`. Saved indexes of
+# other versions are rebuilt, so bump it whenever either changes.
+INDEX_VERSION = 1
+
+KEYWORDS = frozenset(
+    """
+    auto break case char const continue default do double else enum extern
+    float for goto if inline int long register restrict return short signed
+    sizeof static struct switch typedef union unsigned void volatile while
+    bool true false NULL class namespace template typename public private
+    protected virtual operator new delete this using const_cast static_cast
+    dynamic_cast reinterpret_cast noexcept constexpr nullptr explicit friend
+    _Bool _Static_assert static_assert defined
+    """.split()
+)
+
+IDENTIFIER_REGEX = re.compile(r"\b[A-Za-z_]\w*\b")
+
+STATEMENT_END_REGEX = re.compile(r"[;{}]")
+
+NEWLINE_REGEX = re.compile(r"\n")
+
+# Qualifiers and annotation macros following a function's parameters, e.g.
+# `const`, `__THROW` or `__nonnull ((1, 2))`
+FUNCTION_TRAILER_REGEX = re.compile(
+    r"\b(?:const|noexcept|override|final|[A-Z_][A-Z0-9_]*|__\w+)"
+    r"(?:\s*\((?:[^()]|\([^()]*\))*\))?\s*\Z"
+)
+
+FUNCTION_NAME_REGEX = re.compile(r"(?P<name>[A-Za-z_][\w:~]*)\s*\Z")
+
+TYPE_REGEX = re.compile(
+    r"(?P<typedef>typedef\s+)?(?P<kind>struct|union|enum|class)\b"
+    r"(?:\s+(?P<tag>[A-Za-z_]\w*))?"
+)
+
+TRANSPARENT_REGEX = re.compile(r'(?:extern\s*"\s*"|namespace\b[\w\s:]*)\Z')
+
+FUNCTION_POINTER_REGEX = re.compile(r"\(\s*\*\s*(?P<name>[A-Za-z_]\w*)\s*\)")
+
+ATTRIBUTE_REGEX = re.compile(r"__attribute__\s*\(\(.*?\)\)")
+
+TRAILING_NAME_REGEX = re.compile(
+    r"(?P<name>[A-Za-z_]\w*)\s*(?:\[[^\]]*\]\s*)*\Z"
+)
+
+
+@dataclass
+class Symbol:
+    """A declaration or definition found in the project's sources."""
+
+    name: str
+    kind: str
+    path: str
+    line: int
+    text: str
+    signature: str = ""
+    references: List[str] = field(default_factory=list)
+
+    def declaration(self) -> "Symbol":
+        """
+        Returns the symbol reduced to its declaration.
+
+        Returns:
+            Symbol: A prototype for function definitions, the symbol itself
+            otherwise.
+        """
+        if self.kind != "function":
+            return self
+
+        return Symbol(
+            name=self.name,
+            kind="prototype",
+            path=self.path,
+            line=self.line,
+            text=self.signature + ";",
+            signature=self.signature,
+            references=[
+                ref
+                for ref in IDENTIFIER_REGEX.findall(self.signature)
+                if ref != self.name and ref not in KEYWORDS
+            ],
+        )
+
+
+class SymbolIndex:
+    """
+    Index of the functions, prototypes and type declarations of a project,
+    with the file defining each of them.
+
+    The index is built with a lightweight lexical scan, so it needs no
+    compiler and tolerates code that does not preprocess or parse.
+    """
+
+    def __init__(self, symbols: List[Symbol], fingerprint: str = ""):
+        """
+        Initialize the index.
+
+        Args:
+            symbols (List[Symbol]): The indexed symbols.
+            fingerprint (str): Fingerprint of the indexed project.
+        """
+        self.fingerprint = fingerprint
+        self.symbols: Dict[str, List[Symbol]] = {}
+        for symbol in symbols:
+            self.symbols.setdefault(symbol.name, []).append(symbol)
+
+    @classmethod
+    def build(cls, project_info: ProjectInfo) -> "SymbolIndex":
+        """
+        Indexes the C/C++ files of a project.
+
+        Args:
+            project_info (ProjectInfo): The project information.
+
+        Returns:
+            SymbolIndex: The index.
+        """
+        symbols = []
+        for file in project_info.files:
+            if file.name.endswith(C_EXTENSIONS):
+                symbols.extend(parse_symbols(file))
+
+        return cls(symbols, fingerprint=project_info.get_fingerprint())
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> Optional["SymbolIndex"]:
+        """
+        Loads a saved index, if it was built for the same project state by
+        the same version of the parser.
+
+        Args:
+            path (str): Path of the saved index.
+            fingerprint (str): Current fingerprint of the project.
+
+        Returns:
+            Optional[SymbolIndex]: The index, or None if missing or stale.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return None
+
+        if (
+            data.get("version") != INDEX_VERSION
+            or data.get("fingerprint") != fingerprint
+        ):
+            return None
+
+        return cls(
+            [Symbol(**symbol) for symbol in data.get("symbols", [])],
+            fingerprint=fingerprint,
+        )
+
+    def save(self, path: str) -> None:
+        """
+        Saves the index.
+
+        Args:
+            path (str): Path to save the index to.
+        """
+        data: Dict[str, Any] = {
+            "version": INDEX_VERSION,
+            "fingerprint": self.fingerprint,
+            "symbols": [
+                asdict(symbol)
+                for symbols in self.symbols.values()
+                for symbol in symbols
+            ],
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        except IOError as e:
+            logger.warning(f"Could not save symbol index to {path}: {e}")
+
+    def lookup(self, name: str) -> List[Symbol]:
+        """
+        Returns the symbols with a name.
+
+        Args:
+            name (str): The symbol's name.
+
+        Returns:
+            List[Symbol]: Its definitions and declarations.
+        """
+        return self.symbols.get(name, [])
+
+    def defining_file(self, name: str) -> Optional[str]:
+        """
+        Returns the file defining a symbol.
+
+        Args:
+            name (str): The symbol's name.
+
+        Returns:
+            Optional[str]: Path of the file with the symbol's definition, or
+            of its first declaration if it is only declared.
+        """
+        symbols = self.lookup(name)
+        for symbol in symbols:
+            if symbol.kind != "prototype":
+                return symbol.path
+        return symbols[0].path if symbols else None
+
+    def select(
+        self,
+        target: Union[str, List[str]],
+        callee_depth: Optional[int] = Config.SYMBOL_CALLEE_DEPTH,
+    ) -> List[Symbol]:
+        """
+        Selects the symbols needed to understand a function.
+
+        These are the function itself, its declarations, the types it uses,
+        transitively, and its callees. Callees deeper than `callee_depth`
+        calls away are reduced to their declarations.
+
+        Args:
+            target (Union[str, List[str]]): Name of the function, or the
+                names of several functions, whose selections are merged.
+            callee_depth (int, optional): Depth of the call graph to include
+                definitions from. Unbounded if None.
+
+        Returns:
+            List[Symbol]: The selected symbols, in file and line order.
+        """
+        selected: Dict[Tuple[str, int, str], Symbol] = {}
+        targets = [target] if isinstance(target, str) else target
+        queue: Deque[Tuple[str, int]] = deque((name, 0) for name in targets)
+        seen: Set[str] = set()
+
+        while queue:
+            name, depth = queue.popleft()
+            if name in seen:
+                continue
+            seen.add(name)
+
+            symbols = self.lookup(name)
+            if callee_depth is not None and depth > callee_depth:
+                # Past the depth limit, declarations are enough
+                declared = [s for s in symbols if s.kind != "function"]
+                if not any(s.kind == "prototype" for s in symbols):
+                    declared += [
+                        s.declaration()
+                        for s in symbols
+                        if s.kind == "function"
+                    ]
+                symbols = declared
+
+            for symbol in symbols:
+                selected[(symbol.path, symbol.line, symbol.kind)] = symbol
+                for ref in symbol.references:
+                    if ref in self.symbols and ref not in seen:
+                        queue.append((ref, depth + 1))
+
+        return sorted(selected.values(), key=lambda s: (s.path, s.line))
+
+    def context_for(
+        self,
+        target: Union[str, List[str]],
+        callee_depth: Optional[int] = Config.SYMBOL_CALLEE_DEPTH,
+    ) -> ProjectInfo:
+        """
+        Builds prompt context limited to the symbols a function needs.
+
+        Args:
+            target (Union[str, List[str]]): Name of the function, or the
+                names of several functions.
+            callee_depth (int, optional): Depth of the call graph to include
+                definitions from.
+
+        Returns:
+            ProjectInfo: One file per source file, holding the selected
+            symbols of that file.
+        """
+        snippets: Dict[str, List[str]] = {}
+        seen: Set[Tuple[str, int]] = set()
+        for symbol in self.select(target, callee_depth):
+            # A typedef'd struct is indexed under both of its names
+            if (symbol.path, symbol.line) in seen:
+                continue
+            seen.add((symbol.path, symbol.line))
+            snippets.setdefault(symbol.path, []).append(symbol.text)
+
+        logger.info(
+            f"Selected {len(seen)} symbols from {len(snippets)} files "
+            f"for {target if isinstance(target, str) else ', '.join(target)}"
+        )
+        return ProjectInfo(
+            files=[
+                ProjectFile(
+                    path=path,
+                    name=os.path.basename(path),
+                    content="\n\n".join(texts) + "\n",
+                )
+                for path, texts in snippets.items()
+            ]
+        )
+
+
+def parse_symbols(file: ProjectFile) -> List[Symbol]:
+    """
+    Finds the top-level declarations and definitions of a source file.
+
+    Args:
+        file (ProjectFile): The source file.
+
+    Returns:
+        List[Symbol]: The file's symbols.
+    """
+    content = file.content
+    masked = mask_source(content, strings=True, preprocessor=True)
+    newlines = [match.start() for match in NEWLINE_REGEX.finditer(content)]
+    symbols: List[Symbol] = []
+
+    def add(name: str, kind: str, start: int, end: int, sig: str = "") -> None:
+        # Leave out the comments and directives preceding the symbol
+        segment = masked[start:end]
+        start += len(segment) - len(segment.lstrip())
+        symbols.append(
+            Symbol(
+                name=name,
+                kind=kind,
+                path=file.path,
+                line=bisect.bisect_right(newlines, start) + 1,
+                text=content[start:end].strip(),
+                signature=sig,
+                references=sorted(
+                    {
+                        ref
+                        for ref in IDENTIFIER_REGEX.findall(masked[start:end])
+                        if ref != name and ref not in KEYWORDS
+                    }
+                ),
+            )
+        )
+
+    start = 0
+    pos = 0
+    while True:
+        match = STATEMENT_END_REGEX.search(masked, pos)
+        if match is None:
+            break
+        end = match.start()
+        header = " ".join(masked[start:end].split())
+        if "__attribute__" in header:
+            header = ATTRIBUTE_REGEX.sub(" ", header)
+
+        if match.group(0) == "}":
+            # Closing brace of a namespace or extern "C" block
+            start = pos = end + 1
+            continue
+
+        if match.group(0) == ";":
+            _add_declaration(add, header, start, end + 1)
+            start = pos = end + 1
+            continue
+
+        name = function_name(header)
+        if name is None and TRANSPARENT_REGEX.search(header):
+            # Declarations inside are still top-level ones
+            start = pos = end + 1
+            continue
+
+        close = find_matching_brace(masked, end)
+        if close is None:
+            break
+
+        if name is not None:
+            add(name, "function", start, close + 1, header)
+            start = pos = close + 1
+            continue
+
+        # Type definitions and initializers run up to the next semicolon
+        semicolon = masked.find(";", close)
+        semicolon = len(masked) - 1 if semicolon == -1 else semicolon
+        type_match = TYPE_REGEX.match(header)
+        if type_match:
+            trailer = masked[close + 1 : semicolon]
+            if type_match.group("tag"):
+                add(
+                    type_match.group("tag"),
+                    type_match.group("kind"),
+                    start,
+                    semicolon + 1,
+                )
+            if type_match.group("typedef"):
+                for name in IDENTIFIER_REGEX.findall(trailer):
+                    if name not in KEYWORDS:
+                        add(name, "typedef", start, semicolon + 1)
+        start = pos = semicolon + 1
+
+    return symbols
+
+
+def _add_declaration(
+    add: Callable[..., None], header: str, start: int, end: int
+) -> None:
+    """
+    Records a declaration ending with a semicolon.
+
+    Args:
+        add (Callable[..., None]): Callback recording a symbol.
+        header (str): The declaration, without the semicolon.
+        start (int): Offset of the declaration.
+        end (int): Offset past the semicolon.
+    """
+    if header.startswith("typedef"):
+        typedef = FUNCTION_POINTER_REGEX.search(
+            header
+        ) or TRAILING_NAME_REGEX.search(header)
+        if typedef and typedef.group("name") not in KEYWORDS:
+            add(typedef.group("name"), "typedef", start, end)
+        return
+
+    name = function_name(header)
+    if name is not None:
+        add(name, "prototype", start, end, header)
+
+
+def function_name(header: str) -> Optional[str]:
+    """
+    Finds the name of the function a declaration declares or defines.
+
+    Args:
+        header (str): The declaration, up to its `;` or body, with comments
+            and literals masked.
+
+    Returns:
+        Optional[str]: The function's name, or None if the declaration is
+        not a function's, e.g. a variable or a function pointer.
+    """
+    text = header.rstrip()
+    while True:
+        trailer = FUNCTION_TRAILER_REGEX.search(text)
+        if trailer is None:
+            break
+        rest = text[: trailer.start()].rstrip()
+        # An all-caps name may also be the function's own, e.g. `MAX(a, b)`
+        if ")" not in rest:
+            break
+        text = rest
+
+    if not text.endswith(")"):
+        return None
+
+    depth = 0
+    for i in range(len(text) - 1, -1, -1):
+        if text[i] == ")":
+            depth += 1
+        elif text[i] == "(":
+            depth -= 1
+            if depth == 0:
+                break
+    else:
+        return None
+
+    before = text[:i].rstrip()
+    match = FUNCTION_NAME_REGEX.search(before)
+    if match is None or "=" in before or match.group("name") in KEYWORDS:
+        return None
+    return match.group("name")
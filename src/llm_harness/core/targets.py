@@ -0,0 +1,218 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Discovery and static ranking of the functions worth fuzzing.
+"""
+
+import re
+import math
+from typing import List, Optional
+from llm_harness.core.coverage import call_distances
+from llm_harness.core.packer import HEADER_EXTENSIONS
+from llm_harness.core.retrieval import tokenize
+from llm_harness.core.symbols import Symbol, SymbolIndex
+from llm_harness.models.target import FuzzTarget
+
+# Functions that are entry points already, rather than targets
+EXCLUDED_NAMES = {"main", "LLVMFuzzerTestOneInput", "LLVMFuzzerInitialize"}
+
+# Words of the names of functions turning bytes into data structures
+PARSER_WORDS = {
+    "parse",
+    "load",
+    "read",
+    "decode",
+    "deserialize",
+    "unserialize",
+    "unmarshal",
+    "scan",
+    "lex",
+    "tokenize",
+    "unpack",
+    "import",
+    "inflate",
+    "decompress",
+    "uncompress",
+    "eval",
+    "compile",
+    "from",
+}
+
+# A pointer to bytes or characters, e.g. `const uint8_t *data`
+BUFFER_REGEX = re.compile(
+    r"\b(?:char|uint8_t|int8_t|u_char|u8|byte|void|wchar_t)\b"
+    r"[\s\w]*\*"
+)
+
+STREAM_REGEX = re.compile(r"\bFILE\s*\*")
+
+# The name of a parameter holding a length, e.g. `len` or `buf_size`
+LENGTH_NAME_REGEX = re.compile(
+    r"(?:n|sz|count|\w*(?:len|length|size|bytes))", re.IGNORECASE
+)
+
+LENGTH_TYPE_REGEX = re.compile(r"\bs?size_t\b")
+
+BUFFER_LENGTH_WEIGHT = 4.0
+BUFFER_WEIGHT = 2.5
+STREAM_WEIGHT = 2.5
+PARSER_NAME_WEIGHT = 2.0
+EXPORTED_WEIGHT = 1.0
+FAN_OUT_WEIGHT = 0.5
+
+
+def split_parameters(symbol: Symbol) -> List[str]:
+    """
+    Splits the parameter list of a function.
+
+    Args:
+        symbol (Symbol): The function's definition or prototype.
+
+    Returns:
+        List[str]: The parameters, stripped. Empty for `(void)`.
+    """
+    match = re.search(rf"\b{re.escape(symbol.name)}\s*\(", symbol.signature)
+    if match is None:
+        return []
+
+    parameters = []
+    depth = 0
+    current: List[str] = []
+    for char in symbol.signature[match.end() :]:
+        if char == ")" and depth == 0:
+            break
+        if char == "," and depth == 0:
+            parameters.append("".join(current).strip())
+            current = []
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current.append(char)
+    parameters.append("".join(current).strip())
+    return [p for p in parameters if p and p != "void"]
+
+
+def score_function(index: SymbolIndex, symbol: Symbol) -> Optional[FuzzTarget]:
+    """
+    Scores a function as an entry point for fuzzing.
+
+    Functions taking a buffer and its length, or a file, score highest,
+    followed by those named like parsers and those declared in headers.
+    The more code a function reaches through its calls, the higher it
+    scores, logarithmically so that size alone never outweighs the rest.
+
+    Args:
+        index (SymbolIndex): The project's symbol index.
+        symbol (Symbol): The function's definition.
+
+    Returns:
+        Optional[FuzzTarget]: The scored target, or None if the function
+        cannot be a target, e.g. it is static or takes no parameters.
+    """
+    parameters = split_parameters(symbol)
+    if (
+        not parameters
+        or symbol.name in EXCLUDED_NAMES
+        or re.search(r"\bstatic\b", symbol.signature)
+    ):
+        return None
+
+    target = FuzzTarget(name=symbol.name, path=symbol.path, line=symbol.line)
+    buffers = [p for p in parameters if BUFFER_REGEX.search(p)]
+    lengths = [
+        p
+        for p in parameters
+        if "*" not in p
+        and (
+            LENGTH_TYPE_REGEX.search(p)
+            or LENGTH_NAME_REGEX.fullmatch(p.split()[-1])
+        )
+    ]
+    if buffers and lengths:
+        target.score += BUFFER_LENGTH_WEIGHT
+        target.reasons.append("buffer and length")
+    elif buffers:
+        target.score += BUFFER_WEIGHT
+        target.reasons.append("buffer")
+    if any(STREAM_REGEX.search(p) for p in parameters):
+        target.score += STREAM_WEIGHT
+        target.reasons.append("file stream")
+    if PARSER_WORDS.intersection(tokenize(symbol.name)):
+        target.score += PARSER_NAME_WEIGHT
+        target.reasons.append("parser name")
+    if any(
+        s.kind == "prototype" and s.path.endswith(HEADER_EXTENSIONS)
+        for s in index.lookup(symbol.name)
+    ):
+        target.score += EXPORTED_WEIGHT
+        target.reasons.append("exported")
+
+    distances = call_distances(index, symbol.name)
+    for name in distances:
+        definition = _definition(index, name)
+        if definition is not None:
+            target.reachable_lines += definition.text.count("\n") + 1
+    target.fan_out = sum(1 for d in distances.values() if d == 1)
+    target.score += math.log2(1 + target.reachable_lines)
+    target.score += FAN_OUT_WEIGHT * math.log2(1 + target.fan_out)
+    return target
+
+
+def rank_targets(
+    index: SymbolIndex, count: Optional[int] = None
+) -> List[FuzzTarget]:
+    """
+    Ranks the project's functions as entry points for fuzzing.
+
+    The ranking is static and cheap, so that the targets worth running the
+    pipeline on are picked before any LLM call.
+
+    Args:
+        index (SymbolIndex): The project's symbol index.
+        count (int, optional): Number of targets to return. All if None.
+
+    Returns:
+        List[FuzzTarget]: The targets, best first.
+    """
+    targets = []
+    for name in index.symbols:
+        definition = _definition(index, name)
+        if definition is None:
+            continue
+        target = score_function(index, definition)
+        if target is not None:
+            targets.append(target)
+
+    targets.sort(key=lambda t: (-t.score, t.name))
+    return targets[:count] if count is not None else targets
+
+
+def _definition(index: SymbolIndex, name: str) -> Optional[Symbol]:
+    """
+    Finds the definition of a function.
+
+    Args:
+        index (SymbolIndex): The project's symbol index.
+        name (str): The function's name.
+
+    Returns:
+        Optional[Symbol]: Its first definition, or None if only declared.
+    """
+    for symbol in index.lookup(name):
+        if symbol.kind == "function":
+            return symbol
+    return None
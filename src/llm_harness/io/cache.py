@@ -0,0 +1,183 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Persistent on-disk caches for the llm_harness package.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from typing import Any, List, Optional, Tuple
+from loguru import logger
+from llm_harness.config import Config
+
+
+class DiskCache:
+    """
+    Content-addressed key/value store on local disk.
+
+    Entries are kept as one file per key. Every hit refreshes the entry's
+    modification time, so that when the cache grows past its size cap the
+    least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self, directory: str, max_bytes: int = Config.CACHE_MAX_BYTES
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            directory (str): Directory holding the cache entries.
+            max_bytes (int): Size cap of the cache, in bytes.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Derives a cache key from JSON-serializable parts.
+
+        Args:
+            *parts (Any): The values identifying an entry.
+
+        Returns:
+            str: Hex digest to be used as a key.
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Looks up an entry, marking it as recently used.
+
+        Args:
+            key (str): The entry's key.
+
+        Returns:
+            Optional[bytes]: The stored data, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Stores an entry, evicting old ones if the size cap is exceeded.
+
+        Args:
+            key (str): The entry's key.
+            data (bytes): The data to store.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first, so that concurrent readers never
+        # observe a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self._evict()
+
+    def clear(self) -> None:
+        """Removes every entry of the cache."""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def size(self) -> int:
+        """
+        Returns the total size of the stored entries.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def _path(self, key: str) -> str:
+        """
+        Returns the file path of an entry.
+
+        Args:
+            key (str): The entry's key.
+
+        Returns:
+            str: Path of the entry, sharded by the key's first two characters.
+        """
+        return os.path.join(self.directory, key[:2], key)
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        """
+        Lists the stored entries.
+
+        Returns:
+            List[Tuple[str, int, float]]: Path, size and last use time of
+            each entry.
+        """
+        entries: List[Tuple[str, int, float]] = []
+        if not os.path.isdir(self.directory):
+            return entries
+
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.is_file() or entry.name.startswith("tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+
+        return entries
+
+    def _evict(self) -> None:
+        """Evicts least recently used entries until under the size cap."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            logger.debug(f"Evicted cache entry {path}")
+            if total <= self.max_bytes:
+                break
@@ -20,11 +20,87 @@ File operations for the llm_harness package.
 """
 
 import os
+import tempfile
 from loguru import logger
-from typing import Optional
+from types import TracebackType
+from typing import IO, Optional, Type
 from llm_harness.config import Config
 
 
+class HarnessWriter:
+    """
+    Writes a harness piece by piece, as it is generated.
+
+    The pieces go to a temporary file next to the harness, flushed as they
+    are written, which replaces the harness once it is complete. A failed
+    generation leaves the previous harness in place.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a temporary file for the harness.
+
+        Args:
+            path (str): Path to the harness file.
+        """
+        self.path = path
+        fd, self._tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or None,
+            prefix=f".{os.path.basename(path)}.",
+        )
+        self._file: IO[str] = os.fdopen(fd, "w", encoding="utf-8")
+
+    def write(self, code: str) -> None:
+        """
+        Appends code to the harness.
+
+        Args:
+            code (str): The code.
+        """
+        if code:
+            self._file.write(code)
+            self._file.flush()
+
+    def reset(self) -> None:
+        """Discards the code written so far, e.g. to start over."""
+        self._file.seek(0)
+        self._file.truncate()
+
+    def close(self) -> None:
+        """Closes the harness, moving it into place."""
+        if not self._file.closed:
+            self._file.close()
+            # Temporary files are only readable by their owner
+            os.chmod(self._tmp_path, 0o644)
+            os.replace(self._tmp_path, self.path)
+            logger.info(f"Harness written to {self.path}")
+
+    def discard(self) -> None:
+        """Closes the harness, keeping the previous one."""
+        if not self._file.closed:
+            self._file.close()
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "HarnessWriter":
+        """Returns the writer itself."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Moves the harness into place, unless its generation failed."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
 class FileManager:
     """
     Handles file operations for the harness generator.
@@ -53,12 +129,7 @@ class FileManager:
         Returns:
             str: Path to the written harness file.
         """
-        os.makedirs(self.harness_dir, exist_ok=True)
-
-        if not filename:
-            filename = Config.HARNESS_FILENAME
-
-        harness_path = os.path.join(self.harness_dir, filename)
+        harness_path = self._harness_path(filename)
 
         try:
             with open(harness_path, "w", encoding="utf-8") as f:
@@ -68,3 +139,35 @@ class FileManager:
         except IOError as e:
             logger.error(f"Error writing harness to {harness_path}: {e}")
             raise
+
+    def open_harness(self, filename: Optional[str] = None) -> HarnessWriter:
+        """
+        Opens a harness in the harnesses directory, to be written piecewise.
+
+        Args:
+            filename (str, optional): The filename to use.
+
+        Returns:
+            HarnessWriter: Writer of the harness file.
+        """
+        harness_path = self._harness_path(filename)
+        try:
+            return HarnessWriter(harness_path)
+        except IOError as e:
+            logger.error(f"Error opening harness {harness_path}: {e}")
+            raise
+
+    def _harness_path(self, filename: Optional[str] = None) -> str:
+        """
+        Creates the harnesses directory and returns a harness' path in it.
+
+        Args:
+            filename (str, optional): The filename to use.
+
+        Returns:
+            str: Path to the harness file.
+        """
+        os.makedirs(self.harness_dir, exist_ok=True)
+        return os.path.join(
+            self.harness_dir, filename or Config.HARNESS_FILENAME
+        )
@@ -0,0 +1,358 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Recursive listing of a project's files.
+"""
+
+import os
+import re
+import fnmatch
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Pattern, Tuple
+from loguru import logger
+from llm_harness.config import Config
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    Translates a gitignore-style glob to a regular expression.
+
+    Unlike `fnmatch.translate`, wildcards do not match across directories
+    and `**` matches any number of them.
+
+    Args:
+        pattern (str): The glob, relative to the directory it applies to.
+
+    Returns:
+        str: An anchored regular expression matching relative paths.
+    """
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                chars = pattern[i + 1 : end]
+                if chars.startswith("!"):
+                    chars = "^" + chars[1:]
+                regex.append(f"[{chars}]")
+                i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            regex.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+
+    return "".join(regex)
+
+
+@dataclass
+class IgnoreRule:
+    """A single rule of a `.gitignore` file."""
+
+    regex: Pattern[str]
+    negated: bool
+    dir_only: bool
+
+
+class GitIgnore:
+    """
+    The rules of one `.gitignore` file.
+    """
+
+    def __init__(self, base: str, lines: List[str]):
+        """
+        Initialize the rules.
+
+        Args:
+            base (str): Directory of the `.gitignore`, relative to the
+                project root (`""` for the root itself).
+            lines (List[str]): The lines of the `.gitignore`.
+        """
+        self.base = base
+        self.rules: List[IgnoreRule] = []
+
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            if not line.endswith("\\ "):
+                line = line.rstrip()
+
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            elif line.startswith("\\"):
+                line = line[1:]
+
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+
+            # Patterns without an inner slash match at any depth
+            if "/" in line:
+                regex = _glob_to_regex(line.lstrip("/"))
+            else:
+                regex = "(?:.*/)?" + _glob_to_regex(line)
+
+            self.rules.append(
+                IgnoreRule(re.compile(regex + r"\Z"), negated, dir_only)
+            )
+
+    @classmethod
+    def load(cls, path: str, base: str) -> Optional["GitIgnore"]:
+        """
+        Reads a `.gitignore` file.
+
+        Args:
+            path (str): Path of the file.
+            base (str): Directory of the file, relative to the project root.
+
+        Returns:
+            Optional[GitIgnore]: The rules, or None if the file is unusable.
+        """
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return cls(base, f.readlines())
+        except IOError as e:
+            logger.warning(f"Could not read {path}: {e}")
+            return None
+
+    def match(self, relpath: str, is_dir: bool) -> Optional[bool]:
+        """
+        Checks a path against the rules.
+
+        Args:
+            relpath (str): Path relative to the project root.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            Optional[bool]: Whether the path is ignored, or None if no rule
+            applies to it.
+        """
+        if self.base:
+            if not relpath.startswith(self.base + "/"):
+                return None
+            relpath = relpath[len(self.base) + 1 :]
+
+        result = None
+        for rule in self.rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(relpath):
+                result = not rule.negated
+
+        return result
+
+
+class ProjectTree:
+    """
+    Listing of a project's files, produced by a single recursive walk.
+
+    The walk honours `.gitignore` files and skips VCS, build and
+    llm_harness' own directories. It runs once, on first use; the analyzer
+    and the builder then take their file lists from the same listing.
+    """
+
+    def __init__(
+        self,
+        project_path: str,
+        ignored_dirs: Optional[List[str]] = None,
+    ):
+        """
+        Initialize the project tree.
+
+        Args:
+            project_path (str): Path to the project directory.
+            ignored_dirs (List[str], optional): Name patterns of directories
+                not to descend into. Defaults to `Config.IGNORED_DIRS`.
+        """
+        self.project_path = project_path
+        self.ignored_dirs = (
+            ignored_dirs if ignored_dirs is not None else Config.IGNORED_DIRS
+        )
+        self._ignored_dirs_regex = re.compile(
+            "|".join(fnmatch.translate(p) for p in self.ignored_dirs) or "$^"
+        )
+        self._files: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    def files(self) -> List[str]:
+        """
+        Lists the project's files, walking the project on first use.
+
+        Returns:
+            List[str]: Sorted file paths, relative to the project root and
+            separated by `/`.
+        """
+        with self._lock:
+            if self._files is None:
+                self._files = self._walk()
+                logger.debug(
+                    f"Found {len(self._files)} files under {self.project_path}"
+                )
+            return self._files
+
+    def match(self, patterns: List[str]) -> List[str]:
+        """
+        Lists the files matching any of the patterns.
+
+        Patterns without a `/` are matched against file names, at any depth.
+        Patterns with a `/` are matched against the paths relative to the
+        project root.
+
+        Args:
+            patterns (List[str]): Glob patterns, e.g. `*.c`.
+
+        Returns:
+            List[str]: Sorted file paths, relative to the project root.
+        """
+        name_regex, path_regex = self._compile(patterns)
+        return [
+            path
+            for path in self.files()
+            if (name_regex and name_regex.match(path.rsplit("/", 1)[-1]))
+            or (path_regex and path_regex.match(path))
+        ]
+
+    def refresh(self) -> None:
+        """Drops the cached listing, so that the next use walks again."""
+        with self._lock:
+            self._files = None
+
+    @staticmethod
+    def _compile(
+        patterns: List[str],
+    ) -> Tuple[Optional[Pattern[str]], Optional[Pattern[str]]]:
+        """
+        Compiles the patterns into one regular expression per kind.
+
+        Args:
+            patterns (List[str]): Glob patterns.
+
+        Returns:
+            Tuple[Optional[Pattern[str]], Optional[Pattern[str]]]: The
+            expressions matching file names and relative paths.
+        """
+        names = [p for p in patterns if "/" not in p]
+        paths = [p.lstrip("/") for p in patterns if "/" in p]
+
+        name_regex = (
+            re.compile("|".join(fnmatch.translate(p) for p in names))
+            if names
+            else None
+        )
+        path_regex = (
+            re.compile("|".join(f"(?:{_glob_to_regex(p)})\\Z" for p in paths))
+            if paths
+            else None
+        )
+        return name_regex, path_regex
+
+    def _walk(self) -> List[str]:
+        """
+        Walks the project with `os.scandir`.
+
+        Returns:
+            List[str]: Sorted file paths, relative to the project root.
+        """
+        files: List[str] = []
+        # Directories still to visit, with the ignore rules in effect there
+        stack: List[Tuple[str, List[GitIgnore]]] = [("", [])]
+
+        while stack:
+            reldir, ignores = stack.pop()
+            absdir = os.path.join(self.project_path, reldir)
+
+            try:
+                entries = list(os.scandir(absdir))
+            except OSError as e:
+                logger.warning(f"Could not list {absdir}: {e}")
+                continue
+
+            if any(entry.name == ".gitignore" for entry in entries):
+                gitignore = GitIgnore.load(
+                    os.path.join(absdir, ".gitignore"), reldir
+                )
+                if gitignore is not None:
+                    ignores = ignores + [gitignore]
+
+            for entry in entries:
+                relpath = f"{reldir}/{entry.name}" if reldir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    is_file = not is_dir and entry.is_file()
+                except OSError:
+                    continue
+
+                if is_dir and self._ignored_dirs_regex.match(entry.name):
+                    continue
+                if self._is_ignored(ignores, relpath, is_dir):
+                    continue
+
+                if is_dir:
+                    stack.append((relpath, ignores))
+                elif is_file:
+                    files.append(relpath)
+
+        files.sort()
+        return files
+
+    @staticmethod
+    def _is_ignored(
+        ignores: List[GitIgnore], relpath: str, is_dir: bool
+    ) -> bool:
+        """
+        Checks a path against the `.gitignore` files in effect.
+
+        Deeper files take precedence over the ones closer to the root.
+
+        Args:
+            ignores (List[GitIgnore]): Rules from the root downwards.
+            relpath (str): Path relative to the project root.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: Whether the path is ignored.
+        """
+        for gitignore in reversed(ignores):
+            result = gitignore.match(relpath, is_dir)
+            if result is not None:
+                return result
+        return False
@@ -0,0 +1,54 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Data models for batches of projects.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+from llm_harness.models.candidate import Candidate
+
+
+@dataclass
+class ProjectResult:
+    """Outcome of one project of a batch."""
+
+    project_path: str
+    target: str
+    # The project's candidates, best first
+    candidates: List[Candidate] = field(default_factory=list)
+    # Error that stopped the project before its candidates, if any
+    error: str = ""
+    # Seconds from the start of the batch to the end of the project
+    finished_at: float = 0.0
+
+    @property
+    def name(self) -> str:
+        """Name of the project."""
+        return os.path.basename(os.path.normpath(self.project_path))
+
+    @property
+    def best(self) -> Optional[Candidate]:
+        """The best candidate, if any was generated."""
+        return self.candidates[0] if self.candidates else None
+
+    @property
+    def accepted(self) -> bool:
+        """Whether the project got an accepted harness."""
+        return self.best is not None and self.best.accepted
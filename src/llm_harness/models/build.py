@@ -0,0 +1,90 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Data models for building harnesses.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+DIAGNOSTIC_REGEX = re.compile(
+    r"^(?P<file>[^:\n]+):(?P<line>\d+):(?:(?P<column>\d+):)?\s*"
+    r"(?P<severity>fatal error|error|warning|note):\s*(?P<message>.*)$",
+    re.MULTILINE,
+)
+
+
+@dataclass
+class Diagnostic:
+    """A compiler diagnostic."""
+
+    file: str
+    line: int
+    column: int
+    severity: str
+    message: str
+
+    def __str__(self) -> str:
+        """Formats the diagnostic like the compiler does."""
+        return (
+            f"{self.file}:{self.line}:{self.column}: "
+            f"{self.severity}: {self.message}"
+        )
+
+    @property
+    def is_error(self) -> bool:
+        """Whether the diagnostic stops compilation."""
+        return self.severity in ("error", "fatal error")
+
+    @classmethod
+    def parse(cls, output: str) -> List["Diagnostic"]:
+        """
+        Parses the diagnostics of GCC or Clang.
+
+        Args:
+            output (str): The compiler's standard error.
+
+        Returns:
+            List[Diagnostic]: The diagnostics, in order. Lines that are not
+            diagnostics, e.g. code excerpts, are skipped.
+        """
+        return [
+            cls(
+                file=match.group("file"),
+                line=int(match.group("line")),
+                column=int(match.group("column") or 0),
+                severity=match.group("severity"),
+                message=match.group("message").strip(),
+            )
+            for match in DIAGNOSTIC_REGEX.finditer(output)
+        ]
+
+
+@dataclass
+class BuildResult:
+    """Outcome of building a harness."""
+
+    success: bool
+    # Output of the compiler, or the error that stopped the build
+    output: str = ""
+    # Diagnostics of the harness' syntax check
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+    # The project's own sources failed to compile, which no change to the
+    # harness can fix
+    prebuild_failed: bool = False
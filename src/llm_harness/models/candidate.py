@@ -0,0 +1,86 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Data models for the candidate harnesses of a run.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from llm_harness.models.coverage import CoverageReport
+from llm_harness.models.evaluation import OUTCOME_OK, FuzzMetrics
+
+
+@dataclass
+class Candidate:
+    """One of several harnesses generated for the same target."""
+
+    index: int
+    harness_filename: str
+    executable: str
+    harness: str = ""
+    # Model that generated the candidate, and its tier in a cascade
+    model: str = ""
+    tier: int = 0
+    build_output: str = ""
+    built: bool = False
+    # Harnesses that failed to build and were sent back to the LLM, with
+    # their trimmed compiler errors, and when the first of them was built
+    build_errors: List[Tuple[str, str]] = field(default_factory=list)
+    repair_started: float = 0.0
+    accepted: bool = False
+    metrics: FuzzMetrics = field(default_factory=FuzzMetrics)
+    # Source-based coverage of the candidate's corpus, if measured
+    coverage: Optional[CoverageReport] = None
+    # Candidate whose coverage gaps this one was asked to reach, and the
+    # round of refinement it is from
+    refines: Optional["Candidate"] = None
+    refinement: int = 0
+    # Error that stopped the candidate before its evaluation, if any
+    error: str = ""
+    # Seconds from the start of the run to the end of the candidate's
+    # evaluation
+    finished_at: float = 0.0
+
+    @property
+    def repairs(self) -> int:
+        """Number of repair rounds the candidate went through."""
+        return len(self.build_errors)
+
+    @property
+    def status(self) -> str:
+        """How far the candidate got: accepted, built or failed."""
+        if self.accepted:
+            return "accepted"
+        return "built" if self.built else "failed"
+
+    @property
+    def score(self) -> Tuple[bool, bool, bool, int, int, int]:
+        """
+        Sort key of the candidate, greater being better.
+
+        Accepted harnesses come first, then the ones that built and ran
+        cleanly, each ordered by coverage and then by speed.
+        """
+        return (
+            self.accepted,
+            self.built,
+            self.metrics.outcome == OUTCOME_OK,
+            self.metrics.cov,
+            self.metrics.ft,
+            self.metrics.execs_per_sec,
+        )
@@ -0,0 +1,71 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Data models for the source-based coverage of harnesses.
+"""
+
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class CoverageGap:
+    """Code a harness never reached, or a branch it only took one way."""
+
+    file: str
+    line: int
+    function: str
+    # Description of the gap, e.g. `never called` or `never true`
+    kind: str
+    # The source line, stripped
+    code: str = ""
+
+    def __str__(self) -> str:
+        """Formats the gap as a line of a report."""
+        text = f"{self.file}:{self.line} {self.function}: {self.kind}"
+        return f"{text}: {self.code}" if self.code else text
+
+
+@dataclass
+class CoverageReport:
+    """Condensed source-based coverage of a harness' corpus."""
+
+    functions_covered: int = 0
+    functions_total: int = 0
+    lines_covered: int = 0
+    lines_total: int = 0
+    branches_covered: int = 0
+    branches_total: int = 0
+    # Gaps nearest to the target first
+    gaps: List[CoverageGap] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """
+        Formats the report for the LLM.
+
+        Returns:
+            str: The totals, followed by one line per gap.
+        """
+        lines = [
+            f"Functions: {self.functions_covered}/{self.functions_total}, "
+            f"lines: {self.lines_covered}/{self.lines_total}, "
+            f"branches: {self.branches_covered}/{self.branches_total} "
+            "covered."
+        ]
+        lines += [f"- {gap}" for gap in self.gaps]
+        return "\n".join(lines)
@@ -0,0 +1,51 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Data models for evaluating harnesses.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+# Outcomes of a fuzzing run
+OUTCOME_OK = "ok"
+OUTCOME_CRASH = "crash"
+OUTCOME_LEAK = "leak"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_OOM = "oom"
+OUTCOME_KILLED = "killed"
+OUTCOME_ERROR = "error"
+
+
+@dataclass
+class FuzzMetrics:
+    """Metrics of a fuzzing run, as reported by libFuzzer."""
+
+    execs: int = 0
+    execs_per_sec: int = 0
+    cov: int = 0
+    ft: int = 0
+    corpus_units: int = 0
+    corpus_bytes: int = 0
+    peak_rss_mb: int = 0
+    outcome: str = OUTCOME_OK
+    reason: str = ""
+    elapsed: float = 0.0
+    # Seconds into the run at which coverage stopped growing, if the run
+    # was stopped early because of it
+    plateau_at: Optional[float] = None
@@ -19,8 +19,10 @@
 Data models for project analysis.
 """
 
+import os
+import hashlib
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -30,6 +32,20 @@ class ProjectFile:
     path: str
     name: str
     content: str
+    digest: str = ""
+
+    def get_digest(self) -> str:
+        """
+        Returns the SHA-256 digest of the file's content.
+
+        Returns:
+            str: The hex digest, computed from the content if not known.
+        """
+        if not self.digest:
+            self.digest = hashlib.sha256(
+                self.content.encode("utf-8")
+            ).hexdigest()
+        return self.digest
 
 
 @dataclass
@@ -37,6 +53,27 @@ class ProjectInfo:
     """Contains information about a project."""
 
     files: List[ProjectFile]
+    root: Optional[str] = None
+
+    def get_fingerprint(self) -> str:
+        """
+        Returns a stable fingerprint of the project's files.
+
+        The fingerprint only depends on the files' paths (relative to the
+        project root, if known) and contents, so it can be used as a cache
+        key by later stages.
+
+        Returns:
+            str: The hex digest of the project.
+        """
+        entries = []
+        for file in self.files:
+            path = file.path
+            if self.root is not None:
+                path = os.path.relpath(path, self.root)
+            entries.append(f"{path}\0{file.get_digest()}\n")
+
+        return hashlib.sha256("".join(sorted(entries)).encode()).hexdigest()
 
     def get_concatenated_content(self) -> str:
         """
@@ -0,0 +1,49 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Data models for the functions worth fuzzing.
+"""
+
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class FuzzTarget:
+    """A function of the project, scored as an entry point for fuzzing."""
+
+    name: str
+    path: str
+    line: int
+    score: float = 0.0
+    # Lines of the functions the target reaches, itself included
+    reachable_lines: int = 0
+    # Number of the project's functions the target calls
+    fan_out: int = 0
+    # Why the target scored, e.g. `buffer and length`
+    reasons: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        """Formats the target as a line of a report."""
+        reasons = ", ".join(
+            self.reasons + [f"{self.reachable_lines} reachable lines"]
+        )
+        return (
+            f"{self.name} ({self.path}:{self.line}) "
+            f"score {self.score:.1f}: {reasons}"
+        )
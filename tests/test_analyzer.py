@@ -15,26 +15,23 @@
 # You should have received a copy of the GNU General Public License
 # along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
+import json
+import hashlib
 import pytest
 from unittest import mock
 from llm_harness.core.analyzer import ProjectAnalyzer
 from llm_harness.models.project import ProjectInfo
+from llm_harness.io.walker import ProjectTree
 from llm_harness.config import Config
 
 
 @pytest.fixture
-def mock_glob():
-    """Fixture to mock glob.glob"""
-    with mock.patch("glob.glob") as mock_glob:
-        yield mock_glob
-
-
-@pytest.fixture
-def mock_open():
-    """Fixture to mock built-in open function"""
-    mock_file = mock.mock_open(read_data="test file content")
-    with mock.patch("builtins.open", mock_file):
-        yield mock_file
+def project_dir(tmp_path):
+    """Fixture to create project files on disk"""
+    for name in ["file1.c", "header.h", "file2.cpp", "header2.hpp"]:
+        (tmp_path / name).write_text("test file content")
+    return tmp_path
 
 
 class TestProjectAnalyzer:
@@ -52,38 +49,46 @@ class TestProjectAnalyzer:
         assert analyzer.project_path == "/path/to/project"
         assert analyzer.file_patterns == ["*.cpp", "*.hpp"]
 
-    def test_find_project_files(self, mock_glob):
+    def test_find_project_files(self, tmp_path):
         """Test _find_project_files method."""
-        # Setup mock return values
-        mock_glob.side_effect = [
-            ["/path/to/project/file1.c", "/path/to/project/file2.c"],
-            ["/path/to/project/header.h"],
-        ]
+        (tmp_path / "src").mkdir()
+        (tmp_path / "build").mkdir()
+        (tmp_path / "file1.c").write_text("")
+        (tmp_path / "src" / "file2.c").write_text("")
+        (tmp_path / "src" / "header.h").write_text("")
+        (tmp_path / "build" / "generated.c").write_text("")
 
+        # Overlapping patterns must not produce duplicates
         analyzer = ProjectAnalyzer(
-            "/path/to/project", file_patterns=["*.c", "*.h"]
+            str(tmp_path), file_patterns=["*.c", "file*.c", "*.h"]
         )
         files = analyzer._find_project_files()
 
         # Assertions
-        assert len(files) == 3
-        assert "/path/to/project/file1.c" in files
-        assert "/path/to/project/file2.c" in files
-        assert "/path/to/project/header.h" in files
-        assert mock_glob.call_count == 2
-
-    def test_collect_project_info(self, mock_glob, mock_open):
-        """Test collect_project_info method."""
-        # Setup mock return values
-        mock_glob.side_effect = [
-            ["/path/to/project/file1.c"],
-            ["/path/to/project/header.h"],
-            ["/path/to/project/file2.cpp"],
-            ["/path/to/project/header2.hpp"],
-            [],
+        assert files == [
+            os.path.join(str(tmp_path), "file1.c"),
+            os.path.join(str(tmp_path), "src/file2.c"),
+            os.path.join(str(tmp_path), "src/header.h"),
         ]
 
-        analyzer = ProjectAnalyzer("/path/to/project")
+    def test_find_project_files_shared_tree(self, tmp_path):
+        """Test that a shared ProjectTree is walked only once."""
+        (tmp_path / "file1.c").write_text("")
+        tree = ProjectTree(str(tmp_path))
+
+        with mock.patch("os.scandir", side_effect=os.scandir) as m_scandir:
+            ProjectAnalyzer(
+                str(tmp_path), ["*.c"], tree=tree
+            ).collect_project_info()
+            ProjectAnalyzer(
+                str(tmp_path), ["*.h"], tree=tree
+            ).collect_project_info()
+
+        assert m_scandir.call_count == 1
+
+    def test_collect_project_info(self, project_dir):
+        """Test collect_project_info method."""
+        analyzer = ProjectAnalyzer(str(project_dir))
         project_info = analyzer.collect_project_info()
 
         # Assertions
@@ -91,10 +96,10 @@ class TestProjectAnalyzer:
         print(project_info.files)
         assert len(project_info.files) == 4
 
-        # Check file names are extracted correctly
+        # Check file names are extracted correctly, in path order
         assert project_info.files[0].name == "file1.c"
-        assert project_info.files[1].name == "header.h"
-        assert project_info.files[2].name == "file2.cpp"
+        assert project_info.files[1].name == "file2.cpp"
+        assert project_info.files[2].name == "header.h"
         assert project_info.files[3].name == "header2.hpp"
 
         # Check content is read correctly
@@ -103,30 +108,153 @@ class TestProjectAnalyzer:
         assert project_info.files[2].content == "test file content"
         assert project_info.files[3].content == "test file content"
 
-    def test_collect_project_info_empty(self, mock_glob):
+    def test_collect_project_info_empty(self, tmp_path):
         """Test collect_project_info with no matching files."""
-        # Setup mock return values to return empty lists
-        mock_glob.return_value = []
+        (tmp_path / "README.md").write_text("")
 
-        analyzer = ProjectAnalyzer("/path/to/project", file_patterns=["*.c"])
+        analyzer = ProjectAnalyzer(str(tmp_path), file_patterns=["*.c"])
         project_info = analyzer.collect_project_info()
 
         # Assertions
         assert isinstance(project_info, ProjectInfo)
         assert len(project_info.files) == 0
 
-    def test_collect_project_info_read_error(self, mock_glob):
+    def test_collect_project_info_read_error(self, project_dir):
         """Test collect_project_info with file read error."""
-        # Setup mock return values
-        mock_glob.side_effect = [[]]
+        analyzer = ProjectAnalyzer(str(project_dir), file_patterns=["*.c"])
+        analyzer.tree.files()
 
         # Mock open to raise an IOError
         with mock.patch("builtins.open", side_effect=IOError("Test IO Error")):
-            analyzer = ProjectAnalyzer(
-                "/path/to/project", file_patterns=["*.c"]
-            )
             project_info = analyzer.collect_project_info()
 
             # Assertions - should return empty ProjectInfo
             assert isinstance(project_info, ProjectInfo)
             assert len(project_info.files) == 0
+
+    def test_collect_project_info_size_caps(self, tmp_path):
+        """Test that files over the per-file and total caps are skipped."""
+        (tmp_path / "small.c").write_text("a" * 10)
+        (tmp_path / "blob.c").write_text("b" * 100)
+        (tmp_path / "other.c").write_text("c" * 30)
+
+        analyzer = ProjectAnalyzer(
+            str(tmp_path), ["*.c"], max_file_bytes=50, max_total_bytes=1000
+        )
+        names = {f.name for f in analyzer.collect_project_info().files}
+        assert names == {"small.c", "other.c"}
+
+        analyzer = ProjectAnalyzer(
+            str(tmp_path), ["*.c"], max_file_bytes=50, max_total_bytes=35
+        )
+        files = analyzer.collect_project_info().files
+        assert sum(len(f.content) for f in files) <= 35
+        assert len(files) == 1
+
+    def test_collect_project_info_parallel_order(self, tmp_path):
+        """Test that concurrent reads keep the order of the file list."""
+        paths = []
+        for i in range(50):
+            path = tmp_path / f"file{i}.c"
+            path.write_text(f"int f{i};\r\n")
+            paths.append(str(path))
+
+        analyzer = ProjectAnalyzer(str(tmp_path), ["*.c"], workers=8)
+        with mock.patch.object(
+            analyzer, "_find_project_files", return_value=paths
+        ):
+            files = analyzer.collect_project_info().files
+
+        assert [f.path for f in files] == paths
+        assert files[7].content == "int f7;\n"
+
+
+class TestIncrementalAnalysis:
+    """Tests for the incremental mode of ProjectAnalyzer."""
+
+    @pytest.fixture
+    def project(self, tmp_path):
+        """Fixture creating a small project on disk."""
+        (tmp_path / "file1.c").write_text("int f1(void) { return 1; }")
+        (tmp_path / "file2.c").write_text("int f2(void) { return 2; }")
+        (tmp_path / "header.h").write_text("int f1(void);")
+        return tmp_path
+
+    def test_manifest_written(self, project):
+        """Test that the manifest records every analyzed file."""
+        analyzer = ProjectAnalyzer(
+            str(project), ["*.c", "*.h"], incremental=True
+        )
+        project_info = analyzer.collect_project_info()
+
+        with open(analyzer.manifest_path) as f:
+            manifest = json.load(f)["files"]
+
+        assert len(project_info.files) == 3
+        assert set(manifest) == {"file1.c", "file2.c", "header.h"}
+        files = {file.name: file for file in project_info.files}
+        assert manifest["file1.c"]["digest"] == files["file1.c"].get_digest()
+
+    def test_only_changed_files_reread(self, project):
+        """Test that a rerun only re-reads files that changed."""
+        analyzer = ProjectAnalyzer(
+            str(project), ["*.c", "*.h"], incremental=True
+        )
+        first = analyzer.collect_project_info()
+
+        changed = project / "file2.c"
+        changed.write_text("int f2(void) { return 22; }")
+        stat = changed.stat()
+        os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        real_open = open
+        with mock.patch("builtins.open", side_effect=real_open) as m_open:
+            second = analyzer.collect_project_info()
+
+        read_paths = [
+            call.args[0]
+            for call in m_open.call_args_list
+            if call.args[1] == "rb"
+        ]
+        assert str(changed) in read_paths
+        assert str(project / "file1.c") not in read_paths
+        files = {file.name: file for file in second.files}
+        assert files["file2.c"].content == "int f2(void) { return 22; }"
+        assert first.get_fingerprint() != second.get_fingerprint()
+
+    def test_new_run_reuses_digests(self, project):
+        """Test that a new analyzer only hashes the files that changed."""
+        ProjectAnalyzer(
+            str(project), ["*.c", "*.h"], incremental=True
+        ).collect_project_info()
+
+        changed = project / "file2.c"
+        changed.write_text("int f2(void) { return 22; }")
+        stat = changed.stat()
+        os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        with mock.patch(
+            "llm_harness.core.analyzer.hashlib.sha256",
+            side_effect=hashlib.sha256,
+        ) as m_sha256:
+            project_info = ProjectAnalyzer(
+                str(project), ["*.c", "*.h"], incremental=True
+            ).collect_project_info()
+
+        assert m_sha256.call_count == 1
+        assert len(project_info.files) == 3
+
+    def test_fingerprint_stable_across_runs(self, project):
+        """Test that the fingerprint does not change without edits."""
+        first = ProjectAnalyzer(
+            str(project), ["*.c", "*.h"], incremental=True
+        ).collect_project_info()
+        second = ProjectAnalyzer(
+            str(project), ["*.c", "*.h"], incremental=True
+        ).collect_project_info()
+        plain = ProjectAnalyzer(
+            str(project), ["*.c", "*.h"]
+        ).collect_project_info()
+
+        assert first.get_fingerprint() == second.get_fingerprint()
+        assert first.get_fingerprint() == plain.get_fingerprint()
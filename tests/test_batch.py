@@ -0,0 +1,396 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import time
+import asyncio
+import threading
+import subprocess
+import pytest
+from unittest import mock
+from llm_harness.cli import parse_batch_arguments
+from llm_harness.config import Config
+from llm_harness.core.batch import BatchRunner, format_results
+from llm_harness.models.build import BuildResult
+from llm_harness.models.coverage import CoverageGap, CoverageReport
+from llm_harness.models.evaluation import FuzzMetrics
+
+# Coverage reached by each project's harness
+COVERAGE = {"alpha": 80, "beta": 5, "gamma": 40}
+
+
+@pytest.fixture
+def assets(tmp_path, monkeypatch):
+    """Fixture with a few small projects under `assets/`"""
+    for name in COVERAGE:
+        project = tmp_path / "assets" / name
+        project.mkdir(parents=True)
+        (project / f"{name}.c").write_text(f"int {name}(int x);\n")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def parse(argv):
+    """Parses batch arguments from a command line."""
+    with mock.patch("sys.argv", ["batch.py", *argv]):
+        return parse_batch_arguments()
+
+
+class FakePipeline:
+    """Fake stages, each taking a fixed time and counting its calls."""
+
+    def __init__(self, llm_delay=0.0, fuzz_delay=0.0):
+        self.llm_delay = llm_delay
+        self.fuzz_delay = fuzz_delay
+        self.generated = 0
+        self.generated_before_first_fuzz = None
+        self.lock = threading.Lock()
+
+    def generator(self, args):
+        generator = mock.MagicMock()
+        generator.model = args.model
+
+        def create_harness(project_info, target, candidate, writer):
+            time.sleep(self.llm_delay)
+            with self.lock:
+                self.generated += 1
+            writer.write("int LLVMFuzzerTestOneInput;\n")
+            return "int LLVMFuzzerTestOneInput;\n"
+
+        generator.create_harness.side_effect = create_harness
+        return generator
+
+    def builder(self, args, tree):
+        builder = mock.MagicMock()
+        builder.project_path = args.project_path
+        builder.prebuild.return_value = []
+        builder.build_harness.return_value = BuildResult(success=True)
+        return builder
+
+    def evaluator(self, args, executable, coverage=None):
+        evaluator = mock.MagicMock()
+        name = args.project_path.rstrip("/").split("/")[-1]
+        evaluator.metrics = FuzzMetrics(cov=COVERAGE[name])
+
+        def evaluate():
+            with self.lock:
+                if self.generated_before_first_fuzz is None:
+                    self.generated_before_first_fuzz = self.generated
+            time.sleep(self.fuzz_delay)
+            return evaluator.metrics.cov > 10
+
+        evaluator.evaulate_harness.side_effect = evaluate
+        return evaluator
+
+    def runner(self, **kwargs):
+        return BatchRunner(
+            generator_factory=self.generator,
+            builder_factory=self.builder,
+            evaluator_factory=self.evaluator,
+            **kwargs,
+        )
+
+
+class TestParseBatchArguments:
+    """Tests for parse_batch_arguments."""
+
+    def test_globs_and_targets(self, assets):
+        """Test expanding globs and per-project targets."""
+        args = parse(["a*:parse_alpha", "*a", "-t", "run"])
+
+        assert [(p.project_path, p.target) for p in args.projects] == [
+            ("./assets/alpha", "parse_alpha"),
+            ("./assets/alpha", "run"),
+            ("./assets/beta", "run"),
+            ("./assets/gamma", "run"),
+        ]
+
+    def test_duplicates_merged(self, assets):
+        """Test that a project matched twice for a target is run once."""
+        args = parse(["alpha", "a*", "alpha:parse_alpha"])
+
+        assert [(p.project_path, p.target) for p in args.projects] == [
+            ("./assets/alpha", Config.DEFAULT_TARGET),
+            ("./assets/alpha", "parse_alpha"),
+        ]
+
+    def test_no_match(self, assets):
+        """Test that patterns matching no project are rejected."""
+        with pytest.raises(FileNotFoundError):
+            parse(["missing"])
+
+
+class TestBatchRunner:
+    """Tests for the BatchRunner class."""
+
+    def test_results(self, assets):
+        """Test that every project gets a result, in order."""
+        pipeline = FakePipeline()
+        args = parse(["*", "-n", "2"])
+        results = asyncio.run(pipeline.runner().run(args.projects))
+
+        assert [r.name for r in results] == ["alpha", "beta", "gamma"]
+        assert [r.accepted for r in results] == [True, False, True]
+        assert all(len(r.candidates) == 2 for r in results)
+        assert pipeline.generated == 6
+
+        table = format_results(results).splitlines()
+        assert table[0].split() == [
+            "project",
+            "target",
+            "harness",
+            "model",
+            "status",
+            "outcome",
+            "cov",
+            "ft",
+            "exec/s",
+            "time",
+        ]
+        assert table[1].split()[:7] == [
+            "alpha",
+            Config.DEFAULT_TARGET,
+            "harness_0.c",
+            Config.DEFAULT_MODEL,
+            "accepted",
+            "ok",
+            "80",
+        ]
+
+    def test_targets_of_one_project(self, assets):
+        """Test that a project's targets share its builder, not harnesses."""
+        pipeline = FakePipeline()
+        builders = []
+        builder_factory = pipeline.builder
+
+        def builder(args, tree):
+            builders.append(builder_factory(args, tree))
+            return builders[-1]
+
+        runner = pipeline.runner()
+        runner.builder_factory = builder
+        args = parse(["alpha:parse_a", "alpha:parse_b", "beta"])
+        results = asyncio.run(runner.run(args.projects))
+
+        assert len(builders) == 2
+        assert builders[0].prebuild.call_count == 1
+        assert [r.best.harness_filename for r in results] == [
+            "harness_parse_a.c",
+            "harness_parse_b.c",
+            "harness.c",
+        ]
+        assert [r.best.executable for r in results] == [
+            "harness_parse_a",
+            "harness_parse_b",
+            "harness",
+        ]
+
+    def test_stages_overlap(self, assets):
+        """Test that projects are generated while others are fuzzed."""
+        pipeline = FakePipeline(llm_delay=0.3, fuzz_delay=0.3)
+        args = parse(["*"])
+        runner = pipeline.runner(llm_concurrency=1, fuzz_concurrency=1)
+
+        start = time.monotonic()
+        asyncio.run(runner.run(args.projects))
+
+        # Serially, each project would take 0.6s
+        assert time.monotonic() - start < 1.6
+
+    def test_backpressure(self, assets, monkeypatch):
+        """Test that generation stalls while the fuzzers are behind."""
+        for i in range(10):
+            project = assets / "assets" / f"delta{i}"
+            project.mkdir()
+            monkeypatch.setitem(COVERAGE, f"delta{i}", 0)
+        pipeline = FakePipeline(fuzz_delay=0.2)
+        args = parse(["delta*"])
+        runner = pipeline.runner(
+            llm_concurrency=1, compile_concurrency=1, fuzz_concurrency=1
+        )
+        asyncio.run(runner.run(args.projects))
+
+        assert pipeline.generated == 10
+        assert pipeline.generated_before_first_fuzz < 10
+
+    def test_cascade(self, assets):
+        """Test that rejected projects are run again with the next model."""
+        pipeline = FakePipeline()
+        models = []
+        generator_factory = pipeline.generator
+        evaluator_factory = pipeline.evaluator
+
+        def generator(args):
+            models.append(args.model)
+            return generator_factory(args)
+
+        def evaluator(args, executable, coverage=None):
+            evaluator = evaluator_factory(args, executable, coverage)
+            evaluator.evaulate_harness.side_effect = lambda: (
+                models[-1] == "gpt-4.1"
+            )
+            return evaluator
+
+        pipeline.generator = generator
+        pipeline.evaluator = evaluator
+        args = parse(["beta", "--cascade"])
+        (result,) = asyncio.run(pipeline.runner().run(args.projects))
+
+        assert models == Config.CASCADE_MODELS == ["gpt-4.1-mini", "gpt-4.1"]
+        assert result.accepted
+        assert (result.best.model, result.best.tier) == ("gpt-4.1", 1)
+        assert pipeline.generated == 2
+
+    def test_failures(self, assets):
+        """Test that failing projects do not stop the batch."""
+        pipeline = FakePipeline()
+        builder_factory = pipeline.builder
+
+        def builder(args, tree):
+            builder = builder_factory(args, tree)
+            if args.project_path.endswith("beta"):
+                builder.prebuild.side_effect = subprocess.CalledProcessError(
+                    1, "clang", stderr="beta.c: error"
+                )
+            return builder
+
+        pipeline.builder = builder
+        args = parse(["*"])
+        args.projects[2].project_path = "./assets/missing"
+        results = asyncio.run(pipeline.runner().run(args.projects))
+
+        assert results[0].accepted
+        assert results[1].best.build_output == "Error 1: beta.c: error"
+        assert not results[1].best.built
+        assert results[2].best is None
+        assert "failed" in format_results(results).splitlines()[3]
+
+    def test_repair(self, assets):
+        """Test that harnesses failing to build go back to the LLM."""
+        pipeline = FakePipeline()
+        builder_factory = pipeline.builder
+        repairs = []
+
+        def builder(args, tree):
+            builder = builder_factory(args, tree)
+            builder.build_harness.side_effect = [
+                BuildResult(
+                    success=False, output="Error 1: alpha.c:1:1: error: x"
+                ),
+                BuildResult(
+                    success=False, output="Error 1: alpha.c:1:1: error: y"
+                ),
+                BuildResult(success=True),
+            ]
+            return builder
+
+        def generator(args):
+            generator = generator_factory(args)
+            generator.repair_harness.side_effect = (
+                lambda project_info, target, build_errors, candidate, writer: (
+                    repairs.append(len(build_errors)) or "// repaired\n"
+                )
+            )
+            return generator
+
+        generator_factory = pipeline.generator
+        pipeline.builder = builder
+        pipeline.generator = generator
+        args = parse(["alpha"])
+        (result,) = asyncio.run(pipeline.runner().run(args.projects))
+
+        assert result.accepted
+        assert repairs == [1, 2]
+        assert result.best.harness == "// repaired\n"
+        assert [errors for _, errors in result.best.build_errors] == [
+            "alpha.c:1:1: error: x",
+            "alpha.c:1:1: error: y",
+        ]
+
+        # Without repairs, the first failure is final
+        args = parse(["alpha", "--repair-attempts", "0"])
+        (result,) = asyncio.run(pipeline.runner().run(args.projects))
+        assert not result.best.built
+        assert repairs == [1, 2]
+
+    def test_refine(self, assets):
+        """Test that the best harness is refined given its coverage."""
+        pipeline = FakePipeline()
+        evaluator_factory = pipeline.evaluator
+        generator_factory = pipeline.generator
+        report = CoverageReport(
+            gaps=[CoverageGap("alpha.c", 1, "alpha", "never called")]
+        )
+        collectors = []
+        refined = []
+
+        def coverage(args, analyzer, project_info, tree):
+            collectors.append(mock.MagicMock())
+            return collectors[-1]
+
+        def evaluator(args, executable, coverage=None):
+            assert coverage is collectors[-1]
+            evaluator = evaluator_factory(args, executable, coverage)
+            evaluator.measure_coverage.return_value = report
+            return evaluator
+
+        def generator(args):
+            generator = generator_factory(args)
+            generator.refine_harness.side_effect = (
+                lambda project_info, target, harness, coverage, *args: (
+                    refined.append(coverage) or "// refined\n"
+                )
+            )
+            return generator
+
+        pipeline.evaluator = evaluator
+        pipeline.generator = generator
+        args = parse(["alpha", "--refine", "2"])
+        runner = pipeline.runner(coverage_factory=coverage)
+        (result,) = asyncio.run(runner.run(args.projects))
+
+        assert refined == [report, report]
+        # On a coverage tie the original stays best, and is refined again
+        original, *refinements = result.candidates
+        assert [c.refines for c in refinements] == [original, original]
+        assert result.accepted
+        assert all(c.coverage is report for c in result.candidates)
+
+    def test_refine_targets_of_one_project(self, assets):
+        """Test that the refinements of a project's targets keep apart."""
+        pipeline = FakePipeline()
+        evaluator_factory = pipeline.evaluator
+        report = CoverageReport(
+            gaps=[CoverageGap("alpha.c", 1, "alpha", "never called")]
+        )
+
+        def evaluator(args, executable, coverage=None):
+            evaluator = evaluator_factory(args, executable, coverage)
+            evaluator.measure_coverage.return_value = report
+            return evaluator
+
+        pipeline.evaluator = evaluator
+        args = parse(["alpha:parse_a", "alpha:parse_b", "--refine", "1"])
+        runner = pipeline.runner(
+            coverage_factory=lambda *args: mock.MagicMock()
+        )
+        results = asyncio.run(runner.run(args.projects))
+
+        names = [{c.harness_filename for c in r.candidates} for r in results]
+        assert names == [
+            {"harness_parse_a.c", "harness_parse_a_1.c"},
+            {"harness_parse_b.c", "harness_parse_b_1.c"},
+        ]
@@ -0,0 +1,308 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import time
+import shutil
+import threading
+import pytest
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from llm_harness.core.builder import HarnessBuilder
+from llm_harness.io.walker import ProjectTree
+from llm_harness.models.build import Diagnostic
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Fixture to create a nested C project on disk"""
+    paths = [
+        "main.c",
+        "src/util.c",
+        "src/util.h",
+        "build/generated.c",
+        "harnesses/harness.c",
+        "harnesses/old_harness.c",
+    ]
+    for path in paths:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+    return tmp_path
+
+
+class TestHarnessBuilder:
+    """Tests for the HarnessBuilder class."""
+
+    @mock.patch("subprocess.run")
+    def test_build_harness_sources(self, mock_run, project):
+        """Test that nested sources are compiled and harnesses skipped."""
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "ok", "")
+
+        builder = HarnessBuilder(str(project))
+        result = builder.build_harness()
+
+        compiled = sorted(
+            call.args[0][-3]
+            for call in mock_run.call_args_list
+            if "-c" in call.args[0]
+        )
+        link = mock_run.call_args.args[0]
+        assert result.success
+        assert result.output == "ok"
+        assert compiled == ["main.c", "src/util.c"]
+        assert "harnesses/harness.c" in link
+        assert sum(arg.endswith(".o") for arg in link) == 2
+        assert "harnesses/old_harness.c" not in link
+        assert "build/generated.c" not in link
+
+    @mock.patch("subprocess.run")
+    def test_prebuilt_objects_reused(self, mock_run, project):
+        """Test that the sources are compiled once per fingerprint."""
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "", "")
+        builder = HarnessBuilder(str(project))
+
+        builder.build_harness()
+        assert mock_run.call_count == 4
+
+        mock_run.reset_mock()
+        builder.build_harness("other_harness.c")
+        assert mock_run.call_count == 2
+        assert "harnesses/other_harness.c" in mock_run.call_args.args[0]
+
+        # Headers are compiled into the objects, so they are part of the key
+        (project / "src" / "util.h").write_text("#define CHANGED 1\n")
+        mock_run.reset_mock()
+        builder.build_harness()
+        assert mock_run.call_count == 4
+
+    @mock.patch("subprocess.run")
+    def test_concurrent_builds_share_prebuild(self, mock_run, project):
+        """Test that harnesses built at once compile the sources once."""
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "", "")
+        builder = HarnessBuilder(str(project))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(
+                executor.map(
+                    lambda i: builder.build_harness(f"h{i}.c", f"h{i}"),
+                    range(4),
+                )
+            )
+
+        commands = [call.args[0] for call in mock_run.call_args_list]
+        assert sum("-c" in command for command in commands) == 2
+        links = [
+            command
+            for command in commands
+            if "-c" not in command and "-fsyntax-only" not in command
+        ]
+        assert sorted(command[-1] for command in links) == [
+            "h0",
+            "h1",
+            "h2",
+            "h3",
+        ]
+
+    @mock.patch("subprocess.run")
+    def test_builders_of_one_project_share_prebuild(self, mock_run, project):
+        """Test that builders of the same objects compile the sources once."""
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "", "")
+        builders = [HarnessBuilder(str(project)) for _ in range(4)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda builder: builder.prebuild(), builders))
+
+        assert mock_run.call_count == 2
+
+    @mock.patch("subprocess.run")
+    def test_prebuild_failure(self, mock_run, project):
+        """Test that a project source failing to compile is flagged."""
+
+        def run(command, **kwargs):
+            if "-c" in command and command[-3] == "main.c":
+                raise subprocess.CalledProcessError(
+                    1, command, "", "main.c:1:1: error: bad"
+                )
+            return subprocess.CompletedProcess(command, 0, "", "")
+
+        mock_run.side_effect = run
+        result = HarnessBuilder(str(project)).build_harness()
+
+        assert not result.success
+        assert result.prebuild_failed
+        assert "main.c:1:1: error: bad" in result.output
+
+    @mock.patch("subprocess.run")
+    def test_concurrent_builds_own_diagnostics(self, mock_run, project):
+        """Test that harnesses built at once get their own diagnostics."""
+
+        def run(command, **kwargs):
+            if "-fsyntax-only" in command:
+                # The first harness is checked while the second is
+                time.sleep(0.1 if command[-1].endswith("h0.c") else 0)
+                return subprocess.CompletedProcess(
+                    command, 1, "", f"{command[-1]}:1:1: error: bad\n"
+                )
+            return subprocess.CompletedProcess(command, 0, "", "")
+
+        mock_run.side_effect = run
+        builder = HarnessBuilder(str(project))
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(
+                executor.map(
+                    lambda i: builder.build_harness(f"h{i}.c", f"h{i}"),
+                    range(2),
+                )
+            )
+
+        assert [r.success for r in results] == [False, False]
+        assert [r.diagnostics[0].file for r in results] == [
+            "harnesses/h0.c",
+            "harnesses/h1.c",
+        ]
+
+    @mock.patch("subprocess.run")
+    def test_background_prebuild(self, mock_run, project):
+        """Test that a build waits for the background prebuild."""
+        threads = {}
+
+        def run(command, **kwargs):
+            if "-c" in command:
+                time.sleep(0.2)
+                threads[command[-3]] = threading.current_thread().name
+            return subprocess.CompletedProcess([], 0, "", "")
+
+        mock_run.side_effect = run
+        builder = HarnessBuilder(str(project))
+        pending = builder.start_prebuild()
+        assert not pending.done()
+
+        builder.build_harness()
+        assert pending.done()
+        assert len(pending.result()) == 2
+        assert sorted(threads) == ["main.c", "src/util.c"]
+        assert "MainThread" not in threads.values()
+        # The sources are compiled once, and the syntax check and the link
+        # run once
+        assert mock_run.call_count == 4
+
+    @mock.patch("subprocess.run")
+    def test_build_harness_shared_tree(self, mock_run, project):
+        """Test that the builder reuses a shared listing."""
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "", "")
+        tree = ProjectTree(str(project))
+        tree.files()
+
+        with mock.patch("os.scandir") as mock_scandir:
+            HarnessBuilder(str(project), tree=tree).build_harness()
+        mock_scandir.assert_not_called()
+
+    @mock.patch("subprocess.run")
+    def test_build_harness_error(self, mock_run, project):
+        """Test that compilation errors are reported."""
+
+        def run(command, **kwargs):
+            if "-c" in command or "-fsyntax-only" in command:
+                return subprocess.CompletedProcess(command, 0, "", "")
+            raise subprocess.CalledProcessError(
+                1, "clang", output="", stderr="syntax error"
+            )
+
+        mock_run.side_effect = run
+
+        result = HarnessBuilder(str(project)).build_harness()
+        assert not result.success
+        assert result.output == "Error 1: syntax error"
+
+    @mock.patch("subprocess.run")
+    def test_prebuild_errors_per_file(self, mock_run, project):
+        """Test that every failing source is reported, and nothing linked."""
+
+        def run(command, **kwargs):
+            if "src/util.c" in command:
+                raise subprocess.CalledProcessError(
+                    1, "clang", output="", stderr="util.c:1: error\n"
+                )
+            return subprocess.CompletedProcess(command, 0, "", "")
+
+        mock_run.side_effect = run
+        builder = HarnessBuilder(str(project), jobs=2)
+
+        result = builder.build_harness()
+        assert not result.success
+        assert result.output == "Error 1: src/util.c:\nutil.c:1: error\n"
+        assert builder.failures == {"src/util.c": "util.c:1: error\n"}
+        assert mock_run.call_count == 3
+
+        # Failed prebuilds are not reused
+        mock_run.side_effect = None
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "", "")
+        mock_run.reset_mock()
+        builder.build_harness()
+        assert mock_run.call_count == 4
+        assert builder.failures == {}
+
+    @mock.patch("subprocess.run")
+    def test_syntax_errors_stop_build(self, mock_run, project):
+        """Test that a harness failing the syntax check is not built."""
+        mock_run.return_value = subprocess.CompletedProcess(
+            [],
+            1,
+            "",
+            "harnesses/harness.c:3:5: error: expected ';' after expression\n"
+            "    3 |     x\n"
+            "harnesses/harness.c:1:1: warning: unused include\n",
+        )
+        builder = HarnessBuilder(str(project))
+
+        result = builder.build_harness()
+        assert not result.success
+        assert result.output == (
+            "Error 1: harnesses/harness.c:3:5: error: "
+            "expected ';' after expression"
+        )
+        assert mock_run.call_count == 1
+        assert "-fsyntax-only" in mock_run.call_args.args[0]
+        assert result.diagnostics == [
+            Diagnostic(
+                "harnesses/harness.c",
+                3,
+                5,
+                "error",
+                "expected ';' after expression",
+            ),
+            Diagnostic(
+                "harnesses/harness.c", 1, 1, "warning", "unused include"
+            ),
+        ]
+
+    @pytest.mark.skipif(shutil.which("gcc") is None, reason="needs gcc")
+    def test_check_syntax(self, project):
+        """Test the syntax check with a real compiler."""
+        (project / "src" / "util.h").write_text("int util(int x);\n")
+        (project / "harnesses" / "harness.c").write_text(
+            '#include "src/util.h"\nint f(void) { return util(1) }\n'
+        )
+        builder = HarnessBuilder(str(project))
+        builder.cc = "gcc"
+
+        diagnostics = builder.check_syntax("harnesses/harness.c")
+        errors = [d for d in diagnostics if d.is_error]
+        assert len(errors) == 1
+        assert errors[0].file == "harnesses/harness.c"
+        assert errors[0].line == 2
@@ -0,0 +1,78 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import time
+from llm_harness.io.cache import DiskCache
+
+
+class TestDiskCache:
+    """Tests for the DiskCache class."""
+
+    def test_make_key_is_deterministic(self):
+        """Test that equal parts produce equal keys."""
+        key1 = DiskCache.make_key("gpt-4o", 1, {"b": 2, "a": 1})
+        key2 = DiskCache.make_key("gpt-4o", 1, {"a": 1, "b": 2})
+        key3 = DiskCache.make_key("gpt-4o", 2, {"a": 1, "b": 2})
+
+        assert key1 == key2
+        assert key1 != key3
+
+    def test_get_miss(self, tmp_path):
+        """Test looking up a missing entry."""
+        cache = DiskCache(str(tmp_path))
+        assert cache.get(DiskCache.make_key("missing")) is None
+
+    def test_put_and_get(self, tmp_path):
+        """Test storing and retrieving an entry."""
+        cache = DiskCache(str(tmp_path))
+        key = DiskCache.make_key("prompt")
+        cache.put(key, b"response")
+
+        assert cache.get(key) == b"response"
+        assert cache.size() == len(b"response")
+
+    def test_eviction_is_lru(self, tmp_path):
+        """Test that least recently used entries are evicted first."""
+        cache = DiskCache(str(tmp_path), max_bytes=20)
+        keys = [DiskCache.make_key(i) for i in range(3)]
+
+        cache.put(keys[0], b"0" * 8)
+        cache.put(keys[1], b"1" * 8)
+
+        # Make the first entry older, then use it again
+        old = time.time() - 100
+        os.utime(cache._path(keys[0]), (old, old))
+        os.utime(cache._path(keys[1]), (old + 1, old + 1))
+        assert cache.get(keys[0]) is not None
+
+        cache.put(keys[2], b"2" * 8)
+
+        assert cache.get(keys[0]) == b"0" * 8
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) == b"2" * 8
+        assert cache.size() <= 20
+
+    def test_clear(self, tmp_path):
+        """Test removing all entries."""
+        cache = DiskCache(str(tmp_path))
+        key = DiskCache.make_key("prompt")
+        cache.put(key, b"response")
+        cache.clear()
+
+        assert cache.get(key) is None
+        assert cache.size() == 0
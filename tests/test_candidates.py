@@ -0,0 +1,338 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import time
+import pytest
+from unittest import mock
+from llm_harness.core.candidates import CandidateRunner
+from llm_harness.io.file_manager import FileManager
+from llm_harness.models.build import BuildResult
+from llm_harness.models.coverage import CoverageGap, CoverageReport
+from llm_harness.models.evaluation import FuzzMetrics
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+PROJECT_INFO = ProjectInfo(
+    files=[ProjectFile(path="a.c", name="a.c", content="int a;")]
+)
+
+# Coverage reached by each candidate's harness
+COVERAGE = {0: 30, 1: 80, 2: 50}
+
+
+@pytest.fixture
+def builder(tmp_path):
+    """Fixture of a builder creating empty executables"""
+    builder = mock.MagicMock()
+    builder.project_path = str(tmp_path)
+
+    def build_harness(harness_filename, executable):
+        (tmp_path / executable).write_text("")
+        return BuildResult(success=True)
+
+    builder.build_harness.side_effect = build_harness
+    return builder
+
+
+def make_evaluator(executable):
+    """Creates a fake evaluator, rating each candidate by COVERAGE."""
+    evaluator = mock.MagicMock()
+    index = executable.rsplit("_", 1)[-1]
+    evaluator.metrics = FuzzMetrics(cov=COVERAGE[int(index)])
+    evaluator.evaulate_harness.return_value = evaluator.metrics.cov > 40
+    return evaluator
+
+
+def make_generator(delay=0.0):
+    """Creates a fake generator, which takes `delay` seconds per call."""
+    generator = mock.MagicMock()
+
+    def create_harness(project_info, target, candidate, writer):
+        time.sleep(delay)
+        writer.write(f"// candidate {candidate}\n")
+        return f"// candidate {candidate}\n"
+
+    generator.create_harness.side_effect = create_harness
+    return generator
+
+
+class TestCandidateRunner:
+    """Tests for the CandidateRunner class."""
+
+    def test_keeps_best(self, tmp_path, builder):
+        """Test that candidates are ranked and only the best is kept."""
+        runner = CandidateRunner(
+            make_generator(),
+            FileManager(str(tmp_path)),
+            builder,
+            make_evaluator,
+        )
+        ranked = runner.run(PROJECT_INFO, "parse", 3)
+
+        assert [c.index for c in ranked] == [1, 2, 0]
+        assert ranked[0].accepted and ranked[1].accepted
+        assert not ranked[2].accepted
+        for i in range(3):
+            harness = tmp_path / "harnesses" / f"harness_{i}.c"
+            assert harness.read_text() == f"// candidate {i}\n"
+        assert os.path.exists(tmp_path / "harness_1")
+        assert not os.path.exists(tmp_path / "harness_0")
+        assert not os.path.exists(tmp_path / "harness_2")
+
+    def test_single_candidate_default_names(self, tmp_path, builder):
+        """Test that a lone candidate is named like a single harness."""
+        runner = CandidateRunner(
+            make_generator(),
+            FileManager(str(tmp_path)),
+            builder,
+            lambda executable: make_evaluator("harness_0"),
+        )
+        (best,) = runner.run(PROJECT_INFO, "parse", 1)
+
+        assert best.harness_filename == "harness.c"
+        assert best.executable == "harness"
+        builder.build_harness.assert_called_once_with("harness.c", "harness")
+
+    def test_named_by_target(self, tmp_path, builder):
+        """Test that candidates can be named after their target."""
+        runner = CandidateRunner(
+            make_generator(),
+            FileManager(str(tmp_path)),
+            builder,
+            make_evaluator,
+            name_by_target=True,
+        )
+        ranked = runner.run(PROJECT_INFO, "parse", 2)
+
+        assert [c.harness_filename for c in ranked] == [
+            "harness_parse_1.c",
+            "harness_parse_0.c",
+        ]
+        assert os.path.exists(tmp_path / "harness_parse_1")
+
+    def test_concurrent(self, tmp_path, builder):
+        """Test that the wall time is close to a single candidate's."""
+        runner = CandidateRunner(
+            make_generator(delay=0.5),
+            FileManager(str(tmp_path)),
+            builder,
+            make_evaluator,
+            llm_concurrency=3,
+        )
+        start = time.monotonic()
+        runner.run(PROJECT_INFO, "parse", 3)
+
+        assert time.monotonic() - start < 1.0
+
+    def test_llm_concurrency_cap(self, tmp_path, builder):
+        """Test that no more LLM calls than the cap run at once."""
+        runner = CandidateRunner(
+            make_generator(delay=0.3),
+            FileManager(str(tmp_path)),
+            builder,
+            make_evaluator,
+            llm_concurrency=1,
+        )
+        start = time.monotonic()
+        runner.run(PROJECT_INFO, "parse", 3)
+
+        assert time.monotonic() - start >= 0.9
+
+    def test_failed_candidates(self, tmp_path, builder):
+        """Test that failing candidates do not stop the others."""
+        generator = make_generator()
+        generator.create_harness.side_effect = [
+            Exception("rate limited"),
+            "// candidate\n",
+            "// candidate\n",
+        ]
+        builds = iter(
+            [
+                BuildResult(success=False, output="Error 1: syntax error"),
+                BuildResult(success=True),
+            ]
+        )
+        builder.build_harness.side_effect = lambda *args: next(builds)
+        runner = CandidateRunner(
+            generator,
+            FileManager(str(tmp_path)),
+            builder,
+            make_evaluator,
+            llm_concurrency=1,
+            build_concurrency=1,
+            repair_attempts=0,
+        )
+        ranked = runner.run(PROJECT_INFO, "parse", 3)
+
+        assert ranked[0].built
+        assert ranked[0].error == ""
+        assert [c.built for c in ranked] == [True, False, False]
+        assert ranked[2].error == "rate limited"
+        assert ranked[2].metrics.outcome == "error"
+
+    def test_repair(self, tmp_path, builder):
+        """Test that harnesses failing to build are sent back to the LLM."""
+        generator = make_generator()
+        generator.repair_harness.side_effect = (
+            lambda project_info, target, build_errors, candidate, writer: (
+                f"// repair {len(build_errors)}\n"
+            )
+        )
+        builds = iter(
+            [
+                BuildResult(
+                    success=False,
+                    output="Error 1: harnesses/harness.c:1:4: error: "
+                    "unknown type",
+                ),
+                BuildResult(
+                    success=False,
+                    output="Error 1: /usr/bin/ld: undefined reference to "
+                    "`parse'",
+                ),
+                BuildResult(success=True),
+            ]
+        )
+        builder.build_harness.side_effect = lambda *args: next(builds)
+        runner = CandidateRunner(
+            generator,
+            FileManager(str(tmp_path)),
+            builder,
+            lambda executable: make_evaluator("harness_1"),
+        )
+        (best,) = runner.run(PROJECT_INFO, "parse", 1)
+
+        assert best.built and best.accepted
+        assert best.harness == "// repair 2\n"
+        assert best.build_errors == [
+            (
+                "// candidate 0\n",
+                "harnesses/harness.c:1:4: error: unknown type\n"
+                "    // candidate 0",
+            ),
+            ("// repair 1\n", "/usr/bin/ld: undefined reference to `parse'"),
+        ]
+
+    def test_repair_budget(self, tmp_path, builder):
+        """Test that repairs stop after the allowed rounds."""
+        generator = make_generator()
+        generator.repair_harness.return_value = "// still broken\n"
+        builder.build_harness.side_effect = None
+        builder.build_harness.return_value = BuildResult(
+            success=False, output="Error 1: a.c:1:1: error: x"
+        )
+        runner = CandidateRunner(
+            generator,
+            FileManager(str(tmp_path)),
+            builder,
+            make_evaluator,
+            repair_attempts=2,
+        )
+        (best,) = runner.run(PROJECT_INFO, "parse", 1)
+
+        assert not best.built
+        assert best.repairs == 2
+        assert builder.build_harness.call_count == 3
+
+        # Out of time before the first round
+        runner.repair_time = 0
+        (best,) = runner.run(PROJECT_INFO, "parse", 1)
+        assert best.repairs == 0
+
+    def test_no_repair_of_project_sources(self, tmp_path, builder):
+        """Test that a project that fails to compile is not repaired."""
+        generator = make_generator()
+        builder.build_harness.side_effect = None
+        builder.build_harness.return_value = BuildResult(
+            success=False,
+            output="Error 1: main.c:1:1: error: x",
+            prebuild_failed=True,
+        )
+        runner = CandidateRunner(
+            generator,
+            FileManager(str(tmp_path)),
+            builder,
+            make_evaluator,
+            repair_attempts=2,
+        )
+        (best,) = runner.run(PROJECT_INFO, "parse", 1)
+
+        assert not best.built
+        assert best.repairs == 0
+        assert builder.build_harness.call_count == 1
+        generator.repair_harness.assert_not_called()
+
+    def test_refine(self, tmp_path, builder, monkeypatch):
+        """Test that the best candidate is refined given its coverage."""
+        monkeypatch.setitem(COVERAGE, 3, 90)
+        monkeypatch.setitem(COVERAGE, 4, 20)
+        report = CoverageReport(
+            gaps=[CoverageGap("a.c", 1, "parse", "never called")]
+        )
+
+        def evaluator_factory(executable):
+            evaluator = make_evaluator(executable)
+            evaluator.measure_coverage.return_value = report
+            return evaluator
+
+        generator = make_generator()
+        generator.refine_harness.side_effect = (
+            lambda project_info, target, harness, coverage, *args: (
+                f"// refines {harness}"
+            )
+        )
+        runner = CandidateRunner(
+            generator,
+            FileManager(str(tmp_path)),
+            builder,
+            evaluator_factory,
+            refine_rounds=2,
+        )
+        ranked = runner.run_cascade(PROJECT_INFO, "parse", 3, [generator])
+
+        # The first refinement improves on harness_1, the second does not
+        assert [c.index for c in ranked] == [3, 1, 2, 0, 4]
+        assert ranked[0].refines is ranked[1]
+        assert ranked[0].refinement == 1
+        assert ranked[0].harness == "// refines // candidate 1\n"
+        assert ranked[-1].refines is ranked[0]
+        assert generator.refine_harness.call_args.args[3] is report
+        assert os.path.exists(tmp_path / "harness_3")
+        assert not os.path.exists(tmp_path / "harness_4")
+
+    def test_cascade(self, tmp_path, builder):
+        """Test escalating to the next model only when none is accepted."""
+        small, large = make_generator(), make_generator()
+        small.model, large.model = "small", "large"
+        runner = CandidateRunner(
+            small, FileManager(str(tmp_path)), builder, make_evaluator
+        )
+
+        # harness_1 is accepted, so the large model is never called
+        ranked = runner.run_cascade(PROJECT_INFO, "parse", 2, [small, large])
+        assert ranked[0].accepted
+        assert (ranked[0].model, ranked[0].tier) == ("small", 0)
+        large.create_harness.assert_not_called()
+
+        # harness_0 alone is rejected, so the large model is called
+        ranked = runner.run_cascade(PROJECT_INFO, "parse", 1, [small, large])
+        assert not ranked[0].accepted
+        assert (ranked[0].model, ranked[0].tier) == ("large", 1)
+        large.create_harness.assert_called_once()
+        # The large model's harness keeps the small one's
+        assert ranked[0].harness_filename == "harness_t1.c"
+        assert (tmp_path / "harnesses" / "harness.c").exists()
@@ -103,3 +103,62 @@ def test_parse_arguments_nonexistent_project(mock_argparse):
         # Call the function - should raise FileNotFoundError
         with pytest.raises(FileNotFoundError):
             parse_arguments()
+
+
+def test_parse_arguments_cache_flags(mock_os_path_exists):
+    """Test the response cache switches."""
+    with mock.patch("sys.argv", ["main.py", "test_project"]):
+        args = parse_arguments()
+    assert args.use_cache is True
+    assert args.refresh_cache is False
+
+    argv = ["main.py", "test_project", "--no-cache", "--refresh"]
+    with mock.patch("sys.argv", argv):
+        args = parse_arguments()
+    assert args.use_cache is False
+    assert args.refresh_cache is True
+
+
+def test_parse_arguments_cascade(mock_os_path_exists):
+    """Test the model cascade's tiers."""
+    with mock.patch("sys.argv", ["main.py", "test_project"]):
+        assert parse_arguments().cascade == []
+
+    with mock.patch("sys.argv", ["main.py", "test_project", "--cascade"]):
+        assert parse_arguments().cascade == Config.CASCADE_MODELS
+
+    argv = ["main.py", "test_project", "--cascade", "gpt-4o-mini", "gpt-4o"]
+    with mock.patch("sys.argv", argv):
+        assert parse_arguments().cascade == ["gpt-4o-mini", "gpt-4o"]
+
+
+def test_parse_arguments_targets(mock_os_path_exists):
+    """Test the targets of a multi-target run."""
+    with mock.patch("sys.argv", ["main.py", "test_project"]):
+        assert parse_arguments().targets == []
+
+    argv = ["main.py", "test_project", "--targets", "parse", "load"]
+    with mock.patch("sys.argv", argv):
+        assert parse_arguments().targets == ["parse", "load"]
+
+
+def test_parse_arguments_discover(mock_os_path_exists):
+    """Test the number of targets to discover."""
+    with mock.patch("sys.argv", ["main.py", "test_project"]):
+        assert parse_arguments().discover is None
+
+    argv = ["main.py", "test_project", "--discover", "3"]
+    with mock.patch("sys.argv", argv):
+        assert parse_arguments().discover == 3
+
+
+def test_parse_arguments_fuzz_time(mock_os_path_exists):
+    """Test that the fuzzing time must be positive."""
+    argv = ["main.py", "test_project", "--fuzz-time", "30"]
+    with mock.patch("sys.argv", argv):
+        assert parse_arguments().fuzz_time == 30
+
+    for value in ("0", "-5"):
+        argv = ["main.py", "test_project", "--fuzz-time", value]
+        with mock.patch("sys.argv", argv), pytest.raises(SystemExit):
+            parse_arguments()
@@ -0,0 +1,90 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import shutil
+import pytest
+from llm_harness.core.builder import HarnessBuilder
+from llm_harness.core.compilation import CompilationCache
+from llm_harness.io.cache import DiskCache
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("gcc") is None, reason="gcc is not installed"
+)
+
+SOURCE = '#include "util.h"\nint twice(int x) { return x * FACTOR; }\n'
+
+
+def make_project(path, factor=2):
+    """Creates a one-source project."""
+    path.mkdir()
+    (path / "util.c").write_text(SOURCE)
+    (path / "util.h").write_text(f"#define FACTOR {factor}\n")
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture for an empty compilation cache."""
+    return CompilationCache(DiskCache(str(tmp_path / "cache")))
+
+
+class TestCompilationCache:
+    """Tests for the CompilationCache class."""
+
+    def test_hit_across_projects(self, cache, tmp_path):
+        """Test that identical sources are compiled once, anywhere."""
+        first = make_project(tmp_path / "first")
+        second = make_project(tmp_path / "second")
+
+        assert cache.compile("gcc", ["-I."], "util.c", "a.o", first) is None
+        assert cache.compile("gcc", ["-I."], "util.c", "b.o", second) is None
+
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert (tmp_path / "second" / "b.o").read_bytes() == (
+            tmp_path / "first" / "a.o"
+        ).read_bytes()
+        assert cache.stats() == "1 hits, 1 misses (50% hit rate)"
+
+    def test_miss_on_header_or_flags_change(self, cache, tmp_path):
+        """Test that the key covers included headers and the flags."""
+        first = make_project(tmp_path / "first")
+        second = make_project(tmp_path / "second", factor=3)
+
+        cache.compile("gcc", ["-I."], "util.c", "a.o", first)
+        cache.compile("gcc", ["-I."], "util.c", "a.o", second)
+        cache.compile("gcc", ["-I.", "-O2"], "util.c", "b.o", first)
+
+        assert (cache.hits, cache.misses) == (0, 3)
+
+    def test_errors(self, cache, tmp_path):
+        """Test that compiler errors are returned and not cached."""
+        project = make_project(tmp_path / "project")
+        (tmp_path / "project" / "util.c").write_text("int broken(\n")
+
+        error = cache.compile("gcc", ["-I."], "util.c", "a.o", project)
+        assert error is not None and "util.c" in error
+        assert cache.cache.size() == 0
+
+    def test_builder_uses_cache(self, cache, tmp_path):
+        """Test that a fresh checkout's prebuild is served from the cache."""
+        for name in ("first", "second"):
+            project = make_project(tmp_path / name)
+            builder = HarnessBuilder(project, compilation_cache=cache)
+            builder.cc, builder.cflags = "gcc", ["-g"]
+            builder.prebuild()
+
+        assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,167 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+from llm_harness.core.compressor import (
+    PromptCompressor,
+    collapse_whitespace,
+    dedupe_includes,
+)
+from llm_harness.core.csource import strip_comments
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+LICENSE = """/*
+ * Copyright (C) 2025 Someone
+ *
+ * Licensed under the Apache License, Version 2.0.
+ */
+"""
+
+SOURCE = (
+    LICENSE
+    + """#include <stdio.h>
+#include <stdio.h>
+
+// Parses a date
+int   dateparse(const char *s)   {
+    puts("a  // not a comment");    /* inline */
+    return helper(s);
+}
+"""
+)
+
+HELPERS = (
+    LICENSE
+    + """#include "date.h"
+
+static int helper(const char *s) {
+    return s[0] == 'x';
+}
+"""
+)
+
+
+def make_file(name, content):
+    """Creates a project file named after its path."""
+    return ProjectFile(path=name, name=name, content=content)
+
+
+class TestCompressionPasses:
+    """Tests for the individual compression passes."""
+
+    def test_strip_comments(self):
+        """Test that comments go and literals stay."""
+        stripped = strip_comments(SOURCE)
+
+        assert "Copyright" not in stripped
+        assert "Parses a date" not in stripped
+        assert "inline" not in stripped
+        assert '"a  // not a comment"' in stripped
+
+    def test_block_comment_keeps_lines_apart(self):
+        """Test that code around a multi-line comment stays on two lines."""
+        stripped = strip_comments("#define A 1 /* a\n b */ int x;\n")
+
+        assert stripped.splitlines()[0].strip() == "#define A 1"
+
+    def test_collapse_whitespace(self):
+        """Test that blanks collapse outside of literals."""
+        collapsed = collapse_whitespace(
+            '\n\n    int   x  =  1;\t\n  char *s = "a   b";\n\n'
+        )
+
+        assert collapsed == 'int x = 1;\nchar *s = "a   b";\n'
+
+    def test_dedupe_includes(self):
+        """Test that repeated includes are dropped."""
+        deduped = dedupe_includes(
+            "#include <a.h>\n#include <b.h>\n#include <a.h>\nint x;\n"
+        )
+
+        assert deduped == "#include <a.h>\n#include <b.h>\nint x;\n"
+
+
+class TestPromptCompressor:
+    """Tests for the PromptCompressor class."""
+
+    def test_compress(self):
+        """Test the compressed files and the reported savings."""
+        project_info = ProjectInfo(
+            files=[
+                make_file("date.c", SOURCE),
+                make_file("Makefile", "all:\n\tcc   date.c\n"),
+            ]
+        )
+        context = PromptCompressor().compress(project_info, "dateparse")
+        date_c, makefile = context.project_info.files
+
+        assert date_c.content == (
+            "#include <stdio.h>\n"
+            "int dateparse(const char *s) {\n"
+            'puts("a  // not a comment");\n'
+            "return helper(s);\n"
+            "}\n"
+        )
+        assert makefile.content == "all:\n\tcc   date.c\n"
+        assert context.compressed_tokens < context.original_tokens
+        assert 0 < context.ratio < 1
+
+    def test_duplicate_files(self):
+        """Test that files identical after compression are sent once."""
+        project_info = ProjectInfo(
+            files=[
+                make_file("a/date.h", "int dateparse(const char *s);\n"),
+                make_file(
+                    "b/date.h", "/* Copy */\nint dateparse(const char *s);"
+                ),
+            ]
+        )
+        context = PromptCompressor().compress(project_info)
+
+        assert [f.path for f in context.project_info.files] == ["a/date.h"]
+        assert context.duplicates == ["b/date.h"]
+
+    def test_signatures_only(self):
+        """Test that files not mentioning the target are summarized."""
+        project_info = ProjectInfo(
+            files=[
+                make_file("date.c", SOURCE),
+                make_file("helpers.c", HELPERS),
+            ]
+        )
+        context = PromptCompressor(signatures_only=True).compress(
+            project_info, "dateparse"
+        )
+        date_c, helpers_c = context.project_info.files
+
+        assert "return helper(s);" in date_c.content
+        assert "static int helper(const char *s) { ... }" in helpers_c.content
+        assert "return s[0]" not in helpers_c.content
+        assert context.summarized == ["helpers.c"]
+
+    def test_signatures_only_targets(self):
+        """Test that files mentioning any of several targets are kept."""
+        project_info = ProjectInfo(
+            files=[
+                make_file("date.c", SOURCE),
+                make_file("helpers.c", HELPERS),
+            ]
+        )
+        context = PromptCompressor(signatures_only=True).compress(
+            project_info, ["missing", "helper"]
+        )
+
+        assert context.summarized == []
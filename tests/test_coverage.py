@@ -0,0 +1,243 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import pytest
+from llm_harness.cli import Arguments
+from llm_harness.config import Config
+from llm_harness.core.builder import HarnessBuilder
+from llm_harness.core.coverage import (
+    CoverageCollector,
+    call_distances,
+    parse_export,
+)
+from llm_harness.core.pipeline import create_builder
+from llm_harness.core.symbols import SymbolIndex
+from llm_harness.io.walker import ProjectTree
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+SOURCE = """int level2(int x) {
+    return x * 2;
+}
+
+static int level1(int x) {
+    if (x > 10) {
+        return level2(x);
+    }
+    return 0;
+}
+
+int parse(const char *s) {
+    return level1(s[0]);
+}
+
+int unrelated(void) {
+    return 1;
+}
+"""
+
+
+def summary(covered, count):
+    """A coverage summary entry."""
+    return {"count": count, "covered": covered, "percent": 0}
+
+
+# Output of `llvm-cov export`, reduced to the fields in use. Regions are
+# line, column, end line, end column, count, file, expanded file and kind;
+# branches have a true and a false count in place of the count.
+EXPORT = {
+    "data": [
+        {
+            "files": [
+                {
+                    "filename": "parse.c",
+                    "summary": {
+                        "functions": summary(2, 4),
+                        "lines": summary(9, 18),
+                        "branches": summary(1, 2),
+                    },
+                },
+                {
+                    "filename": "harnesses/harness.c",
+                    "summary": {
+                        "functions": summary(1, 1),
+                        "lines": summary(4, 4),
+                        "branches": summary(0, 0),
+                    },
+                },
+            ],
+            "functions": [
+                {
+                    "name": "level2",
+                    "count": 0,
+                    "regions": [[1, 20, 3, 2, 0, 0, 0, 0]],
+                    "branches": [],
+                    "filenames": ["parse.c"],
+                },
+                {
+                    "name": "parse.c:level1",
+                    "count": 5,
+                    "regions": [
+                        [5, 27, 10, 2, 5, 0, 0, 0],
+                        [6, 17, 8, 6, 0, 0, 0, 0],
+                    ],
+                    "branches": [[6, 9, 6, 15, 0, 5, 0, 0, 4]],
+                    "filenames": ["parse.c"],
+                },
+                {
+                    "name": "parse",
+                    "count": 5,
+                    "regions": [[12, 29, 14, 2, 5, 0, 0, 0]],
+                    "branches": [],
+                    "filenames": ["parse.c"],
+                },
+                {
+                    "name": "unrelated",
+                    "count": 0,
+                    "regions": [[16, 23, 18, 2, 0, 0, 0, 0]],
+                    "branches": [],
+                    "filenames": ["parse.c"],
+                },
+                {
+                    "name": "LLVMFuzzerTestOneInput",
+                    "count": 5,
+                    "regions": [[3, 1, 6, 2, 5, 0, 0, 0]],
+                    "branches": [[4, 9, 4, 17, 0, 5, 0, 0, 4]],
+                    "filenames": ["harnesses/harness.c"],
+                },
+            ],
+        }
+    ]
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Fixture of a project with a single source file."""
+    (tmp_path / "parse.c").write_text(SOURCE)
+    return tmp_path
+
+
+class TestCallDistances:
+    """Tests for call_distances."""
+
+    def test_distances(self):
+        """Test that functions are ranked by calls from the target."""
+        index = SymbolIndex.build(
+            ProjectInfo(
+                files=[
+                    ProjectFile(path="parse.c", name="parse.c", content=SOURCE)
+                ]
+            )
+        )
+        assert call_distances(index, "parse") == {
+            "parse": 0,
+            "level1": 1,
+            "level2": 2,
+        }
+
+
+class TestParseExport:
+    """Tests for parse_export."""
+
+    def test_gaps(self, project):
+        """Test that the gaps of the project are found, nearest first."""
+        report = parse_export(
+            EXPORT,
+            str(project),
+            {"parse": 0, "level1": 1, "level2": 2},
+        )
+
+        assert (report.functions_covered, report.functions_total) == (2, 4)
+        assert (report.lines_covered, report.lines_total) == (9, 18)
+        assert [(g.line, g.function, g.kind) for g in report.gaps] == [
+            (6, "level1", "never true"),
+            (1, "level2", "never called"),
+            (16, "unrelated", "never called"),
+        ]
+        assert report.gaps[0].code == "if (x > 10) {"
+        assert report.summary().splitlines()[1] == (
+            "- parse.c:6 level1: never true: if (x > 10) {"
+        )
+
+    def test_max_gaps(self, project):
+        """Test that the number of gaps is capped."""
+        report = parse_export(EXPORT, str(project), max_gaps=1)
+        assert len(report.gaps) == 1
+
+
+class TestCreateBuilder:
+    """Tests for the builders of coverage builds."""
+
+    def test_no_shared_objects(self, tmp_path):
+        """Test that coverage builds do not reuse other checkouts' objects."""
+        args = Arguments(
+            project_path=str(tmp_path),
+            model=Config.DEFAULT_MODEL,
+            file_patterns=["*.c"],
+        )
+
+        assert create_builder(
+            args, ProjectTree(str(tmp_path))
+        ).compilation_cache
+        assert (
+            create_builder(
+                args, ProjectTree(str(tmp_path)), coverage=True
+            ).compilation_cache
+            is None
+        )
+
+
+@pytest.mark.skipif(
+    shutil.which("clang") is None or shutil.which(Config.LLVM_COV) is None,
+    reason="needs clang and llvm-cov",
+)
+class TestCoverageCollector:
+    """Tests for the CoverageCollector class."""
+
+    def test_collect(self, project):
+        """Test measuring the coverage of a corpus."""
+        harness_dir = project / Config.HARNESS_DIR
+        harness_dir.mkdir()
+        (harness_dir / "harness.c").write_text(
+            "#include <stdint.h>\n"
+            "#include <stddef.h>\n"
+            "int parse(const char *s);\n"
+            "int LLVMFuzzerTestOneInput(const uint8_t *d, size_t n) {\n"
+            "    if (n > 0) parse((const char *)d);\n"
+            "    return 0;\n"
+            "}\n"
+        )
+        corpus = project / "corpus"
+        corpus.mkdir()
+        (corpus / "input").write_text("a")
+        builder = HarnessBuilder(
+            str(project),
+            cflags=Config.COVERAGE_CFLAGS,
+            objects_dir=Config.COVERAGE_OBJECTS_DIR,
+        )
+        collector = CoverageCollector(
+            builder, {"parse": 0, "level1": 1, "level2": 2}
+        )
+        report = collector.collect("harness.c", "harness", str(corpus))
+
+        assert report is not None
+        gaps = {(gap.function, gap.kind) for gap in report.gaps}
+        assert ("level2", "never called") in gaps
+        assert ("level1", "never true") in gaps
+        assert not os.path.exists(project / "harness-coverage")
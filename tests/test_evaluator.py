@@ -0,0 +1,334 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import stat
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from llm_harness.config import Config
+from llm_harness.core.evaluator import (
+    HarnessEvaluator,
+    PlateauDetector,
+    merge_metrics,
+    parse_output_line,
+)
+from llm_harness.models.evaluation import FuzzMetrics
+
+OUTPUT = """INFO: Seed: 1234
+#2	INITED cov: 12 ft: 13 corp: 1/1b exec/s: 0 rss: 30Mb
+#64	NEW    cov: 40 ft: 52 corp: 9/77b lim: 4 exec/s: 0 rss: 31Mb L: 3/3 MS: 1 ChangeBit-
+#4096	pulse  cov: 45 ft: 60 corp: 12/2Kb lim: 43 exec/s: 2048 rss: 35Mb
+Done 5000 runs in 2 second(s)
+stat::number_of_executed_units: 5000
+stat::average_exec_per_sec:     2500
+stat::peak_rss_mb:              36
+"""
+
+
+def write_fuzzer(project_path, script, name="harness"):
+    """Writes a fake fuzzer as the project's harness executable."""
+    path = os.path.join(project_path, name)
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n" + script)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+class TestParseOutputLine:
+    """Tests for parsing libFuzzer's output."""
+
+    def test_status_lines(self):
+        """Test the metrics of a clean run."""
+        metrics = FuzzMetrics()
+        for line in OUTPUT.splitlines():
+            parse_output_line(metrics, line)
+
+        assert metrics == FuzzMetrics(
+            execs=5000,
+            execs_per_sec=2500,
+            cov=45,
+            ft=60,
+            corpus_units=12,
+            corpus_bytes=2048,
+            peak_rss_mb=36,
+        )
+
+    @pytest.mark.parametrize(
+        "line, outcome",
+        [
+            ("==1== ERROR: libFuzzer: timeout after 25 seconds", "timeout"),
+            ("==1== ERROR: libFuzzer: out-of-memory (used: 3Gb)", "oom"),
+            ("==1==ERROR: AddressSanitizer: heap-buffer-overflow", "crash"),
+            ("==1==ERROR: LeakSanitizer: detected memory leaks", "leak"),
+            ("==1== ERROR: libFuzzer: deadly signal", "crash"),
+            ("a.c:3:5: runtime error: signed integer overflow", "crash"),
+        ],
+    )
+    def test_outcomes(self, line, outcome):
+        """Test that sanitizer and libFuzzer reports set the outcome."""
+        metrics = FuzzMetrics()
+        parse_output_line(metrics, line)
+
+        assert metrics.outcome == outcome
+        assert metrics.reason == line
+
+    def test_fork_status_lines(self):
+        """Test the merged status lines of the fork mode."""
+        metrics = FuzzMetrics()
+        parse_output_line(
+            metrics,
+            "#38829: cov: 1023 ft: 2819 corp: 345 exec/s 3882 "
+            "oom/timeout/crash: 0/0/0 time: 10s job: 3 dft_time: 0",
+        )
+
+        assert (metrics.execs, metrics.cov, metrics.ft) == (38829, 1023, 2819)
+        assert (metrics.corpus_units, metrics.execs_per_sec) == (345, 3882)
+        assert metrics.outcome == "ok"
+
+        parse_output_line(
+            metrics,
+            "#40000: cov: 1030 ft: 2830 corp: 350 exec/s 3900 "
+            "oom/timeout/crash: 0/1/0 time: 11s job: 4 dft_time: 0",
+        )
+        assert metrics.outcome == "timeout"
+
+    def test_merge_metrics(self):
+        """Test merging the metrics of side by side fuzzers."""
+        merged = merge_metrics(
+            [
+                FuzzMetrics(execs=100, execs_per_sec=10, cov=5, ft=8),
+                FuzzMetrics(execs=200, execs_per_sec=20, cov=7, ft=6),
+                FuzzMetrics(outcome="crash", reason="SEGV"),
+            ]
+        )
+
+        assert (merged.execs, merged.execs_per_sec) == (300, 30)
+        assert (merged.cov, merged.ft) == (7, 8)
+        assert (merged.outcome, merged.reason) == ("crash", "SEGV")
+
+
+class TestPlateauDetector:
+    """Tests for the PlateauDetector class."""
+
+    def test_plateau(self):
+        """Test that a plateau needs slow growth over a whole window."""
+        detector = PlateauDetector(window=10, min_rate=1.0)
+
+        assert not detector.update(0, 100)
+        assert not detector.update(5, 100)
+        assert not detector.update(9, 150)
+        # 50 features in the last 10s, then 0 in the 10s before 19s
+        assert not detector.update(10, 150)
+        assert not detector.update(15, 152)
+        assert detector.update(19, 155)
+
+
+class TestHarnessEvaluator:
+    """Tests for the HarnessEvaluator class."""
+
+    def test_accepts_clean_run(self, tmp_path):
+        """Test that a clean, fast run with coverage is accepted."""
+        write_fuzzer(tmp_path, f"cat >&2 <<'EOF'\n{OUTPUT}EOF\n")
+        evaluator = HarnessEvaluator(str(tmp_path), max_total_time=5)
+
+        assert evaluator.evaulate_harness()
+        assert evaluator.metrics.cov == 45
+        assert evaluator.metrics.outcome == "ok"
+
+    def test_limits_passed_to_fuzzer(self, tmp_path):
+        """Test the options enforcing the run's limits."""
+        write_fuzzer(tmp_path, 'echo "$@" > "${0%/*}/args.txt"\n')
+        HarnessEvaluator(
+            str(tmp_path), max_total_time=5, runs=100, rss_limit_mb=512
+        ).run()
+
+        args = (tmp_path / "args.txt").read_text().split()
+        assert "-max_total_time=5" in args
+        assert "-runs=100" in args
+        assert "-rss_limit_mb=512" in args
+        assert f"-artifact_prefix={tmp_path}/" in args
+
+    def test_rejects_crash(self, tmp_path):
+        """Test that a crashing harness is rejected."""
+        write_fuzzer(
+            tmp_path,
+            "echo '==1==ERROR: AddressSanitizer: SEGV on unknown address'\n"
+            "exit 1\n",
+        )
+        evaluator = HarnessEvaluator(str(tmp_path), max_total_time=5)
+
+        assert not evaluator.evaulate_harness()
+        assert evaluator.metrics.outcome == "crash"
+
+    def test_rejects_low_coverage(self, tmp_path):
+        """Test the coverage threshold."""
+        write_fuzzer(tmp_path, f"cat <<'EOF'\n{OUTPUT}EOF\n")
+        evaluator = HarnessEvaluator(
+            str(tmp_path), max_total_time=5, min_coverage=100
+        )
+
+        assert not evaluator.evaulate_harness()
+
+    def test_kills_hung_fuzzer(self, tmp_path):
+        """Test that a fuzzer running past its time limit is killed."""
+        # The fuzzer's children are killed too, or they would keep its
+        # output open
+        write_fuzzer(
+            tmp_path, "echo '#2 INITED cov: 3 ft: 3'\nsleep 30 &\nwait\n"
+        )
+        evaluator = HarnessEvaluator(
+            str(tmp_path), max_total_time=0, kill_grace=0.5
+        )
+
+        metrics = evaluator.run()
+        assert metrics.outcome == "killed"
+        assert metrics.cov == 3
+        assert metrics.elapsed < 10
+
+    def test_missing_harness(self, tmp_path):
+        """Test that a harness that failed to build is rejected."""
+        evaluator = HarnessEvaluator(str(tmp_path))
+
+        assert not evaluator.evaulate_harness()
+        assert evaluator.metrics.outcome == "error"
+
+    def test_fork_mode(self, tmp_path):
+        """Test that the fork mode runs one fuzzer per worker."""
+        write_fuzzer(
+            tmp_path,
+            'echo "$@" > "${0%/*}/args.txt"\n'
+            "echo '#5000: cov: 50 ft: 70 corp: 3 exec/s 2500 "
+            "oom/timeout/crash: 0/0/0 time: 2s job: 2 dft_time: 0'\n",
+        )
+        evaluator = HarnessEvaluator(
+            str(tmp_path), max_total_time=5, mode="fork", workers=4
+        )
+
+        assert evaluator.evaulate_harness()
+        assert "-fork=4" in (tmp_path / "args.txt").read_text().split()
+        assert evaluator.metrics.cov == 50
+
+    def test_jobs_mode(self, tmp_path):
+        """Test that the jobs' logs are merged, then removed."""
+        write_fuzzer(
+            tmp_path,
+            'for corpus in "$@"; do :; done\n'
+            "for job in 0 1; do\n"
+            '  echo "#1000 pulse cov: 3$job ft: 40 exec/s: 500" '
+            "> fuzz-$job.log\n"
+            "  echo input > $corpus/input-$job\n"
+            "done\n",
+        )
+        evaluator = HarnessEvaluator(
+            str(tmp_path), max_total_time=5, mode="jobs", workers=2
+        )
+
+        metrics = evaluator.run()
+        assert (metrics.execs, metrics.execs_per_sec) == (2000, 1000)
+        assert metrics.cov == 31
+        assert (metrics.corpus_units, metrics.corpus_bytes) == (2, 12)
+        assert not list(tmp_path.glob("fuzz-*.log"))
+
+    def test_concurrent_jobs_keep_their_logs(self, tmp_path):
+        """Test that concurrent jobs-mode runs read their own logs."""
+        for job in (1, 2):
+            write_fuzzer(
+                tmp_path,
+                f'echo "#1000 pulse cov: {job} exec/s: 500" > fuzz-0.log\n'
+                "sleep 0.3\n",
+                name=f"harness-{job}",
+            )
+        evaluators = [
+            HarnessEvaluator(
+                str(tmp_path),
+                max_total_time=5,
+                mode="jobs",
+                workers=1,
+                executable=f"harness-{job}",
+            )
+            for job in (1, 2)
+        ]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            runs = list(executor.map(lambda e: e.run(), evaluators))
+
+        assert [run.cov for run in runs] == [1, 2]
+        assert not list(tmp_path.glob("fuzz-*.log"))
+
+    def test_workers_shared_between_evaluations(self):
+        """Test that concurrent evaluations divide the CPUs."""
+        with mock.patch("os.cpu_count", return_value=8):
+            assert HarnessEvaluator(".", concurrency=2).workers == 4
+            assert HarnessEvaluator(".", concurrency=16).workers == 1
+            assert HarnessEvaluator(".", workers=3, concurrency=2).workers == 3
+
+    def test_stops_on_plateau(self, tmp_path):
+        """Test that a fuzzer whose coverage is flat is interrupted."""
+        write_fuzzer(
+            tmp_path,
+            "trap 'kill $!; echo stat::average_exec_per_sec: 500; exit 72' "
+            "INT\n"
+            "echo '#2 INITED cov: 30 ft: 30 exec/s: 0'\n"
+            # Shells start background commands ignoring SIGINT
+            "sleep 30 > /dev/null &\n"
+            "wait\n",
+        )
+        evaluator = HarnessEvaluator(
+            str(tmp_path),
+            max_total_time=20,
+            plateau_window=0.3,
+            plateau_min_rate=1.0,
+        )
+
+        with mock.patch.object(Config, "PLATEAU_CHECK_INTERVAL", 0.1):
+            assert evaluator.evaulate_harness()
+        metrics = evaluator.metrics
+        assert metrics.plateau_at is not None
+        assert metrics.plateau_at < 5
+        assert metrics.execs_per_sec == 500
+        assert metrics.outcome == "ok"
+
+    def test_measure_coverage(self, tmp_path):
+        """Test that the corpus is kept for the coverage, then removed."""
+        # The fake fuzzer adds an input to its corpus, the last argument
+        write_fuzzer(
+            tmp_path,
+            'for dir; do :; done\necho a > "$dir/input"\n'
+            f"cat >&2 <<'EOF'\n{OUTPUT}EOF\n",
+        )
+        collector = mock.MagicMock()
+        corpora = []
+
+        def collect(harness_filename, executable, corpus_dir):
+            corpora.append(corpus_dir)
+            assert os.listdir(corpus_dir) == ["input"]
+            return "report"
+
+        collector.collect.side_effect = collect
+        evaluator = HarnessEvaluator(
+            str(tmp_path), max_total_time=5, coverage=collector
+        )
+
+        assert evaluator.evaulate_harness()
+        assert evaluator.measure_coverage("harness.c") == "report"
+        collector.collect.assert_called_once_with(
+            "harness.c", "harness", corpora[0]
+        )
+        assert not os.path.exists(corpora[0])
+        assert evaluator.measure_coverage("harness.c") is None
+
+        # Without a collector, nothing is kept
+        assert HarnessEvaluator(str(tmp_path)).measure_coverage("a.c") is None
@@ -85,3 +85,32 @@ class TestFileManager:
         # Call should raise the IOError
         with pytest.raises(IOError, match="Test IO Error"):
             manager.write_harness("harness content")
+
+    def test_open_harness(self, tmp_path):
+        """Test writing a harness piecewise and starting it over."""
+        manager = FileManager(str(tmp_path))
+        path = tmp_path / "harnesses" / "harness.c"
+
+        with manager.open_harness() as writer:
+            writer.write("int a;\n")
+            writer.reset()
+            writer.write("int b;\n")
+            writer.write("int c;\n")
+            assert not path.exists()
+
+        assert writer.path == str(path)
+        assert path.read_text() == "int b;\nint c;\n"
+        assert os.listdir(path.parent) == ["harness.c"]
+
+    def test_failed_harness_kept_out(self, tmp_path):
+        """Test that a failed generation keeps the previous harness."""
+        manager = FileManager(str(tmp_path))
+        path = manager.write_harness("int good;\n")
+
+        with pytest.raises(RuntimeError):
+            with manager.open_harness() as writer:
+                writer.write("int par")
+                raise RuntimeError("stream failed")
+
+        assert open(path).read() == "int good;\n"
+        assert os.listdir(os.path.dirname(path)) == ["harness.c"]
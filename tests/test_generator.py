@@ -16,9 +16,13 @@
 # along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from unittest import mock
 from llm_harness.core.generator import HarnessGenerator
 from llm_harness.models.project import ProjectInfo, ProjectFile
+from llm_harness.io.cache import DiskCache
+from llm_harness.core.packer import ContextPacker
+from llm_harness.models.coverage import CoverageGap, CoverageReport
 
 
 class TestHarnessGenerator:
@@ -34,8 +38,8 @@ class TestHarnessGenerator:
 
     @mock.patch("llm_harness.config.Config.load_env")
     @mock.patch("dspy.LM")
-    @mock.patch("dspy.configure")
-    def test_create_harness(self, mock_configure, mock_lm, mock_load_env):
+    @mock.patch("dspy.context")
+    def test_create_harness(self, mock_context, mock_lm, mock_load_env):
         """Test create_harness method."""
         # Setup mocks
         mock_load_env.return_value = "test-api-key"
@@ -58,7 +62,7 @@ class TestHarnessGenerator:
         # Assertions
         assert result == "Generated harness code"
         mock_lm.assert_called_once_with("openai/gpt-4o", cache=False)
-        mock_configure.assert_called_once()
+        mock_context.assert_called_once_with(lm=mock_lm_instance)
         mock_lm_instance.assert_called_once()
 
     @mock.patch("llm_harness.config.Config.load_env")
@@ -81,3 +85,225 @@ class TestHarnessGenerator:
         generator = HarnessGenerator("gpt-4o")
         with pytest.raises(Exception, match="Test exception"):
             generator.create_harness(project_info)
+
+    @mock.patch("llm_harness.config.Config.load_env")
+    @mock.patch("dspy.LM")
+    @mock.patch("dspy.configure")
+    def test_create_harness_cached(
+        self, mock_configure, mock_lm, mock_load_env, tmp_path
+    ):
+        """Test that a cached response skips the LLM call."""
+        mock_load_env.return_value = "test-api-key"
+        mock_lm_instance = mock.MagicMock()
+        mock_lm_instance.return_value = ["Generated harness code"]
+        mock_lm.return_value = mock_lm_instance
+
+        project_info = ProjectInfo(
+            files=[ProjectFile(path="file.c", name="file.c", content="x")]
+        )
+        cache = DiskCache(str(tmp_path))
+
+        first = HarnessGenerator("gpt-4o", cache=cache)
+        assert first.create_harness(project_info) == "Generated harness code"
+
+        second = HarnessGenerator("gpt-4o", cache=cache)
+        assert second.create_harness(project_info) == "Generated harness code"
+        mock_lm_instance.assert_called_once()
+
+        # A different model must not reuse the response
+        other = HarnessGenerator("gpt-4.1", cache=cache)
+        other.create_harness(project_info)
+        assert mock_lm_instance.call_count == 2
+
+    @mock.patch("llm_harness.config.Config.load_env")
+    @mock.patch("dspy.LM")
+    @mock.patch("dspy.configure")
+    def test_create_harness_refresh(
+        self, mock_configure, mock_lm, mock_load_env, tmp_path
+    ):
+        """Test that refreshing bypasses and overwrites the cache."""
+        mock_load_env.return_value = "test-api-key"
+        mock_lm_instance = mock.MagicMock()
+        mock_lm_instance.side_effect = [["old harness"], ["new harness"]]
+        mock_lm.return_value = mock_lm_instance
+
+        project_info = ProjectInfo(
+            files=[ProjectFile(path="file.c", name="file.c", content="x")]
+        )
+        cache = DiskCache(str(tmp_path))
+
+        HarnessGenerator("gpt-4o", cache=cache).create_harness(project_info)
+        refreshed = HarnessGenerator("gpt-4o", cache=cache, refresh=True)
+        assert refreshed.create_harness(project_info) == "new harness"
+
+        cached = HarnessGenerator("gpt-4o", cache=cache)
+        assert cached.create_harness(project_info) == "new harness"
+        assert mock_lm_instance.call_count == 2
+
+    @mock.patch("llm_harness.config.Config.load_env")
+    @mock.patch("dspy.LM")
+    @mock.patch("dspy.configure")
+    def test_create_harness_packed(
+        self, mock_configure, mock_lm, mock_load_env
+    ):
+        """Test that the packer bounds the prompt and names the target."""
+        mock_load_env.return_value = "test-api-key"
+        mock_lm_instance = mock.MagicMock()
+        mock_lm_instance.return_value = ["Generated harness code"]
+        mock_lm.return_value = mock_lm_instance
+
+        project_info = ProjectInfo(
+            files=[
+                ProjectFile(path="a.c", name="a.c", content="int a;\n" * 5000)
+            ]
+        )
+        generator = HarnessGenerator("gpt-4o", packer=ContextPacker(1000))
+        generator.create_harness(project_info, target="parse_date")
+
+        (message,) = mock_lm_instance.call_args.kwargs["messages"]
+        prompt = message["content"]
+        assert "harness for the parse_date function" in prompt
+        assert len(prompt) < 1000 * 4 + 2000
+
+    @mock.patch("llm_harness.config.Config.load_env")
+    @mock.patch("dspy.LM")
+    def test_prompts_share_context(self, mock_lm, mock_load_env):
+        """Test that the prompts of two targets differ only at the end."""
+        mock_load_env.return_value = "test-api-key"
+        mock_lm_instance = mock.MagicMock()
+        mock_lm_instance.return_value = ["Generated harness code"]
+        mock_lm.return_value = mock_lm_instance
+
+        project_info = ProjectInfo(
+            files=[
+                ProjectFile(path="a.c", name="a.c", content="int parse();\n"),
+                ProjectFile(
+                    path="b.c", name="b.c", content="int load() {}\n" * 500
+                ),
+            ]
+        )
+        generator = HarnessGenerator(
+            "gpt-4o", packer=ContextPacker(1000), shared_context=True
+        )
+        prompts = []
+        for target in ("parse", "load"):
+            generator.create_harness(project_info, target=target)
+            (message,) = mock_lm_instance.call_args.kwargs["messages"]
+            prompts.append(message["content"])
+
+        prefix = prompts[0][: prompts[0].index("harness for the parse")]
+        assert prompts[1].startswith(prefix)
+        assert "int parse();" in prefix
+        assert "int load() {}" in prefix
+
+    @mock.patch("llm_harness.config.Config.load_env")
+    @mock.patch("dspy.LM")
+    def test_create_harness_candidates(self, mock_lm, mock_load_env, tmp_path):
+        """Test that candidates are cached apart and generated in threads."""
+        mock_load_env.return_value = "test-api-key"
+        mock_lm_instance = mock.MagicMock()
+        mock_lm_instance.side_effect = lambda messages: [
+            "Generated harness code"
+        ]
+        mock_lm.return_value = mock_lm_instance
+
+        project_info = ProjectInfo(
+            files=[ProjectFile(path="file.c", name="file.c", content="x")]
+        )
+        generator = HarnessGenerator("gpt-4o", cache=DiskCache(str(tmp_path)))
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(
+                executor.map(
+                    lambda i: generator.create_harness(
+                        project_info, candidate=i
+                    ),
+                    range(3),
+                )
+            )
+        assert mock_lm_instance.call_count == 3
+
+        # Every candidate's response is reused on the next run
+        for i in range(3):
+            generator.create_harness(project_info, candidate=i)
+        assert mock_lm_instance.call_count == 3
+
+    @mock.patch("llm_harness.config.Config.load_env")
+    @mock.patch("dspy.LM")
+    def test_repair_harness(self, mock_lm, mock_load_env, tmp_path):
+        """Test that repairs continue the generation's conversation."""
+        mock_load_env.return_value = "test-api-key"
+        mock_lm_instance = mock.MagicMock()
+        mock_lm_instance.side_effect = lambda messages: [
+            f"harness {len(messages)}"
+        ]
+        mock_lm.return_value = mock_lm_instance
+
+        project_info = ProjectInfo(
+            files=[
+                ProjectFile(
+                    path="file.c", name="file.c", content="int project_file;"
+                )
+            ]
+        )
+        generator = HarnessGenerator("gpt-4o", cache=DiskCache(str(tmp_path)))
+        harness = generator.create_harness(project_info)
+        (prompt,) = mock_lm_instance.call_args.kwargs["messages"]
+
+        build_errors = [(harness, "1:1: error: a"), ("harness 3", "1:1: b")]
+        assert (
+            generator.repair_harness(project_info, "dateparse", build_errors)
+            == "harness 5"
+        )
+        messages = mock_lm_instance.call_args.kwargs["messages"]
+        assert messages[0] == prompt
+        assert [m["role"] for m in messages] == [
+            "user",
+            "assistant",
+            "user",
+            "assistant",
+            "user",
+        ]
+        assert messages[1]["content"] == harness
+        assert "1:1: error: a" in messages[2]["content"]
+        assert "project_file" not in messages[4]["content"]
+
+        # Repairs are cached like generations
+        generator.repair_harness(project_info, "dateparse", build_errors)
+        assert mock_lm_instance.call_count == 2
+
+    @mock.patch("llm_harness.config.Config.load_env")
+    @mock.patch("dspy.LM")
+    def test_refine_harness(self, mock_lm, mock_load_env):
+        """Test that refinements send the coverage gaps after the harness."""
+        mock_load_env.return_value = "test-api-key"
+        mock_lm_instance = mock.MagicMock()
+        mock_lm_instance.return_value = ["better harness"]
+        mock_lm.return_value = mock_lm_instance
+
+        project_info = ProjectInfo(
+            files=[ProjectFile(path="file.c", name="file.c", content="x")]
+        )
+        report = CoverageReport(
+            gaps=[CoverageGap("file.c", 3, "helper", "never called")]
+        )
+        generator = HarnessGenerator("gpt-4o")
+        result = generator.refine_harness(
+            project_info,
+            "parse",
+            "old harness",
+            report,
+            build_errors=[("broken harness", "1:1: error: a")],
+        )
+
+        assert result == "better harness"
+        messages = mock_lm_instance.call_args.kwargs["messages"]
+        assert [m["content"] for m in messages[1::2]] == [
+            "old harness",
+            "broken harness",
+        ]
+        assert "- file.c:3 helper: never called" in messages[2]["content"]
+        assert "nearest to the parse" in " ".join(
+            messages[2]["content"].split()
+        )
+        assert "1:1: error: a" in messages[4]["content"]
@@ -24,10 +24,10 @@ from llm_harness.io.file_manager import FileManager
 
 
 @pytest.fixture
-def mock_project_setup():
+def mock_project_setup(tmp_path):
     """Fixture to create a mock project setup"""
-    # Mock project path and files
-    project_path = "/path/to/project"
+    # Project path and files
+    project_path = str(tmp_path)
 
     # Mock file content
     file_content = """
@@ -57,15 +57,13 @@ def mock_project_setup():
             os.path.join(project_path, "dateparse.h"),
         ],
     ):
-        # Mock file open to return our test content
-        mock_file = mock.mock_open()
-        mock_file.side_effect = [
-            mock.mock_open(read_data=file_content).return_value,
-            mock.mock_open(read_data=header_content).return_value,
-        ]
+        # Write our test content to the project files
+        with open(os.path.join(project_path, "dateparse.c"), "w") as f:
+            f.write(file_content)
+        with open(os.path.join(project_path, "dateparse.h"), "w") as f:
+            f.write(header_content)
 
-        with mock.patch("builtins.open", mock_file):
-            yield project_path
+        yield project_path
 
 
 @mock.patch("llm_harness.config.Config.load_env")
@@ -86,12 +84,12 @@ def test_end_to_end_flow(
     # Mock API key
     mock_load_env.return_value = "test-api-key"
 
+    # Create components and run flow
+    analyzer = ProjectAnalyzer(project_path)
+    project_info = analyzer.collect_project_info()
+
     # Mock file write
     with mock.patch("builtins.open", mock.mock_open()) as mock_file:
-        # Create components and run flow
-        analyzer = ProjectAnalyzer(project_path)
-        project_info = analyzer.collect_project_info()
-
         generator = HarnessGenerator("gpt-4o")
         harness = generator.create_harness(project_info)
 
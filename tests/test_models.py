@@ -76,3 +76,29 @@ class TestProjectModels:
         assert "int func1() { return 1; }" in concatenated
         assert "file2.h" in concatenated
         assert "#define VALUE 42" in concatenated
+
+    def test_project_file_digest(self):
+        """Test ProjectFile content digest."""
+        file = ProjectFile(path="file.c", name="file.c", content="abc")
+        assert file.get_digest() == (
+            "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+        )
+
+    def test_project_info_fingerprint(self):
+        """Test that the fingerprint depends on paths and contents only."""
+        file1 = ProjectFile(path="/a/file1.c", name="file1.c", content="1")
+        file2 = ProjectFile(path="/a/file2.c", name="file2.c", content="2")
+        moved1 = ProjectFile(path="/b/file1.c", name="file1.c", content="1")
+        moved2 = ProjectFile(path="/b/file2.c", name="file2.c", content="2")
+        edited = ProjectFile(path="/a/file2.c", name="file2.c", content="3")
+
+        info = ProjectInfo(files=[file1, file2], root="/a")
+        reordered = ProjectInfo(files=[file2, file1], root="/a")
+        moved = ProjectInfo(files=[moved1, moved2], root="/b")
+
+        assert info.get_fingerprint() == reordered.get_fingerprint()
+        assert info.get_fingerprint() == moved.get_fingerprint()
+        assert (
+            info.get_fingerprint()
+            != ProjectInfo(files=[file1, edited], root="/a").get_fingerprint()
+        )
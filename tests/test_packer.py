@@ -0,0 +1,147 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+from llm_harness.core.packer import (
+    ContextPacker,
+    estimate_tokens,
+    summarize_source,
+)
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+
+def make_file(name: str, content: str) -> ProjectFile:
+    """Creates a project file under a fixed root."""
+    return ProjectFile(path=f"/p/{name}", name=name, content=content)
+
+
+SOURCE = """#include "parse.h"
+
+struct state {
+    int pos;
+};
+
+static int helper(int x) {
+    if (x) {
+        return 1;
+    }
+    return 0;
+}
+
+int parse(const char *s, int n) {
+    return helper(n);
+}
+"""
+
+
+class TestSummarizeSource:
+    """Tests for summarize_source."""
+
+    def test_function_bodies_removed(self):
+        """Test that function bodies are elided and types kept."""
+        summary = summarize_source(SOURCE)
+
+        assert "static int helper(int x) { ... }" in summary
+        assert "int parse(const char *s, int n) { ... }" in summary
+        assert "return helper(n);" not in summary
+        assert "    int pos;" in summary
+        assert '#include "parse.h"' in summary
+
+    def test_braces_in_literals(self):
+        """Test that braces in literals and comments are not counted."""
+        summary = summarize_source(
+            "int open(void) {\n"
+            "    return s == \"{\" || c == '{'; /* { */\n"
+            "}\n"
+            "int close(void) {\n"
+            "    return 0;\n"
+            "}\n"
+        )
+
+        assert summary == "int open(void) { ... }\nint close(void) { ... }\n"
+
+
+class TestContextPacker:
+    """Tests for the ContextPacker class."""
+
+    def test_estimate_tokens(self):
+        """Test the token estimate."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("abcde") == 2
+
+    def test_everything_fits(self):
+        """Test that files are packed verbatim within the budget."""
+        info = ProjectInfo(
+            files=[make_file("a.c", "int a;"), make_file("b.h", "int b;")]
+        )
+        packed = ContextPacker(10_000).pack(info)
+
+        assert "int a;" in packed.text and "int b;" in packed.text
+        assert set(packed.tokens_per_file) == {"/p/a.c", "/p/b.h"}
+        assert packed.total_tokens >= estimate_tokens(packed.text)
+        assert not packed.summarized and not packed.truncated
+
+    def test_ranking(self):
+        """Test headers, then target definitions, then dependencies."""
+        info = ProjectInfo(
+            files=[
+                make_file("Makefile", "all:\n"),
+                make_file("other.c", "int other(void) { return 0; }"),
+                make_file("caller.c", "int main() { return parse(0, 0); }"),
+                make_file("parse.c", SOURCE),
+                make_file("parse.h", "int parse(const char *s, int n);"),
+            ]
+        )
+        packed = ContextPacker(10_000).pack(info, target="parse")
+
+        order = list(packed.tokens_per_file)
+        assert order == [
+            "/p/parse.h",
+            "/p/parse.c",
+            "/p/caller.c",
+            "/p/other.c",
+            "/p/Makefile",
+        ]
+
+    def test_summarize_when_not_fitting(self):
+        """Test that files not fitting whole are summarized."""
+        big = SOURCE + "\n".join(
+            f"int f{i}(void) {{\n    return {i};\n}}" for i in range(200)
+        )
+        info = ProjectInfo(files=[make_file("parse.c", big)])
+        budget = estimate_tokens(summarize_source(big)) + 50
+        packed = ContextPacker(budget).pack(info, target="parse")
+
+        assert packed.summarized == ["/p/parse.c"]
+        assert "int f199(void) { ... }" in packed.text
+        assert packed.total_tokens <= budget
+
+    def test_truncate_and_omit(self):
+        """Test truncation and omission once the budget runs out."""
+        info = ProjectInfo(
+            files=[
+                make_file("a.h", "int a;\n" * 400),
+                make_file("b.c", "int b;\n" * 400),
+            ]
+        )
+        packed = ContextPacker(500).pack(info)
+
+        assert packed.truncated == ["/p/a.h"]
+        assert packed.omitted == ["/p/b.c"]
+        assert packed.tokens_per_file["/p/b.c"] == 0
+        assert "truncated" in packed.text
+        assert packed.total_tokens <= 500
@@ -0,0 +1,80 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+from llm_harness.core.repair import prepare_repair, trim_diagnostics
+from llm_harness.models.candidate import Candidate
+
+HARNESS = """#include <stdint.h>
+int LLVMFuzzerTestOneInput(const uint8_t *data, size_t size) {
+    return parse(data);
+}
+"""
+
+OUTPUT = """Error 1: harnesses/harness.c: In function 'LLVMFuzzerTestOneInput':
+harnesses/harness.c:2:51: error: unknown type name 'size_t'
+    2 | int LLVMFuzzerTestOneInput(const uint8_t *data, size_t size) {
+      |                                                   ^~~~~~
+harnesses/harness.c:3:12: warning: implicit declaration of function 'parse'
+harnesses/harness.c:2:51: error: unknown type name 'size_t'
+./parse.h:10:1: note: declared here
+./parse.h:12:5: error: conflicting types for 'parse'
+"""
+
+
+class TestTrimDiagnostics:
+    """Tests for trim_diagnostics."""
+
+    def test_errors_only(self):
+        """Test that only distinct errors are kept, with their lines."""
+        assert trim_diagnostics(OUTPUT, HARNESS) == (
+            "harnesses/harness.c:2:51: error: unknown type name 'size_t'\n"
+            "    int LLVMFuzzerTestOneInput(const uint8_t *data, size_t size) {"
+            "\n./parse.h:12:5: error: conflicting types for 'parse'"
+        )
+
+    def test_max_diagnostics(self):
+        """Test that the number of errors is capped."""
+        trimmed = trim_diagnostics(OUTPUT, HARNESS, max_diagnostics=1)
+        assert "parse.h" not in trimmed
+
+    def test_unparsable_output(self):
+        """Test that output without errors is cut to its last lines."""
+        output = "Error 1: " + "\n".join(f"line {i}" for i in range(50))
+        assert trim_diagnostics(output, HARNESS, max_lines=2) == (
+            "line 48\nline 49"
+        )
+
+
+class TestPrepareRepair:
+    """Tests for prepare_repair."""
+
+    def test_records_failures(self):
+        """Test that failed builds are recorded until out of rounds."""
+        candidate = Candidate(0, "harness.c", "harness", harness=HARNESS)
+        candidate.build_output = OUTPUT
+
+        assert prepare_repair(candidate, attempts=2)
+        assert prepare_repair(candidate, attempts=2)
+        assert not prepare_repair(candidate, attempts=2)
+        assert candidate.repairs == 2
+        assert candidate.build_errors[0][0] == HARNESS
+
+    def test_time_budget(self):
+        """Test that no round starts once the time budget is spent."""
+        candidate = Candidate(0, "harness.c", "harness", harness=HARNESS)
+        assert not prepare_repair(candidate, time_budget=0)
+        assert candidate.repairs == 0
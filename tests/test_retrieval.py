@@ -0,0 +1,166 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+from unittest import mock
+from llm_harness.core import retrieval
+from llm_harness.core.analyzer import ProjectAnalyzer
+from llm_harness.core.retrieval import RetrievalIndex, chunk_file, tokenize
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+SOURCE = """#include "date.h"
+
+/* Parses a date string */
+int dateparse(const char *s, struct tm *out) {
+    return parse_month(s, out) && parse_year(s, out);
+}
+
+static int parse_month(const char *s, struct tm *out) {
+    out->tm_mon = 0;
+    return 1;
+}
+
+void log_message(const char *msg) {
+    puts(msg);
+}
+"""
+
+MAKEFILE = "all:\n\tcc -o date date.c\n"
+
+
+@pytest.fixture
+def project_info():
+    """Fixture for a small project."""
+    return ProjectInfo(
+        files=[
+            ProjectFile(path="date.c", name="date.c", content=SOURCE),
+            ProjectFile(path="Makefile", name="Makefile", content=MAKEFILE),
+        ]
+    )
+
+
+class TestChunking:
+    """Tests for splitting files into chunks."""
+
+    def test_tokenize(self):
+        """Test that identifiers are split into their parts."""
+        terms = tokenize("int parseHTTPHeader_value(const char *s)")
+
+        assert "parsehttpheader_value" in terms
+        assert {"parse", "http", "header", "value"} <= set(terms)
+        assert "int" not in terms
+        assert "const" not in terms
+
+    def test_chunk_by_function(self, project_info):
+        """Test that C files are split into their functions."""
+        chunks = chunk_file(project_info.files[0])
+
+        assert [c.name for c in chunks] == [
+            "dateparse",
+            "parse_month",
+            "log_message",
+        ]
+        assert chunks[0].line == 4
+        # Once in the definition, once more for being the chunk's name
+        assert chunks[0].terms["dateparse"] == 2
+
+    def test_chunk_by_lines(self):
+        """Test that other files are split into windows of lines."""
+        file = ProjectFile(
+            path="notes.txt",
+            name="notes.txt",
+            content="\n".join(f"line {i}" for i in range(5)),
+        )
+        chunks = chunk_file(file, lines_per_chunk=2)
+
+        assert [c.line for c in chunks] == [1, 3, 5]
+
+
+class TestRetrievalIndex:
+    """Tests for the RetrievalIndex class."""
+
+    def test_search(self, project_info):
+        """Test that the most relevant chunks rank first."""
+        index = RetrievalIndex()
+        index.update(project_info)
+
+        results = index.search("month", top_k=2)
+        assert [chunk.name for _, chunk in results][0] == "parse_month"
+        assert len(results) == 2
+        assert index.search("nonexistent") == []
+
+    def test_context_for(self, project_info):
+        """Test the context built from the retrieved chunks."""
+        index = RetrievalIndex()
+        index.update(project_info)
+
+        context = index.context_for("dateparse month", top_k=2)
+        content = context.get_concatenated_content()
+
+        assert [f.name for f in context.files] == ["date.c"]
+        assert content.index("int dateparse") < content.index("parse_month(")
+        assert "log_message" not in content
+
+    def test_incremental_update(self, project_info):
+        """Test that only changed files are chunked again."""
+        index = RetrievalIndex()
+        assert index.update(project_info) == 2
+
+        changed = ProjectInfo(
+            files=[
+                project_info.files[0],
+                ProjectFile(
+                    path="Makefile", name="Makefile", content="clean:\n"
+                ),
+            ]
+        )
+        with mock.patch.object(
+            retrieval, "chunk_file", wraps=chunk_file
+        ) as mock_chunk:
+            assert index.update(changed) == 1
+        assert [c.args[0].path for c in mock_chunk.call_args_list] == [
+            "Makefile"
+        ]
+
+        assert index.update(ProjectInfo(files=changed.files[:1])) == 1
+        assert {c.path for c in index.chunks} == {"date.c"}
+
+    def test_save_and_load(self, project_info, tmp_path):
+        """Test that a saved index is loaded and reused."""
+        path = str(tmp_path / "retrieval.json")
+        index = RetrievalIndex()
+        index.update(project_info)
+        index.save(path)
+
+        loaded = RetrievalIndex.load(path)
+        assert loaded.update(project_info) == 0
+        assert loaded.search("month")[0][1].name == "parse_month"
+        assert RetrievalIndex.load(str(tmp_path / "missing")).chunks == []
+
+    def test_analyzer_updates_index(self, tmp_path):
+        """Test that the analyzer persists the index between runs."""
+        (tmp_path / "date.c").write_text(SOURCE)
+        analyzer = ProjectAnalyzer(str(tmp_path), ["*.c"])
+        project_info = analyzer.collect_project_info()
+
+        analyzer.build_retrieval_index(project_info)
+        assert (tmp_path / ".llm_harness" / "retrieval.json").exists()
+
+        with mock.patch.object(retrieval, "chunk_file") as mock_chunk:
+            index = analyzer.build_retrieval_index(project_info)
+        mock_chunk.assert_not_called()
+        assert index.search("dateparse")
@@ -0,0 +1,300 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import time
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from llm_harness.core.generator import HarnessGenerator
+from llm_harness.core.scheduler import (
+    RequestScheduler,
+    TokenBucket,
+    is_retryable,
+)
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+
+class StatusError(Exception):
+    """Error of a request answered with an HTTP status."""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeClock:
+    """Clock advanced only by sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def server():
+    """
+    Fixture of a local OpenAI-compatible server. Its `replies` are
+    (status, delay) pairs, answered in turn; once they run out, requests
+    succeed at once.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            body = json.loads(self.rfile.read(length))
+            with httpd.lock:
+                httpd.requests.append(body)
+                status, delay = (
+                    httpd.replies.pop(0) if httpd.replies else (200, 0)
+                )
+            time.sleep(delay)
+
+            if status == 200:
+                reply = {
+                    "id": "chatcmpl-1",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": body["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": "int LLVMFuzzerTestOneInput;",
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 1,
+                        "completion_tokens": 1,
+                        "total_tokens": 2,
+                    },
+                }
+            else:
+                reply = {"error": {"message": "slow down", "type": "error"}}
+            data = json.dumps(reply).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.replies = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestTokenBucket:
+    """Tests for the TokenBucket class."""
+
+    def test_acquire(self):
+        """Test that the bucket refills at its rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+
+        assert bucket.acquire(60) == 0
+        assert not bucket.try_acquire(1)
+        assert bucket.acquire(30) == pytest.approx(30)
+        clock.sleep(10)
+        assert bucket.try_acquire(10)
+
+    def test_oversized(self):
+        """Test that amounts over the capacity are clamped."""
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+
+        assert bucket.acquire(1000) == 0
+        assert bucket.acquire(1000) == pytest.approx(60)
+
+    def test_release(self):
+        """Test that an unused amount is put back, up to the capacity."""
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+
+        assert bucket.try_acquire(60)
+        bucket.release(30)
+        assert bucket.try_acquire(30)
+        assert not bucket.try_acquire(1)
+        bucket.release(1000)
+        assert bucket.acquire(60) == 0
+
+
+class TestRequestScheduler:
+    """Tests for the RequestScheduler class."""
+
+    @pytest.mark.parametrize(
+        "error, retryable",
+        [
+            (StatusError(429), True),
+            (StatusError(503), True),
+            (StatusError(400), False),
+            (TimeoutError(), True),
+            (ValueError(), False),
+        ],
+    )
+    def test_is_retryable(self, error, retryable):
+        """Test which failures are retried."""
+        assert is_retryable(error) == retryable
+
+    def test_retries(self):
+        """Test that rate-limited requests are retried."""
+        request = mock.Mock(
+            side_effect=[StatusError(429), StatusError(500), "response"]
+        )
+        scheduler = RequestScheduler(backoff_base=0.01)
+
+        assert scheduler.call(request) == "response"
+        assert request.call_count == 3
+        assert scheduler.retried == 2
+
+    def test_gives_up(self):
+        """Test that requests are not retried forever, nor needlessly."""
+        scheduler = RequestScheduler(max_retries=2, backoff_base=0.01)
+        request = mock.Mock(side_effect=StatusError(429))
+        with pytest.raises(StatusError):
+            scheduler.call(request)
+        assert request.call_count == 3
+
+        request = mock.Mock(side_effect=StatusError(401))
+        with pytest.raises(StatusError):
+            scheduler.call(request)
+        assert request.call_count == 1
+
+    def test_timeout(self):
+        """Test that unanswered requests time out and are retried."""
+        calls = []
+
+        def request():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(1)
+            return "response"
+
+        scheduler = RequestScheduler(timeout=0.2, backoff_base=0.01)
+        start = time.monotonic()
+        assert scheduler.call(request) == "response"
+        assert time.monotonic() - start < 0.8
+        assert len(calls) == 2
+
+    def test_deadline_starts_when_sent(self):
+        """Test that waiting for a free thread does not count as latency."""
+        scheduler = RequestScheduler(timeout=0.3, concurrency=1, max_retries=0)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(scheduler.call, lambda: time.sleep(0.2))
+            time.sleep(0.05)
+            second = executor.submit(
+                scheduler.call, lambda: time.sleep(0.2) or "response"
+            )
+            first.result()
+            assert second.result() == "response"
+
+    def test_hedging(self):
+        """Test that slow requests are sent twice and the first kept."""
+        scheduler = RequestScheduler(hedge=True, hedge_min_samples=3)
+        for _ in range(3):
+            scheduler.call(lambda: time.sleep(0.05))
+        assert scheduler.hedge_threshold() == pytest.approx(0.05, abs=0.05)
+
+        replies = iter([(1.0, "slow"), (0.0, "fast")])
+        lock = threading.Lock()
+
+        def request():
+            with lock:
+                delay, reply = next(replies)
+            time.sleep(delay)
+            return reply
+
+        start = time.monotonic()
+        assert scheduler.call(request) == "fast"
+        assert time.monotonic() - start < 0.5
+        assert scheduler.hedged == 1
+
+        # Unless the request must not be sent twice at once
+        calls = []
+        assert (
+            scheduler.call(
+                lambda: calls.append(time.sleep(0.3)) or "once", hedge=False
+            )
+            == "once"
+        )
+        assert len(calls) == 1
+        assert scheduler.hedged == 1
+
+    def test_hedge_keeps_request_slot(self):
+        """Test that a hedge refused by the token limit uses no request."""
+        scheduler = RequestScheduler(
+            requests_per_minute=2,
+            tokens_per_minute=100,
+            hedge=True,
+            hedge_min_samples=1,
+        )
+        scheduler._latencies.append(0.01)
+
+        assert scheduler.call(lambda: time.sleep(0.1), tokens=100) is None
+        assert scheduler.hedged == 0
+        assert scheduler.requests.try_acquire(1)
+
+    def test_no_hedging_without_samples(self):
+        """Test that requests are not hedged before latencies are known."""
+        scheduler = RequestScheduler(hedge=True)
+        assert scheduler.hedge_threshold() is None
+        assert RequestScheduler().hedge_threshold() is None
+
+    @mock.patch("llm_harness.config.Config.load_env")
+    def test_fake_server(self, mock_load_env, server):
+        """Test a generator against a rate-limiting OpenAI-like server."""
+        generator = HarnessGenerator(
+            "gpt-4o",
+            lm_kwargs={
+                "api_base": f"http://127.0.0.1:{server.server_port}/v1",
+                "api_key": "test",
+            },
+            scheduler=RequestScheduler(timeout=30, backoff_base=0.01),
+        )
+        project_info = ProjectInfo(
+            files=[ProjectFile(path="a.c", name="a.c", content="int a;")]
+        )
+
+        # The first request sets up the client, which takes a while
+        generator.create_harness(project_info, target="warmup")
+        server.requests.clear()
+        generator.scheduler.timeout = 0.5
+        server.replies = [(429, 0), (503, 0), (200, 1.0)]
+
+        harness = generator.create_harness(project_info, target="a")
+        assert harness == "int LLVMFuzzerTestOneInput;"
+        # Rate limited, failed, timed out, and answered
+        assert len(server.requests) == 4
+        assert "harness for the a function" in str(server.requests[0])
@@ -0,0 +1,192 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import random
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from llm_harness.core.generator import HarnessGenerator
+from llm_harness.core.streaming import HarnessExtractor
+from llm_harness.io.file_manager import FileManager
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+HARNESS = """#include <stdint.h>
+#include <stddef.h>
+
+/* Not the end: } */
+int LLVMFuzzerTestOneInput(const uint8_t *data, size_t size);
+
+int LLVMFuzzerTestOneInput(const uint8_t *data, size_t size) {
+    const char *brace = "}";
+    char quote = '\\'';
+    if (size > 0) { // }
+        return data[0] == '}';
+    }
+    return 0;
+}
+"""
+
+
+def extract(response, seed=0):
+    """Feeds a response to an extractor in random pieces."""
+    rng = random.Random(seed)
+    extractor = HarnessExtractor()
+    code = ""
+    i = 0
+    while i < len(response) and not extractor.complete:
+        size = rng.randint(1, 8)
+        code += extractor.feed(response[i : i + size])
+        i += size
+    code += extractor.finish()
+    assert code == extractor.text
+    return code
+
+
+class TestHarnessExtractor:
+    """Tests for the HarnessExtractor class."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_fenced(self, seed):
+        """Test that fences and the chatter around them are dropped."""
+        response = (
+            "Here is the harness:\n```c\n" + HARNESS + "```\n\nIt calls }"
+        )
+        assert extract(response, seed) == HARNESS
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_unfenced_stops_at_entry_point(self, seed):
+        """Test that the harness ends with the entry point's body."""
+        response = HARNESS + "\nThis harness checks the first byte.\n"
+        assert extract(response, seed) == HARNESS
+
+    def test_stops_early(self):
+        """Test that the rest of the response is not processed."""
+        extractor = HarnessExtractor()
+        extractor.feed(HARNESS)
+
+        assert extractor.complete
+        assert extractor.feed("int more(void) { return 1; }\n") == ""
+        assert extractor.text == HARNESS
+
+    def test_code_returned_by_line(self):
+        """Test that code is returned as soon as its line is complete."""
+        extractor = HarnessExtractor()
+
+        assert extractor.feed("```c\n#include <std") == ""
+        assert extractor.feed("int.h>\nint x") == "#include <stdint.h>\n"
+        assert not extractor.complete
+
+    def test_unterminated(self):
+        """Test that a cut off harness is returned as far as it goes."""
+        assert extract("```\nint f(void) {\n    return 0;") == (
+            "int f(void) {\n    return 0;"
+        )
+
+    def test_no_code(self):
+        """Test that a response without recognizable code is kept."""
+        assert extract("Sorry, I cannot help.\nReally.") == (
+            "Sorry, I cannot help.\nReally.\n"
+        )
+
+
+@pytest.fixture
+def server():
+    """
+    Fixture of a local OpenAI-compatible server, streaming its `pieces` and
+    recording how many were sent before the client hung up.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            body = json.loads(self.rfile.read(length))
+            httpd.requests.append(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            try:
+                for piece in httpd.pieces:
+                    chunk = {
+                        "id": "chatcmpl-1",
+                        "object": "chat.completion.chunk",
+                        "created": 0,
+                        "model": body["model"],
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"content": piece},
+                                "finish_reason": None,
+                            }
+                        ],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    httpd.sent += 1
+                    time.sleep(0.01)
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = []
+    httpd.pieces = []
+    httpd.sent = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+
+
+class TestStreamingGenerator:
+    """Tests for the streaming path of HarnessGenerator."""
+
+    @mock.patch("llm_harness.config.Config.load_env", return_value="key")
+    def test_stream(self, mock_load_env, server, tmp_path):
+        """Test that the harness is written and the stream closed early."""
+        response = "```c\n" + HARNESS + "```\nThis harness" + " ..." * 200
+        server.pieces = [
+            response[i : i + 16] for i in range(0, len(response), 16)
+        ]
+        generator = HarnessGenerator(
+            "gpt-4o",
+            lm_kwargs={
+                "api_base": f"http://127.0.0.1:{server.server_port}/v1",
+                "api_key": "key",
+            },
+            stream=True,
+        )
+        project_info = ProjectInfo(
+            files=[ProjectFile(path="a.c", name="a.c", content="int a;")]
+        )
+
+        with FileManager(str(tmp_path)).open_harness() as writer:
+            harness = generator.create_harness(project_info, writer=writer)
+        time.sleep(0.2)
+
+        assert server.requests[0]["stream"] is True
+        assert harness == HARNESS
+        assert (tmp_path / "harnesses" / "harness.c").read_text() == HARNESS
+        assert server.sent < len(server.pieces)
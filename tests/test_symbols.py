@@ -0,0 +1,227 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+from unittest import mock
+from llm_harness.core.analyzer import ProjectAnalyzer
+from llm_harness.core.symbols import SymbolIndex, parse_symbols
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+HEADER = """#ifndef PARSE_H
+#define PARSE_H
+/* Parser state */
+typedef struct parser {
+    int pos;
+    struct token *tok;
+} parser_t;
+
+struct token { int kind; };
+typedef int (*callback_t)(int);
+enum mode { MODE_A, MODE_B };
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+int parse(const char *s, size_t n);
+void reset(parser_t *p);
+#ifdef __cplusplus
+}
+#endif
+#endif
+"""
+
+SOURCE = """#include "parse.h"
+static const char *names[] = { "a", "b" };
+
+// Helpers
+static int level3(parser_t *p) { return 0; }
+static int level2(parser_t *p) { return level3(p); }
+static int helper(parser_t *p) {
+    if (p->pos) { return 1; }
+    return level2(p);
+}
+
+int parse(const char *s, size_t n) {
+    parser_t p = {0};
+    const char *fake = "unused(";
+    return helper(&p);
+}
+
+void reset(parser_t *p) { p->pos = 0; }
+
+int unrelated(void) { return 42; }
+"""
+
+
+@pytest.fixture
+def project_info():
+    """Fixture with a small C project"""
+    return ProjectInfo(
+        files=[
+            ProjectFile(path="parse.h", name="parse.h", content=HEADER),
+            ProjectFile(path="parse.c", name="parse.c", content=SOURCE),
+            ProjectFile(path="Makefile", name="Makefile", content="all:"),
+        ]
+    )
+
+
+class TestParseSymbols:
+    """Tests for parse_symbols."""
+
+    def test_header_symbols(self):
+        """Test declarations found in a header."""
+        symbols = parse_symbols(
+            ProjectFile(path="parse.h", name="parse.h", content=HEADER)
+        )
+        found = {(s.name, s.kind) for s in symbols}
+
+        assert found == {
+            ("parser", "struct"),
+            ("parser_t", "typedef"),
+            ("token", "struct"),
+            ("callback_t", "typedef"),
+            ("mode", "enum"),
+            ("parse", "prototype"),
+            ("reset", "prototype"),
+        }
+
+    def test_source_symbols(self):
+        """Test definitions found in a source file."""
+        symbols = parse_symbols(
+            ProjectFile(path="parse.c", name="parse.c", content=SOURCE)
+        )
+        by_name = {s.name: s for s in symbols}
+
+        assert set(by_name) == {
+            "level3",
+            "level2",
+            "helper",
+            "parse",
+            "reset",
+            "unrelated",
+        }
+        parse = by_name["parse"]
+        assert parse.kind == "function"
+        assert parse.line == 12
+        assert parse.text.startswith("int parse(const char *s, size_t n) {")
+        assert parse.text.endswith("}")
+        assert "helper" in parse.references
+        assert "unused" not in parse.references
+
+    def test_annotated_prototypes(self):
+        """Test prototypes followed by qualifiers and annotation macros."""
+        content = (
+            "extern void *copy (void *dst, const void *src, size_t n)\n"
+            "    __THROW __nonnull ((1, 2));\n"
+            "int MAX(int a, int b);\n"
+            "int (*handler)(int);\n"
+        )
+        symbols = parse_symbols(
+            ProjectFile(path="copy.h", name="copy.h", content=content)
+        )
+
+        assert [(s.name, s.kind) for s in symbols] == [
+            ("copy", "prototype"),
+            ("MAX", "prototype"),
+        ]
+
+
+class TestSymbolIndex:
+    """Tests for the SymbolIndex class."""
+
+    def test_defining_file(self, project_info):
+        """Test finding the file defining a symbol."""
+        index = SymbolIndex.build(project_info)
+
+        assert index.defining_file("parse") == "parse.c"
+        assert index.defining_file("parser_t") == "parse.h"
+        assert index.defining_file("missing") is None
+
+    def test_select_transitive(self, project_info):
+        """Test selecting the target's callees and types."""
+        index = SymbolIndex.build(project_info)
+        selected = {(s.name, s.kind) for s in index.select("parse", None)}
+
+        assert ("parse", "function") in selected
+        assert ("parse", "prototype") in selected
+        assert ("level3", "function") in selected
+        assert ("parser_t", "typedef") in selected
+        assert ("token", "struct") in selected
+        assert ("unrelated", "function") not in selected
+        assert ("reset", "function") not in selected
+
+    def test_select_depth(self, project_info):
+        """Test that deep callees are reduced to declarations."""
+        index = SymbolIndex.build(project_info)
+        selected = {s.name: s for s in index.select("parse", 1)}
+
+        assert selected["helper"].kind == "function"
+        assert selected["level2"].kind == "prototype"
+        assert selected["level2"].text == "static int level2(parser_t *p);"
+        assert "level3" not in selected
+
+    def test_select_targets(self, project_info):
+        """Test merging the selections of several functions."""
+        index = SymbolIndex.build(project_info)
+        selected = {s.name for s in index.select(["reset", "unrelated"])}
+
+        assert {"reset", "unrelated", "parser_t"} <= selected
+        assert "helper" not in selected
+
+    def test_context_for(self, project_info):
+        """Test the context built from the selection."""
+        context = SymbolIndex.build(project_info).context_for("parse")
+        content = context.get_concatenated_content()
+
+        assert [f.name for f in context.files] == ["parse.c", "parse.h"]
+        assert content.count("typedef struct parser {") == 1
+        assert "unrelated" not in content
+        assert "names[]" not in content
+
+    def test_save_and_load(self, project_info, tmp_path):
+        """Test that saved indexes are reused for the same fingerprint."""
+        path = str(tmp_path / "symbols.json")
+        index = SymbolIndex.build(project_info)
+        index.save(path)
+
+        loaded = SymbolIndex.load(path, project_info.get_fingerprint())
+        assert loaded is not None
+        assert loaded.defining_file("parse") == "parse.c"
+        assert SymbolIndex.load(path, "other fingerprint") is None
+
+    def test_load_other_version(self, project_info, tmp_path):
+        """Test that indexes saved by another parser version are rebuilt."""
+        path = str(tmp_path / "symbols.json")
+        SymbolIndex.build(project_info).save(path)
+
+        with mock.patch("llm_harness.core.symbols.INDEX_VERSION", 2):
+            assert (
+                SymbolIndex.load(path, project_info.get_fingerprint()) is None
+            )
+
+    def test_analyzer_caches_index(self, tmp_path):
+        """Test that the analyzer rebuilds the index only on changes."""
+        (tmp_path / "parse.h").write_text(HEADER)
+        (tmp_path / "parse.c").write_text(SOURCE)
+        analyzer = ProjectAnalyzer(str(tmp_path), ["*.c", "*.h"])
+        project_info = analyzer.collect_project_info()
+
+        analyzer.build_symbol_index(project_info)
+        with mock.patch.object(SymbolIndex, "build") as mock_build:
+            index = analyzer.build_symbol_index(project_info)
+        mock_build.assert_not_called()
+        assert index.lookup("parse")
@@ -0,0 +1,125 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+from llm_harness.core.symbols import SymbolIndex
+from llm_harness.core.targets import rank_targets, split_parameters
+from llm_harness.models.project import ProjectFile, ProjectInfo
+
+HEADER = """#include <stdio.h>
+#include <stdint.h>
+int config_load(FILE *f);
+int msg_decode(const uint8_t *data, size_t len, struct msg *out);
+int add(int a, int b);
+"""
+
+SOURCE = """#include "msg.h"
+static int read_field(const uint8_t *p, size_t n) {
+    if (n < 2) { return -1; }
+    return p[0] << 8 | p[1];
+}
+
+static int check(int v) { return v > 0; }
+
+int msg_decode(const uint8_t *data, size_t len, struct msg *out) {
+    int field = read_field(data, len);
+    if (!check(field)) {
+        return -1;
+    }
+    out->field = field;
+    return 0;
+}
+
+int config_load(FILE *f) { return fgetc(f); }
+
+int add(int a, int b) { return a + b; }
+
+int internal_state(char *name) { return name[0]; }
+
+void init(void) { }
+
+int main(int argc, char **argv) { return msg_decode(0, 0, 0); }
+"""
+
+
+@pytest.fixture
+def index():
+    """Fixture with the symbol index of a small C project"""
+    return SymbolIndex.build(
+        ProjectInfo(
+            files=[
+                ProjectFile(path="msg.h", name="msg.h", content=HEADER),
+                ProjectFile(path="msg.c", name="msg.c", content=SOURCE),
+            ]
+        )
+    )
+
+
+class TestSplitParameters:
+    """Tests for split_parameters."""
+
+    def test_parameters(self, index):
+        """Test splitting a function's parameters."""
+        (decode,) = [
+            s for s in index.lookup("msg_decode") if s.kind == "function"
+        ]
+
+        assert split_parameters(decode) == [
+            "const uint8_t *data",
+            "size_t len",
+            "struct msg *out",
+        ]
+
+    def test_void(self, index):
+        """Test that `(void)` has no parameters."""
+        (init,) = index.lookup("init")
+
+        assert split_parameters(init) == []
+
+
+class TestRankTargets:
+    """Tests for rank_targets."""
+
+    def test_ranking(self, index):
+        """Test that buffer-taking parsers rank first."""
+        targets = rank_targets(index)
+
+        assert [t.name for t in targets] == [
+            "msg_decode",
+            "config_load",
+            "internal_state",
+            "add",
+        ]
+        decode = targets[0]
+        assert decode.reasons == [
+            "buffer and length",
+            "parser name",
+            "exported",
+        ]
+        assert decode.fan_out == 2
+        assert decode.reachable_lines == 8 + 4 + 1
+        assert "file stream" in targets[1].reasons
+
+    def test_excluded(self, index):
+        """Test that static, parameterless and entry functions are left out."""
+        names = {t.name for t in rank_targets(index)}
+
+        assert not names & {"read_field", "check", "init", "main"}
+
+    def test_count(self, index):
+        """Test returning only the best targets."""
+        assert [t.name for t in rank_targets(index, 1)] == ["msg_decode"]
@@ -0,0 +1,141 @@
+# Copyright (C) 2025 Konstantinos Chousos
+#
+# This file is part of LLM-Harness.
+#
+# LLM-Harness is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# LLM-Harness is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with LLM-Harness.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+from llm_harness.io.walker import GitIgnore, ProjectTree
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Fixture to create a nested project tree on disk"""
+    paths = [
+        "main.c",
+        "Makefile",
+        "src/parser.c",
+        "src/parser.h",
+        "src/gen/table.c",
+        "tests/test.c",
+        "build/main.o",
+        "build/generated.c",
+        ".git/hooks/hook.c",
+        "harnesses/harness.c",
+        "cmake-build-debug/x.c",
+        "vendor/keep.c",
+        "vendor/drop.c",
+        "docs/notes.c",
+    ]
+    for path in paths:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+
+    (tmp_path / ".gitignore").write_text(
+        "# comment\n/docs/\nvendor/*\n!vendor/keep.c\n*.o\n"
+    )
+    (tmp_path / "src" / ".gitignore").write_text("gen/\n")
+    return tmp_path
+
+
+class TestProjectTree:
+    """Tests for the ProjectTree class."""
+
+    def test_files(self, project):
+        """Test that ignored directories and files are skipped."""
+        tree = ProjectTree(str(project))
+        assert tree.files() == [
+            ".gitignore",
+            "Makefile",
+            "main.c",
+            "src/.gitignore",
+            "src/parser.c",
+            "src/parser.h",
+            "tests/test.c",
+            "vendor/keep.c",
+        ]
+
+    def test_match_single_pass(self, project):
+        """Test matching several, overlapping patterns."""
+        tree = ProjectTree(str(project))
+        assert tree.match(["*.c", "*.h", "parser.*", "Makefile"]) == [
+            "Makefile",
+            "main.c",
+            "src/parser.c",
+            "src/parser.h",
+            "tests/test.c",
+            "vendor/keep.c",
+        ]
+
+    def test_match_path_patterns(self, project):
+        """Test patterns matched against relative paths."""
+        tree = ProjectTree(str(project))
+        assert tree.match(["src/*.c"]) == ["src/parser.c"]
+        assert tree.match(["**/*.h"]) == ["src/parser.h"]
+
+    def test_custom_ignored_dirs(self, project):
+        """Test overriding the ignored directory names."""
+        tree = ProjectTree(str(project), ignored_dirs=["src", "tests"])
+        assert tree.match(["*.c"]) == [
+            ".git/hooks/hook.c",
+            "build/generated.c",
+            "cmake-build-debug/x.c",
+            "harnesses/harness.c",
+            "main.c",
+            "vendor/keep.c",
+        ]
+
+    def test_listing_is_cached(self, project):
+        """Test that the tree is walked once until refreshed."""
+        tree = ProjectTree(str(project))
+        tree.files()
+        (project / "new.c").write_text("")
+
+        assert "new.c" not in tree.match(["*.c"])
+        tree.refresh()
+        assert "new.c" in tree.match(["*.c"])
+
+
+class TestGitIgnore:
+    """Tests for the GitIgnore class."""
+
+    def test_unanchored_pattern(self):
+        """Test that slash-less patterns match at any depth."""
+        gitignore = GitIgnore("", ["*.o"])
+        assert gitignore.match("a.o", is_dir=False) is True
+        assert gitignore.match("x/y/a.o", is_dir=False) is True
+        assert gitignore.match("a.c", is_dir=False) is None
+
+    def test_anchored_pattern(self):
+        """Test that patterns with a slash are relative to their base."""
+        gitignore = GitIgnore("sub", ["/out", "gen/*.c"])
+        assert gitignore.match("sub/out", is_dir=True) is True
+        assert gitignore.match("sub/x/out", is_dir=True) is None
+        assert gitignore.match("sub/gen/a.c", is_dir=False) is True
+        assert gitignore.match("out", is_dir=True) is None
+
+    def test_dir_only_and_negation(self):
+        """Test directory-only rules and negated rules."""
+        gitignore = GitIgnore("", ["tmp/", "*.log", "!keep.log"])
+        assert gitignore.match("tmp", is_dir=True) is True
+        assert gitignore.match("tmp", is_dir=False) is None
+        assert gitignore.match("a.log", is_dir=False) is True
+        assert gitignore.match("keep.log", is_dir=False) is False
+
+    def test_double_star(self):
+        """Test `**` matching any number of directories."""
+        gitignore = GitIgnore("", ["a/**/z.c", "logs/**"])
+        assert gitignore.match("a/z.c", is_dir=False) is True
+        assert gitignore.match("a/b/c/z.c", is_dir=False) is True
+        assert gitignore.match("logs/x/y", is_dir=False) is True